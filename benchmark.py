@@ -0,0 +1,185 @@
+"""
+Parser benchmark on synthetic memory reads. Times each parsing stage at several overview sizes, records the memory
+high-water mark of each stage, and writes the results as JSON:
+
+python benchmark.py --overview-rows 10 100 1000 -o tmp/benchmark.json
+
+With --parallel, the parse is also timed with the windows sent to a section pool, to find the crossover with the serial
+parse. The main process keeps the largest window, so sweep the chat size for the bytes sent:
+
+python benchmark.py --parallel --overview-rows 1000 --chat-users 100 1000 10000
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+import lib.user_interface_parser as parser
+from lib.memory_read_reader import read_pruned_ui_tree, SUBTREE_TEXT
+from lib.section_pool import SectionPool
+from lib.ui_node_index import UiNodeIndex
+from lib.ui_tree_generator import generate_ui_tree
+from models.data_models import UiTree
+
+# Section parser of each window type, as named in the parser module, and its arguments after the index and the window.
+SECTION_PARSERS = {
+    'ChatWindowStack': ('__parse_chat_window', (None,)),
+    'OverviewWindow': ('__parse_overview', ()),
+    'DronesWindow': ('__parse_drones_window', ()),
+    'ShipUI': ('__parse_ship_ui', ())
+}
+
+
+def measure(stage: Callable, repeat: int) -> dict:
+    """
+    Run stage repeat times for timing, then once more under tracemalloc for its memory high-water mark.
+    :param stage: Function to measure.
+    :param repeat: Number of timed runs.
+    :return: Timing in seconds, CPU time of this process in seconds, and peak memory in bytes.
+    """
+    timings = []
+    cpu_timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+        stage()
+        cpu_timings.append(time.process_time() - start_cpu_time)
+        timings.append(time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    stage()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'mean': sum(timings) / len(timings), 'min': min(timings), 'max': max(timings),
+            'cpu_mean': sum(cpu_timings) / len(cpu_timings), 'peak_memory': peak_memory}
+
+
+def benchmark_frame(frame_file: str, repeat: int, section_pool: Optional[SectionPool] = None) -> dict:
+    with open(frame_file) as f:
+        ui_tree_root = json.load(f)
+
+    stages = {
+        'json_load': measure(lambda: __load_frame(frame_file), repeat),
+        'stream_read': measure(lambda: __read_frame(frame_file), repeat),
+        'tree_walk': measure(lambda: UiNodeIndex(ui_tree_root), repeat),
+        'parse': measure(lambda: parser.parse_memory_read_to_ui_tree(frame_file), repeat)
+    }
+    if section_pool:
+        # Start the workers before timing.
+        __parse_in_parallel(frame_file, section_pool)
+        stages['parse_parallel'] = measure(lambda: __parse_in_parallel(frame_file, section_pool), repeat)
+
+    # Unchanged frames hit the window cache, the steady state of the incremental mode.
+    window_cache = parser.ParsedWindowCache()
+    parser.parse_memory_read_to_ui_tree(frame_file, window_cache)
+    stages['parse_incremental'] = measure(lambda: parser.parse_memory_read_to_ui_tree(frame_file, window_cache), repeat)
+
+    windows = __read_frame(frame_file)
+    for type_name, (parser_name, arguments) in SECTION_PARSERS.items():
+        window_nodes = getattr(parser, '__find_windows')(windows, [type_name])
+        section_parser = getattr(parser, parser_name)
+        stages[f'section_index.{type_name}'] = measure(
+            lambda: [UiNodeIndex(window) for window in window_nodes], repeat)
+        indexes = [UiNodeIndex(window) for window in window_nodes]
+        stages[f'section_parse.{type_name}'] = measure(
+            lambda: [section_parser(index, index.root, *arguments) for index in indexes], repeat)
+
+    return stages
+
+
+def get_parallel_bytes(frame_file: str) -> int:
+    """
+    :return: JSON size of the windows the parallel parse sends to the workers: all but the largest.
+    """
+    with open(frame_file) as f:
+        windows = getattr(parser, '__find_windows')(
+            read_pruned_ui_tree(f, parser.SECTION_TYPES, keep_section_text=True), parser.SECTION_TYPES)
+    return sum(sorted(len(window[SUBTREE_TEXT]) for window in windows)[:-1])
+
+
+def __parse_in_parallel(frame_file: str, section_pool: SectionPool) -> UiTree:
+    with open(frame_file) as f:
+        return parser.parse_memory_read(f, section_pool=section_pool)
+
+
+def __load_frame(frame_file: str) -> dict:
+    with open(frame_file) as f:
+        return json.load(f)
+
+
+def __read_frame(frame_file: str) -> dict:
+    with open(frame_file) as f:
+        return read_pruned_ui_tree(f, parser.SECTION_TYPES)
+
+
+def __get_command_arguments() -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser()
+
+    arg_parser.add_argument('--overview-rows', help='Overview sizes to benchmark', type=int, nargs='+',
+                            default=[10, 100, 1000])
+    arg_parser.add_argument('--overview-columns', type=int, default=5)
+    arg_parser.add_argument('--chat-users', help='Local chat sizes to benchmark', type=int, nargs='+', default=[200])
+    arg_parser.add_argument('--drones', type=int, default=5)
+    arg_parser.add_argument('--module-slots', type=int, default=8)
+    arg_parser.add_argument('--depth', type=int, default=4)
+    arg_parser.add_argument('--filler-nodes', type=int, default=5000)
+    arg_parser.add_argument('--null-children', help='Write the children of leaves as null, like Sanderling',
+                            action='store_true')
+    arg_parser.add_argument('--parallel', help='Also time the parse with a section pool of N workers', type=int,
+                            nargs='?', const=0, metavar='N')
+    arg_parser.add_argument('--repeat', help='Timed runs per stage', type=int, default=5)
+    arg_parser.add_argument('-o', help='Result file', default=f'tmp/benchmark-{int(time.time())}.json')
+
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    # Set working directory to current file dir
+    os.chdir(sys.path[0])
+
+    args = __get_command_arguments()
+    os.makedirs('tmp', exist_ok=True)
+    benchmark_frame_file = 'tmp/benchmark-frame.json'
+    # Every window is sent, whatever its size, to time the parallel parse below the pool's threshold as well.
+    benchmark_pool = SectionPool(args.parallel or None, min_parallel_bytes=0) if args.parallel is not None else None
+    results = []
+    for overview_rows in args.overview_rows:
+        for chat_users in args.chat_users:
+            with open(benchmark_frame_file, 'w') as frame_file:
+                json.dump(generate_ui_tree(overview_rows, args.overview_columns, chat_users, args.drones,
+                                           args.module_slots, args.depth, args.filler_nodes,
+                                           null_children=args.null_children), frame_file)
+            frame_bytes = os.path.getsize(benchmark_frame_file)
+            stages = benchmark_frame(benchmark_frame_file, args.repeat, benchmark_pool)
+            result = {
+                'overview_rows': overview_rows,
+                'chat_users': chat_users,
+                'frame_bytes': frame_bytes,
+                'stages': stages
+            }
+            print(f'{overview_rows} overview rows, {chat_users} chat users, {frame_bytes / 1e6:.1f} MB:')
+            if benchmark_pool:
+                result['parallel_bytes'] = get_parallel_bytes(benchmark_frame_file)
+                print(f'  {result["parallel_bytes"] / 1e6:.2f} MB sent to {benchmark_pool.max_workers} workers')
+            results.append(result)
+            for stage_name, stage in stages.items():
+                print(f'  {stage_name:40} {stage["mean"] * 1000:9.2f} ms  {stage["cpu_mean"] * 1000:9.2f} ms CPU  '
+                      f'{stage["peak_memory"] / 1e6:8.2f} MB peak')
+    if benchmark_pool:
+        benchmark_pool.close()
+
+    os.makedirs(os.path.dirname(args.o) or '.', exist_ok=True)
+    with open(args.o, 'w') as f:
+        json.dump({
+            'time': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': {key: value for key, value in vars(args).items() if key != 'o'},
+            'results': results
+        }, f, indent=2)
+    print(f'Results written to {args.o}')
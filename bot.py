@@ -1,22 +1,30 @@
 import argparse
-import importlib
-import json
 import logging
 import os
-import shutil
-import subprocess
 import sys
 import time
 import uuid
+from typing import Optional
 
 import lib.sound_module as sound
-import lib.user_interface_parser as parser
 import lib.win_process as win_process
-from lib.user_interface_parser import UiTree
+from lib.client_orchestrator import BotClient, ClientOrchestrator
+from lib.frame_format import FrameWriter
+from lib.frame_ring import get_ring_file
+from lib.metrics import MetricsWriter
+from lib.bot_reloader import BotReloader, PluginModules
+from lib.profile_loader import read_profile, initialize_bots
+from lib.alert_dispatcher import FileBackend, get_default_backends
+from lib.root_address_cache import RootAddressCache, get_cache_key
+from lib.section_pool import SectionPool
+from lib.memory_reader import MemoryReaderSession, PipeMemoryReader, SubprocessMemoryReader, READ_MEMORY_EXECUTABLE
 
 CHARACTER_NAME_KEY = 'CharacterName'
 PROCESS_ID_KEY = 'ProcessId'
-BOTS_KEY = 'Bots'
+PROFILES_KEY = 'Profiles'
+PIPE_READER_KEY = 'PipeReader'
+METRICS_FILE = 'tmp/metrics.jsonl'
+ALERTS_FILE = 'tmp/alerts.jsonl'
 
 # Configure logging root
 logging.basicConfig(format='%(asctime)s %(levelname)-8s %(message)s')
@@ -40,60 +48,86 @@ def __get_process_id(profile: dict) -> int:
     return pid
 
 
-def __read_ui_tree(pid: int, output_file: str, root_address=None) -> UiTree:
-    os.makedirs('tmp', exist_ok=True)
-
-    read_mem_command = '"mem_reader/read-memory-64-bit.exe" read-memory-eve-online'
-    command = f'{read_mem_command} --remove-other-dict-entries --pid {pid} --output-file {output_file}'
-    if root_address:
-        command += f' --root-address {root_address}'
+def __create_memory_reader_session(pid: int, output_file: str, ring_file: str, session_file: Optional[str],
+                                   use_pipe_reader: bool) -> MemoryReaderSession:
+    backends = [SubprocessMemoryReader(pid, output_file)]
+    # The stock memory reader has no --pipe mode: the persistent reader is only tried when enabled, with the one-shot
+    # reader as the fallback in case it cannot be started.
+    if use_pipe_reader:
+        pipe_command = [READ_MEMORY_EXECUTABLE, 'read-memory-eve-online', '--remove-other-dict-entries',
+                        '--pid', str(pid), '--pipe']
+        backends.insert(0, PipeMemoryReader(pipe_command, ring_file))
+    frame_writer = FrameWriter(session_file) if session_file else None
+    return MemoryReaderSession(backends, lazy=True, frame_writer=frame_writer, section_pool=section_pool)
+
+
+def __create_client(profile_name: str, debug_mode: bool, metrics_writer: Optional[MetricsWriter]) -> BotClient:
+    profile = read_profile(profile_name)
+    process_id = __get_process_id(profile)
+    bot_reloader = None
+    if args.reload:
+        bot_reloader = BotReloader(profile_name, plugin_modules)
+        bots = bot_reloader.load()
     else:
-        logger.info('Detecting UI tree root might take a few minutes...')
-
-    current_attempts = 0
-    max_attempts = 2
-    mem_read_process = None
-    while current_attempts < max_attempts:
-        current_attempts += 1
-        try:
-            mem_read_process = subprocess.run(command, shell=True, capture_output=True, text=True)
-            mem_read_process.check_returncode()
-
-            return parser.parse_memory_read_to_ui_tree(output_file)
-        except subprocess.CalledProcessError as ex:
-            if current_attempts == max_attempts:
-                logger.error(f'Failed to run memory reader: {mem_read_process.stderr}')
-                raise ex
-            else:
-                time.sleep(1)
-
-
-def __initialize_bots(profile: dict) -> list:
-    bots_in_config = []
-    for bot_name, bot_config in profile.get(BOTS_KEY, {}).items():
-        [module_name, class_name] = bot_name.split('.')
-        bot_class = getattr(importlib.import_module(f'plugins.bots.{module_name}'), class_name)
-        bots_in_config.append(bot_class(bot_config))
-
-    if not bots_in_config:
-        raise RuntimeError('No bot is configured!')
-
-    return bots_in_config
+        bots = initialize_bots(profile)
+    client_uuid = uuid.uuid5(uuid.NAMESPACE_URL, profile_name)
+    mem_read_output_file = f'tmp/mem-read-{client_uuid}.json'
+    ring_file = get_ring_file(f'frames-{client_uuid}.ring')
+    logger.info(f'[{profile_name}] Starting bots: {[type(bot).__name__ for bot in bots]}...')
+    session_file = None
+    if args.record:
+        session_file = f'tmp/session-{profile_name}-{int(time.time())}.frames'
+        logger.info(f'[{profile_name}] Recording frames to {session_file}')
+
+    use_pipe_reader = profile.get(PIPE_READER_KEY, args.pipe_reader)
+    memory_reader = __create_memory_reader_session(process_id, mem_read_output_file, ring_file, session_file,
+                                                   use_pipe_reader)
+    root_address_key = get_cache_key(process_id, win_process.get_process_start_time(process_id),
+                                     profile.get(CHARACTER_NAME_KEY))
+    return BotClient(profile_name, memory_reader, bots, debug_mode, metrics_writer, args.profile, root_address_cache,
+                     root_address_key, bot_reloader)
 
 
 def __get_command_arguments() -> argparse.Namespace:
     arg_parser = argparse.ArgumentParser()
 
-    arg_parser.add_argument('-c', help='Client profile file name', required=True)
-    arg_parser.add_argument('-d', help='Save memory read to tmp/ folder when failure occurs', action='store_true')
-
-    return arg_parser.parse_args()
-
-
-def __read_profile() -> dict:
-    profile_path = f'plugins/profiles/{args.c}.json'
-    with open(profile_path, encoding='utf-8') as f:
-        return json.load(f)
+    arg_parser.add_argument('-c', help='Client profile file names', nargs='+', default=[])
+    arg_parser.add_argument('-f', help=f'Fleet file name: a profile listing client profile names under {PROFILES_KEY}')
+    arg_parser.add_argument('-d', help='Capture the memory reads around a failure to tmp/ folder', action='store_true')
+    arg_parser.add_argument('--metrics', help=f'Write per-stage tick timings as JSON lines (default: {METRICS_FILE})',
+                            nargs='?', const=METRICS_FILE)
+    arg_parser.add_argument('--prometheus', help='Also write metrics totals to this Prometheus text-format file')
+    arg_parser.add_argument('--profile', help='cProfile the first N ticks of each client to tmp/profile-<client>.prof. '
+                                              'One client is profiled at a time: ticks run while another client is '
+                                              'profiled are not counted',
+                            type=int, default=0, metavar='N')
+    arg_parser.add_argument('--reload', help='Reload changed bot modules and profile bot configs while running',
+                            action='store_true')
+    arg_parser.add_argument('--record', help='Record every frame to tmp/session-<client>-<time>.frames for replay.py',
+                            action='store_true')
+    arg_parser.add_argument('--parallel-parse', help='Parse the windows of large frames in N worker processes '
+                                                     '(default: one less than the CPU count, at most 4)',
+                            type=int, nargs='?', const=0, metavar='N')
+    arg_parser.add_argument('--pipe-reader', help='Keep one memory reader process per client, for a reader build with '
+                                                  f'--pipe support. A profile can set {PIPE_READER_KEY} instead',
+                            action='store_true')
+    arg_parser.add_argument('--alerts', help=f'Also append alarms and sounds as JSON lines (default: {ALERTS_FILE})',
+                            nargs='?', const=ALERTS_FILE)
+
+    args = arg_parser.parse_args()
+    if not args.c and not args.f:
+        arg_parser.error('At least one client profile (-c) or a fleet file (-f) is required')
+
+    return args
+
+
+def __get_profile_names() -> list[str]:
+    profile_names = list(args.c)
+    if args.f:
+        profile_names.extend(read_profile(args.f).get(PROFILES_KEY, []))
+
+    # Keep the first occurrence only: one client per profile.
+    return list(dict.fromkeys(profile_names))
 
 
 if __name__ == '__main__':
@@ -101,45 +135,26 @@ if __name__ == '__main__':
     os.chdir(sys.path[0])
 
     args = __get_command_arguments()
-    client_profile = __read_profile()
-    process_id = __get_process_id(client_profile)
-    bots = __initialize_bots(client_profile)
     debug_mode = args.d
     if debug_mode:
-        logger.info('Debug mode enabled: Memory read will be saved if failure occurs.')
-
-    ui_tree_root_address = None
-    mem_read_output_file = f'tmp/mem-read-{uuid.uuid5(uuid.NAMESPACE_URL, args.c)}.json'
-    last_success_time = time.time()
-
-    logger.info(f'Starting bots: {[type(bot).__name__ for bot in bots]}...')
-    while True:
-        all_bots_succeeded = True
-
-        if time.time() - last_success_time > 30:
-            sound.alarm(3)
-            logger.warning(f'Monitor is down. Last scan: {time.ctime(last_success_time)} PST')
-
-        try:
-            ui_tree = __read_ui_tree(process_id, mem_read_output_file, ui_tree_root_address)
-            if not ui_tree_root_address:
-                ui_tree_root_address = ui_tree.root_address
-                logger.info(f'Successfully found UI tree root: {ui_tree_root_address}. Bots running...')
-
-            for bot in bots:
-                try:
-                    bot.run(ui_tree)
-                except Exception as e:
-                    logger.warning(f'Bot: {type(bot).__name__} failed execution: {str(e)}')
-                    all_bots_succeeded = False
-                    if debug_mode:
-                        shutil.copy2(mem_read_output_file, f'tmp/debug-{time.time()}.json')
-
-            if all_bots_succeeded:
-                last_success_time = time.time()
-        except (Exception,):
-            logger.exception('Bot execution failed!')
-            if debug_mode:
-                shutil.copy2(mem_read_output_file, f'tmp/debug-{time.time()}.json')
-
-        time.sleep(3)
+        logger.info('Debug mode enabled: Recent memory reads will be captured to tmp/ if a failure occurs.')
+
+    os.makedirs('tmp', exist_ok=True)
+    root_address_cache = RootAddressCache()
+    plugin_modules = PluginModules()
+    metrics_writer = None
+    if args.metrics or args.prometheus:
+        metrics_writer = MetricsWriter(args.metrics or METRICS_FILE, args.prometheus)
+        logger.info(f'Metrics enabled: {metrics_writer.jsonl_file}')
+    if args.alerts:
+        sound.configure(get_default_backends() + [FileBackend(args.alerts)])
+        logger.info(f'Alerts written to: {args.alerts}')
+    # Shared by the clients.
+    section_pool = None
+    if args.parallel_parse is not None:
+        section_pool = SectionPool(args.parallel_parse or None)
+        logger.info(f'Parallel parse enabled: {section_pool.max_workers} '
+                    f'{"threads" if section_pool.uses_threads else "processes"}')
+    clients = [__create_client(profile_name, debug_mode, metrics_writer) for profile_name in __get_profile_names()]
+
+    ClientOrchestrator(clients, metrics_writer=metrics_writer).run()
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+try:
+    import winsound
+except ImportError:
+    # Not on Windows: only the file and null backends work.
+    winsound = None
+
+ALARM = 'alarm'
+SOUND = 'sound'
+# Seconds before the same alert is played again, and number of distinct alerts waiting at most.
+MIN_ALERT_INTERVAL = 5
+MAX_PENDING_ALERTS = 32
+ALARM_FREQUENCY = 440
+ALARM_BEEP_MILLIS = 250
+SOUND_RESOURCES_DIR = 'plugins/resources'
+
+logger = logging.getLogger('bot-master')
+
+
+@dataclass
+class Alert:
+    # ALARM, with the number of beeps as argument, or SOUND, with the sound file name.
+    kind: str
+    argument: object
+    # Client or bot raising the alert.
+    source: Optional[str] = None
+    time: float = 0
+    # Same alerts raised while this one was waiting, merged into it.
+    repeats: int = 0
+
+    @property
+    def key(self) -> tuple:
+        return self.kind, self.argument, self.source
+
+
+class NullBackend:
+    """
+    Drops the alerts, e.g. on Linux or in tests.
+    """
+    def play(self, alert: Alert) -> None:
+        pass
+
+
+class WinsoundBackend:
+    def __init__(self, resources_dir: str = SOUND_RESOURCES_DIR):
+        if winsound is None:
+            raise RuntimeError('winsound is only available on Windows')
+        self.resources_dir = resources_dir
+
+    def play(self, alert: Alert) -> None:
+        if alert.kind == ALARM:
+            for _ in range(alert.argument):
+                winsound.Beep(ALARM_FREQUENCY, ALARM_BEEP_MILLIS)
+        elif alert.kind == SOUND:
+            winsound.PlaySound(f'{self.resources_dir}/{alert.argument}', winsound.SND_ASYNC)
+
+
+class FileBackend:
+    """
+    Appends each alert to a JSON-lines file, for a log or for a webhook relay tailing the file.
+    """
+    def __init__(self, alert_file: str):
+        self.alert_file = alert_file
+        alert_dir = os.path.dirname(alert_file)
+        if alert_dir:
+            os.makedirs(alert_dir, exist_ok=True)
+
+    def play(self, alert: Alert) -> None:
+        with open(self.alert_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(asdict(alert)) + '\n')
+
+
+class AlertDispatcher:
+    """
+    Play alerts on a worker thread, so raising one never blocks the caller. An alert raised again while it is still
+    waiting is merged into the waiting one, and the same alert (kind, argument and source) is accepted at most once
+    every min_interval seconds. Every backend plays every alert; a failing backend does not stop the others.
+    """
+    def __init__(self, backends: list, min_interval: float = MIN_ALERT_INTERVAL,
+                 max_pending: int = MAX_PENDING_ALERTS):
+        self.backends = backends
+        self.min_interval = min_interval
+        self.max_pending = max_pending
+        self.pending: OrderedDict[tuple, Alert] = OrderedDict()
+        self.last_accepted: dict[tuple, float] = {}
+        self.counters = {'accepted': 0, 'coalesced': 0, 'rate_limited': 0, 'dropped': 0, 'played': 0, 'failed': 0}
+        self.closed = False
+        self.condition = threading.Condition()
+        self.worker = threading.Thread(target=self.__run, name='alert-dispatcher', daemon=True)
+        self.worker.start()
+
+    def submit(self, kind: str, argument, source: Optional[str] = None) -> bool:
+        """
+        Queue an alert.
+        :param kind: ALARM or SOUND.
+        :param argument: Number of beeps of an ALARM, file name of a SOUND.
+        :param source: Client or bot raising the alert.
+        :return: Whether the alert was queued, rather than merged, rate limited or dropped.
+        """
+        alert = Alert(kind, argument, source, time.time())
+        with self.condition:
+            if self.closed:
+                return False
+            if alert.key in self.pending:
+                self.pending[alert.key].repeats += 1
+                self.counters['coalesced'] += 1
+                return False
+
+            now = time.monotonic()
+            if now - self.last_accepted.get(alert.key, -self.min_interval) < self.min_interval:
+                self.counters['rate_limited'] += 1
+                return False
+            if len(self.pending) >= self.max_pending:
+                self.counters['dropped'] += 1
+                return False
+
+            self.last_accepted[alert.key] = now
+            self.pending[alert.key] = alert
+            self.counters['accepted'] += 1
+            self.condition.notify()
+            return True
+
+    def close(self, timeout: float = 1) -> None:
+        """
+        Stop the worker once the waiting alerts are played, waiting at most timeout seconds.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.worker.join(timeout)
+
+    def __run(self) -> None:
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                (_, alert) = self.pending.popitem(last=False)
+
+            for backend in self.backends:
+                try:
+                    backend.play(alert)
+                    self.counters['played'] += 1
+                except Exception as e:
+                    self.counters['failed'] += 1
+                    logger.warning(f'Alert backend {type(backend).__name__} failed to play {alert.kind}: {e}')
+
+
+def get_default_backends() -> list:
+    return [WinsoundBackend()] if winsound else [NullBackend()]
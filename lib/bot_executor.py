@@ -0,0 +1,210 @@
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait
+from dataclasses import dataclass
+from typing import Optional
+
+import lib.metrics as metrics
+from models.data_models import UiTree
+from models.read_only_view import ReadOnlyView
+
+# Bot classes declare their time budget per run with this attribute, in seconds. e.g.: time_budget = 0.5
+TIME_BUDGET_ATTRIBUTE = 'time_budget'
+DEFAULT_TIME_BUDGET = 2
+# Bot classes set this attribute to True to run in a worker process, for CPU-heavy decisions. The bot is copied to the
+# worker for each run, so changes to its attributes are not kept between runs.
+RUN_IN_PROCESS_ATTRIBUTE = 'run_in_process'
+
+logger = logging.getLogger('bot-master')
+
+
+@dataclass
+class BotHealth:
+    runs: int = 0
+    failures: int = 0
+    # Runs past the time budget, and runs skipped because the previous run was still going.
+    overruns: int = 0
+    skipped_runs: int = 0
+    total_latency: float = 0
+    max_latency: float = 0
+    last_latency: float = 0
+    last_run_failed: bool = False
+    last_run_overran: bool = False
+    # Traceback of the last failed run.
+    last_error: str = ''
+    # The running run was already counted as an overrun, when its budget ran out.
+    overrun_counted: bool = False
+
+    @property
+    def healthy(self) -> bool:
+        return not self.last_run_failed and not self.last_run_overran
+
+    def count_overrun(self) -> bool:
+        """
+        :return: Whether the overrun of the running run was not counted before.
+        """
+        self.last_run_overran = True
+        if self.overrun_counted:
+            return False
+        self.overruns += 1
+        self.overrun_counted = True
+        return True
+
+    def record(self, latency: float, failed: bool, overran: bool) -> None:
+        self.runs += 1
+        self.failures += failed
+        self.overrun_counted = False
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.last_latency = latency
+        self.last_run_failed = failed
+        self.last_run_overran = overran
+
+    def report(self) -> str:
+        mean_latency = self.total_latency / self.runs if self.runs else 0
+        return f'{self.runs} runs, latency mean: {mean_latency:.3f}s, max: {self.max_latency:.3f}s, ' \
+               f'failures: {self.failures}, overruns: {self.overruns}, skipped: {self.skipped_runs}'
+
+
+class BotExecutor:
+    """
+    Run the bots of a client concurrently, each on a read-only view of the UiTree so they cannot change what the other
+    bots see. A run waits for the bots up to their time budgets. A bot still running past its budget is counted as an
+    overrun and left to finish in the background; until it does, its next runs are skipped. Threads cannot be stopped,
+    so an overrunning bot holds its worker, but not the tick.
+
+    Bots with run_in_process = True run in a process pool, on a parsed copy of the UiTree.
+    """
+    def __init__(self, client_name: str, bots: list, process_workers: int = 1):
+        self.client_name = client_name
+        self.bots = bots
+        self.health = {id(bot): BotHealth() for bot in bots}
+        self.running: dict[int, Future] = {}
+        self.lock = threading.Lock()
+        # One worker per bot: a bot never runs twice at once.
+        self.thread_pool_size = max(len(bots), 1)
+        self.thread_pool = ThreadPoolExecutor(max_workers=self.thread_pool_size,
+                                              thread_name_prefix=f'{client_name}-bot')
+        self.process_workers = process_workers
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def healthy(self) -> bool:
+        return all(health.healthy for health in self.health.values())
+
+    def get_health(self, bot) -> BotHealth:
+        # A bot replaced while running records its last run in a health nobody reads.
+        return self.health.get(id(bot)) or BotHealth()
+
+    def set_bots(self, bots: list) -> None:
+        """
+        Replace the bots, e.g. after a reload. Bots kept keep their health. Runs of the replaced bots still going are
+        left to finish.
+        """
+        with self.lock:
+            self.health = {id(bot): self.health.get(id(bot)) or BotHealth() for bot in bots}
+        self.running = {id(bot): self.running[id(bot)] for bot in bots if id(bot) in self.running}
+        self.bots = bots
+        if len(bots) > self.thread_pool_size:
+            self.thread_pool.shutdown(wait=False)
+            self.thread_pool_size = len(bots)
+            self.thread_pool = ThreadPoolExecutor(max_workers=self.thread_pool_size,
+                                                  thread_name_prefix=f'{self.client_name}-bot')
+
+    def run(self, ui_tree: UiTree, bots: list) -> list:
+        """
+        Run bots on the UiTree and wait for them, up to their time budgets.
+        :param ui_tree: UiTree of this tick.
+        :param bots: Bots due this tick.
+        :return: Bots that failed or overran in this run.
+        """
+        ui_tree_view = ReadOnlyView(ui_tree)
+        start_time = time.perf_counter()
+        submitted = {}
+        for bot in bots:
+            running_future = self.running.get(id(bot))
+            if running_future and not running_future.done():
+                self.__skip(bot)
+                continue
+            submitted[self.__submit(bot, ui_tree, ui_tree_view)] = bot
+
+        unhealthy_bots = []
+        # Each bot is waited for until its own budget runs out, shortest budget first.
+        for bot_future, bot in sorted(submitted.items(), key=lambda item: get_time_budget(item[1])):
+            deadline = start_time + get_time_budget(bot)
+            wait([bot_future], timeout=max(0.0, deadline - time.perf_counter()))
+            if not bot_future.done():
+                logger.warning(f'[{self.client_name}] Bot: {type(bot).__name__} is running past its time budget of '
+                               f'{get_time_budget(bot)}s')
+                self.__count_overrun(bot)
+                unhealthy_bots.append(bot)
+            elif not self.get_health(bot).healthy:
+                unhealthy_bots.append(bot)
+
+        return unhealthy_bots
+
+    def report(self) -> str:
+        return ', '.join(f'{type(bot).__name__}: {self.get_health(bot).report()}' for bot in self.bots)
+
+    def __submit(self, bot, ui_tree: UiTree, ui_tree_view: ReadOnlyView) -> Future:
+        client_metrics = metrics.get_current()
+        if getattr(bot, RUN_IN_PROCESS_ATTRIBUTE, False):
+            if not self.process_pool:
+                self.process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+            # The worker process gets its own copy of the bot and of the parsed UiTree.
+            ui_tree_copy = UiTree(ui_tree.root_address, ui_tree.chat_windows, ui_tree.overview, ui_tree.drones,
+                                  ui_tree.ship_ui, set(ui_tree.changed_sections), ui_tree.compared_sections,
+                                  ui_tree.selections, ui_tree.history)
+            process_future = self.process_pool.submit(run_bot_in_process, bot, ui_tree_copy)
+            bot_future = self.thread_pool.submit(self.__run_bot, bot, process_future.result, client_metrics)
+        else:
+            bot_future = self.thread_pool.submit(self.__run_bot, bot, lambda: bot.run(ui_tree_view), client_metrics)
+
+        self.running[id(bot)] = bot_future
+        return bot_future
+
+    def __run_bot(self, bot, run, client_metrics: Optional[metrics.ClientMetrics]) -> None:
+        bot_name = type(bot).__name__
+        metrics.set_current(client_metrics)
+        start_time = time.perf_counter()
+        failed = False
+        try:
+            with metrics.stage(f'bot.{bot_name}'):
+                run()
+        except Exception as e:
+            logger.warning(f'[{self.client_name}] Bot: {bot_name} failed execution: {str(e)}')
+            metrics.count(f'bot_failures.{bot_name}')
+            failed = True
+            self.get_health(bot).last_error = traceback.format_exc()
+        finally:
+            latency = time.perf_counter() - start_time
+            overran = latency > get_time_budget(bot)
+            if overran:
+                self.__count_overrun(bot)
+            with self.lock:
+                self.get_health(bot).record(latency, failed, overran)
+            metrics.set_current(None)
+
+    def __count_overrun(self, bot) -> None:
+        with self.lock:
+            newly_counted = self.get_health(bot).count_overrun()
+        if newly_counted:
+            metrics.count(f'bot_overruns.{type(bot).__name__}')
+
+    def __skip(self, bot) -> None:
+        logger.warning(f'[{self.client_name}] Bot: {type(bot).__name__} skipped, its previous run is still going')
+        metrics.count(f'bot_skips.{type(bot).__name__}')
+        with self.lock:
+            health = self.get_health(bot)
+            health.skipped_runs += 1
+            health.last_run_overran = True
+
+
+def get_time_budget(bot) -> float:
+    return getattr(bot, TIME_BUDGET_ATTRIBUTE, None) or DEFAULT_TIME_BUDGET
+
+
+def run_bot_in_process(bot, ui_tree: UiTree) -> None:
+    bot.run(ReadOnlyView(ui_tree))
@@ -0,0 +1,173 @@
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Optional
+
+from lib.profile_loader import BOTS_KEY, get_profile_path, read_profile, get_bot_module_name, create_bot
+
+# Seconds between two checks for changed files.
+RELOAD_CHECK_INTERVAL = 2
+
+logger = logging.getLogger('bot-master')
+
+
+class PluginModules:
+    """
+    Bot modules loaded so far, reloaded when their file changes. Shared by the clients, so a changed module is reloaded
+    once for all of them. The version of a module is the modification time of the file it was last loaded from.
+    """
+    def __init__(self):
+        self.versions: dict[str, float] = {}
+        # Modification time of the files that failed to load, not retried until they change again.
+        self.failed_versions: dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def get(self, module_name: str) -> tuple[ModuleType, float]:
+        """
+        Import the module on first use, or reload it if its file changed since.
+        :param module_name: Full module name.
+        :return: Module and its version.
+        :raise Exception: The module failed to import. A module failing to reload stays at its previous version.
+        """
+        with self.lock:
+            module = sys.modules.get(module_name)
+            if module is None or module_name not in self.versions:
+                module = importlib.import_module(module_name)
+                self.versions[module_name] = self.__get_modification_time(module)
+                return module, self.versions[module_name]
+
+            modification_time = self.__get_modification_time(module)
+            if modification_time in (self.versions[module_name], self.failed_versions.get(module_name)):
+                return module, self.versions[module_name]
+
+            try:
+                module = importlib.reload(module)
+            except Exception:
+                # The classes the running bots were created from are kept by the bots, so they keep running.
+                self.failed_versions[module_name] = modification_time
+                raise
+            self.versions[module_name] = modification_time
+            logger.info(f'Reloaded bot module {module_name}')
+            return module, modification_time
+
+    @staticmethod
+    def __get_modification_time(module: ModuleType) -> float:
+        try:
+            return os.path.getmtime(module.__file__)
+        except (OSError, TypeError):
+            return 0
+
+
+@dataclass
+class LoadedBot:
+    config: dict
+    module_version: float
+    bot: object
+
+
+class BotReloader:
+    """
+    Keep the bots of a client in line with its profile and the bot modules. Between ticks, the client polls for
+    changes: bots whose config or module changed are created again, bots removed from the profile are dropped, and
+    other bots keep their instance and state. A bot that fails to import or construct keeps its previous instance.
+    """
+    def __init__(self, profile_name: str, plugin_modules: PluginModules, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.profile_name = profile_name
+        self.profile_path = get_profile_path(profile_name)
+        self.plugin_modules = plugin_modules
+        self.check_interval = check_interval
+        self.next_check_time = time.time() + check_interval
+        self.profile_version = os.path.getmtime(self.profile_path)
+        self.loaded_bots: dict[str, LoadedBot] = {}
+
+    def load(self) -> list:
+        """
+        Create the bots of the profile.
+        :return: Bots.
+        :raise Exception: A bot failed to import or construct, or no bot is configured.
+        """
+        for bot_name, bot_config in read_profile(self.profile_name).get(BOTS_KEY, {}).items():
+            self.loaded_bots[bot_name] = self.__create(bot_name, bot_config)
+
+        if not self.loaded_bots:
+            raise RuntimeError('No bot is configured!')
+        return self.bots
+
+    @property
+    def bots(self) -> list:
+        return [loaded_bot.bot for loaded_bot in self.loaded_bots.values()]
+
+    def poll(self) -> Optional[list]:
+        """
+        Apply the changes to the profile and the bot modules since the last poll, at most every check_interval.
+        :return: Bots after the changes, or None if nothing changed.
+        """
+        now = time.time()
+        if now < self.next_check_time:
+            return None
+        self.next_check_time = now + self.check_interval
+
+        bot_configs = self.__read_changed_profile()
+        if bot_configs is None:
+            bot_configs = {bot_name: loaded_bot.config for bot_name, loaded_bot in self.loaded_bots.items()}
+
+        changed = False
+        loaded_bots = {}
+        for bot_name, bot_config in bot_configs.items():
+            previous = self.loaded_bots.get(bot_name)
+            try:
+                if previous and previous.config == bot_config and \
+                        previous.module_version == self.__get_module(bot_name)[1]:
+                    loaded_bots[bot_name] = previous
+                    continue
+                loaded_bots[bot_name] = self.__create(bot_name, bot_config)
+                logger.info(f'[{self.profile_name}] {"Reloaded" if previous else "Added"} bot: {bot_name}')
+                changed = True
+            except Exception as e:
+                if previous:
+                    logger.error(f'[{self.profile_name}] Failed to reload bot {bot_name}, keeping the running one: {e}')
+                    loaded_bots[bot_name] = previous
+                else:
+                    logger.error(f'[{self.profile_name}] Failed to add bot {bot_name}: {e}')
+
+        for bot_name in self.loaded_bots.keys() - loaded_bots.keys():
+            logger.info(f'[{self.profile_name}] Removed bot: {bot_name}')
+            changed = True
+
+        if not changed:
+            return None
+        if not loaded_bots:
+            logger.error(f'[{self.profile_name}] No bot left in the profile, keeping the running bots')
+            return None
+
+        self.loaded_bots = loaded_bots
+        return self.bots
+
+    def __read_changed_profile(self) -> Optional[dict]:
+        """
+        :return: Bot configs of the profile, or None if it did not change or cannot be read.
+        """
+        try:
+            profile_version = os.path.getmtime(self.profile_path)
+            if profile_version == self.profile_version:
+                return None
+            bot_configs = read_profile(self.profile_name).get(BOTS_KEY, {})
+        except (OSError, ValueError) as e:
+            logger.error(f'[{self.profile_name}] Failed to read the changed profile, keeping the running bots: {e}')
+            return None
+
+        # Only once read, so a profile saved half-written or invalid is read again on the next poll.
+        self.profile_version = profile_version
+        return bot_configs
+
+    def __get_module(self, bot_name: str) -> tuple[ModuleType, float]:
+        return self.plugin_modules.get(get_bot_module_name(bot_name))
+
+    def __create(self, bot_name: str, bot_config: dict) -> LoadedBot:
+        module, module_version = self.__get_module(bot_name)
+        return LoadedBot(bot_config, module_version, create_bot(bot_name, bot_config, module))
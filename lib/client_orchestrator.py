@@ -0,0 +1,258 @@
+import logging
+import os
+import time
+import traceback
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Optional
+
+import lib.metrics as metrics
+import lib.sound_module as sound
+from lib.bot_executor import BotExecutor, get_time_budget
+from lib.bot_reloader import BotReloader
+from lib.failure_capture import FailureCapture
+from lib.history_recorder import record_ui_tree
+from lib.memory_reader import MemoryReaderSession
+from lib.metrics import ClientMetrics, MetricsWriter, TickProfiler
+from lib.root_address_cache import RootAddressCache
+from lib.tick_scheduler import TickScheduler
+from models.data_models import UiTree
+from models.state_history import StateHistory
+
+# Seconds without a successful tick before the monitor counts as down.
+MONITOR_DEADLINE = 30
+
+logger = logging.getLogger('bot-master')
+
+
+@dataclass
+class ClientStats:
+    start_time: float = 0
+    ticks: int = 0
+    total_latency: float = 0
+    max_latency: float = 0
+    last_latency: float = 0
+    skipped_ticks: int = 0
+    deadline_misses: int = 0
+    max_success_gap: float = 0
+
+    def record(self, latency: float) -> None:
+        self.ticks += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.last_latency = latency
+
+    def report(self) -> str:
+        mean_latency = self.total_latency / self.ticks if self.ticks else 0
+        elapsed_minutes = (time.time() - self.start_time) / 60
+        throughput = self.ticks / elapsed_minutes if elapsed_minutes > 0 else 0
+        return f'{self.ticks} ticks, latency mean: {mean_latency:.2f}s, max: {self.max_latency:.2f}s, ' \
+               f'last: {self.last_latency:.2f}s, throughput: {throughput:.1f} ticks/min, ' \
+               f'skipped: {self.skipped_ticks}, monitor deadline misses: {self.deadline_misses}, ' \
+               f'max gap between successes: {self.max_success_gap:.1f}s'
+
+
+class BotClient:
+    """
+    State of one EVE client: its memory reader session, UI tree root and bots. Each tick reads the UI tree once and runs
+    the due bots on it, concurrently. The monitor is up while every bot is healthy: its last run succeeded within its
+    time budget.
+
+    With a metrics writer, every tick is timed stage by stage (read, decode, tree walk, index and parse of each section,
+    each bot) and written as one JSON line. With profile_ticks, the first ticks are profiled with cProfile.
+
+    In debug mode, the recent frames are kept in memory, and the frames around a failure are captured to tmp/.
+
+    With a bot reloader, changes to the bot modules and the profile are applied between ticks, without losing the
+    reader session or the UI tree root.
+
+    With a root address cache, the UI tree root found for the game client is stored under root_address_key, and the
+    first tick of a later run starts from the stored root once a read confirms it.
+
+    Every tick appends the ship, drones and overview metrics to the history of the client, which the bots query through
+    ui_tree.history. Lazy UiTrees only record the sections the bots use or query, so no section is parsed for the
+    history alone.
+    """
+    def __init__(self, name: str, memory_reader: MemoryReaderSession, bots: list, debug_mode: bool = False,
+                 metrics_writer: Optional[MetricsWriter] = None, profile_ticks: int = 0,
+                 root_address_cache: Optional[RootAddressCache] = None, root_address_key: Optional[str] = None,
+                 bot_reloader: Optional[BotReloader] = None):
+        self.name = name
+        self.memory_reader = memory_reader
+        self.memory_reader.set_bots(bots)
+        self.bots = bots
+        self.debug_mode = debug_mode
+        if debug_mode and not memory_reader.failure_capture:
+            memory_reader.failure_capture = FailureCapture(name)
+        self.ui_tree_root_address = None
+        self.last_success_time = time.time()
+        self.monitor_down = False
+        self.scheduler = TickScheduler(bots)
+        self.stats = ClientStats(start_time=time.time())
+        self.bot_executor = BotExecutor(name, bots)
+        self.metrics_writer = metrics_writer
+        self.metrics = ClientMetrics(name) if metrics_writer else None
+        self.profiler = TickProfiler(profile_ticks, f'tmp/profile-{name}.prof') if profile_ticks else None
+        self.root_address_cache = root_address_cache
+        self.root_address_key = root_address_key
+        self.root_address_restored = root_address_cache is None
+        self.bot_reloader = bot_reloader
+        self.history = StateHistory()
+
+    def tick(self) -> None:
+        start_time = time.time()
+        if self.metrics:
+            self.metrics.start_tick(start_time)
+
+        with self.profiler or nullcontext():
+            self.__run_tick(start_time)
+
+        self.stats.record(time.time() - start_time)
+        self.scheduler.schedule_next(start_time)
+        self.stats.skipped_ticks = self.scheduler.skipped_ticks
+        if self.metrics:
+            self.metrics_writer.write_tick(self.metrics.end_tick(time.time()))
+
+    def __run_tick(self, start_time: float) -> None:
+        self.__check_monitor_deadline(start_time)
+        if self.bot_reloader:
+            self.__reload_bots()
+
+        try:
+            if not self.root_address_restored:
+                self.__restore_root_address()
+
+            ui_tree = self.memory_reader.read_ui_tree(self.ui_tree_root_address)
+            if not self.ui_tree_root_address:
+                self.ui_tree_root_address = ui_tree.root_address
+                logger.info(f'[{self.name}] Successfully found UI tree root: {self.ui_tree_root_address}. '
+                            f'Bots running...')
+                if self.root_address_cache:
+                    self.root_address_cache.put(self.root_address_key, self.ui_tree_root_address)
+
+            now = time.time()
+            self.__record_history(ui_tree, now)
+            due_bots = [bot for bot in self.bots if self.scheduler.is_bot_due(bot, start_time)]
+            for bot in due_bots:
+                self.scheduler.mark_bot_run(bot, start_time)
+            unhealthy_bots = self.bot_executor.run(ui_tree, due_bots)
+            if self.memory_reader.failure_capture:
+                for bot in unhealthy_bots:
+                    self.__capture_bot_failure(bot)
+
+            # After the bots, so a lazy UiTree is not parsed for the scheduler alone.
+            self.memory_reader.record_used_sections(ui_tree)
+            self.scheduler.adapt(ui_tree)
+            if self.bot_executor.healthy:
+                self.last_success_time = time.time()
+                self.monitor_down = False
+        except (Exception,):
+            logger.exception(f'[{self.name}] Bot execution failed!')
+            metrics.count('tick_failures')
+            if self.memory_reader.failure_capture:
+                self.memory_reader.failure_capture.capture_failure(
+                    f'Tick: {traceback.format_exc().splitlines()[-1]}', traceback.format_exc())
+
+    def __record_history(self, ui_tree: UiTree, now: float) -> None:
+        sections = None
+        if self.memory_reader.lazy:
+            sections = self.memory_reader.used_sections | self.history.used_sections
+        record_ui_tree(self.history, ui_tree, now, sections)
+        ui_tree.history = self.history
+
+    def __reload_bots(self) -> None:
+        bots = self.bot_reloader.poll()
+        if bots is None:
+            return
+
+        self.bots = bots
+        self.scheduler.set_bots(bots)
+        self.bot_executor.set_bots(bots)
+        self.memory_reader.set_bots(bots)
+        logger.info(f'[{self.name}] Running bots: {[type(bot).__name__ for bot in bots]}')
+
+    def __capture_bot_failure(self, bot) -> None:
+        health = self.bot_executor.get_health(bot)
+        if health.last_run_failed:
+            error = health.last_error.splitlines()[-1] if health.last_error else ''
+            self.memory_reader.failure_capture.capture_failure(f'{type(bot).__name__}: {error}', health.last_error)
+        else:
+            self.memory_reader.failure_capture.capture_failure(
+                f'{type(bot).__name__}: overran its time budget of {get_time_budget(bot)}s', '')
+
+    def __restore_root_address(self) -> None:
+        self.root_address_restored = True
+        cached_address = self.root_address_cache.get(self.root_address_key)
+        if not cached_address:
+            return
+
+        with metrics.stage('validate_root'):
+            valid = self.memory_reader.validate_root_address(cached_address)
+        if valid:
+            self.ui_tree_root_address = cached_address
+            logger.info(f'[{self.name}] Using cached UI tree root: {cached_address}. Bots running...')
+        else:
+            self.root_address_cache.remove(self.root_address_key)
+            metrics.count('root_address_cache_misses')
+
+    def __check_monitor_deadline(self, now: float) -> None:
+        success_gap = now - self.last_success_time
+        self.stats.max_success_gap = max(self.stats.max_success_gap, success_gap)
+        if success_gap > MONITOR_DEADLINE:
+            if not self.monitor_down:
+                self.monitor_down = True
+                self.stats.deadline_misses += 1
+            sound.alarm(3, self.name)
+            logger.warning(f'[{self.name}] Monitor is down. Last scan: {time.ctime(self.last_success_time)} PST')
+
+
+class ClientOrchestrator:
+    """
+    Tick many clients from one process. Ticks run on a worker pool sized to the cores, but with at least one worker per
+    client: a tick mostly waits on the memory reader process, so a client with a slow read only holds its own worker.
+    Each client ticks when its scheduler says the next tick is due.
+    """
+    def __init__(self, clients: list[BotClient], max_workers: Optional[int] = None, report_interval: float = 60,
+                 metrics_writer: Optional[MetricsWriter] = None):
+        self.clients = clients
+        self.metrics_writer = metrics_writer
+        self.max_workers = max_workers or max(os.cpu_count() or 1, len(clients))
+        self.report_interval = report_interval
+
+    def run(self) -> None:
+        next_report_time = time.time() + self.report_interval
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                now = time.time()
+                busy_clients = set(running.values())
+                for client in self.clients:
+                    if client not in busy_clients and client.scheduler.next_tick_time <= now:
+                        running[executor.submit(client.tick)] = client
+
+                if now >= next_report_time:
+                    self.report()
+                    next_report_time = now + self.report_interval
+
+                busy_clients = set(running.values())
+                idle_tick_times = [
+                    client.scheduler.next_tick_time for client in self.clients if client not in busy_clients]
+                timeout = max(0.0, min(idle_tick_times + [next_report_time]) - time.time())
+                if not running:
+                    time.sleep(timeout)
+                    continue
+
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    client = running.pop(future)
+                    if future.exception():
+                        logger.error(f'[{client.name}] Tick failed: {future.exception()}')
+
+    def report(self) -> None:
+        for client in self.clients:
+            logger.info(f'[{client.name}] {client.stats.report()}')
+            logger.info(f'[{client.name}] {client.bot_executor.report()}')
+        if self.metrics_writer:
+            self.metrics_writer.write_prometheus([client.metrics for client in self.clients if client.metrics])
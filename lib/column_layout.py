@@ -0,0 +1,74 @@
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Optional
+
+from lib.ui_node_index import UiNodeIndex, UiTreeNode
+
+# A text belongs to a column when it fits in the column, give or take this many pixels on each side.
+COLUMN_TOLERANCE = 3
+
+
+class ColumnLayout:
+    """
+    Column header intervals of a list-style window (overview, drones, fleet, probe scanner...), sorted by x so the column
+    of a text is a bisect instead of a scan over every header. When several columns fit a text, the first header in
+    reading order wins.
+    """
+    def __init__(self, columns: tuple[tuple[str, float, float], ...]):
+        """
+        :param columns: (header text, x, width) of each column, in reading order.
+        """
+        self.columns = columns
+        order = sorted(range(len(columns)), key=lambda i: columns[i][1])
+        self.starts = [columns[i][1] for i in order]
+        self.ends = [columns[i][1] + columns[i][2] for i in order]
+        self.positions = order
+        # Nested headers leave the ends unsorted, which rules out the bisect on ends.
+        self.ends_sorted = all(self.ends[i] <= self.ends[i + 1] for i in range(len(order) - 1))
+
+    def find_column(self, x: float, width: float) -> Optional[str]:
+        if not self.ends_sorted:
+            for (name, column_x, column_width) in self.columns:
+                if column_x < x + COLUMN_TOLERANCE and column_x + column_width > x + width - COLUMN_TOLERANCE:
+                    return name
+            return None
+
+        # Columns starting before the text are a prefix of the sorted starts, and columns ending after it are a suffix
+        # of the sorted ends.
+        last = bisect_left(self.starts, x + COLUMN_TOLERANCE)
+        first = bisect_right(self.ends, x + width - COLUMN_TOLERANCE)
+        if first >= last:
+            return None
+        return self.columns[min(self.positions[first:last])][0]
+
+    def assign_texts(self, texts: list[(str, UiTreeNode)], index: UiNodeIndex) -> dict[str, str]:
+        """
+        Map the texts of a list entry to the columns they are displayed under.
+        :param texts: (text, node) tuples of the entry.
+        :param index: Node index the nodes are in.
+        :return: Text of the entry by column header text.
+        """
+        entry_info = {}
+        for (text, node) in texts:
+            position = node.position
+            column = self.find_column(index.xs[position], index.widths[position])
+            if column is not None:
+                entry_info[column] = text
+
+        return entry_info
+
+
+@lru_cache(maxsize=32)
+def get_column_layout(columns: tuple[tuple[str, float, float], ...]) -> ColumnLayout:
+    """
+    Column layout for the header texts and positions. The layout is cached, so a header that did not change since the
+    previous frame is not sorted again.
+    :param columns: (header text, x, width) of each column, in reading order.
+    :return: Column layout.
+    """
+    return ColumnLayout(columns)
+
+
+def get_column_layout_from_texts(header_texts: list[(str, UiTreeNode)], index: UiNodeIndex) -> ColumnLayout:
+    return get_column_layout(tuple(
+        (text, index.xs[node.position], index.widths[node.position]) for (text, node) in header_texts))
@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import zipfile
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import IO, Optional
+
+FRAMES_BEFORE = 5
+FRAMES_AFTER = 2
+# Minimum seconds between two dumps of a client, and total size of the dumps kept in the output folder.
+MIN_DUMP_INTERVAL = 60
+MAX_TOTAL_DUMP_BYTES = 200 * 1024 * 1024
+# Fast rather than small: every new frame is compressed, few are ever dumped.
+COMPRESSION_LEVEL = 1
+# Bytes of a frame hashed or compressed at once.
+CHUNK_SIZE = 1024 * 1024
+
+logger = logging.getLogger('bot-master')
+
+
+class FrameRingBuffer:
+    """
+    The last frames of a client, compressed in memory. Identical frames, common while the UI does not change, are
+    stored once: a frame is hashed first, and only compressed when its digest is new. Frames are read chunk by chunk,
+    so adding one never holds an uncompressed copy of it.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # (timestamp, digest) of each frame, oldest first.
+        self.frames: deque[tuple[float, bytes]] = deque()
+        # Compressed frame and number of references by digest.
+        self.payloads: dict[bytes, list] = {}
+
+    def add(self, frame: IO[bytes], timestamp: float) -> None:
+        """
+        :param frame: Seekable binary file of the frame JSON.
+        :param timestamp: Time the frame was read.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        while chunk := frame.read(CHUNK_SIZE):
+            digest.update(chunk)
+        digest = digest.digest()
+        if digest in self.payloads:
+            self.payloads[digest][1] += 1
+        else:
+            frame.seek(0)
+            self.payloads[digest] = [self.__compress(frame), 1]
+        self.frames.append((timestamp, digest))
+
+        if len(self.frames) > self.capacity:
+            (_, oldest_digest) = self.frames.popleft()
+            self.payloads[oldest_digest][1] -= 1
+            if not self.payloads[oldest_digest][1]:
+                del self.payloads[oldest_digest]
+
+    def get_frames(self, count: int) -> list[tuple[float, bytes]]:
+        """
+        :param count: Number of frames.
+        :return: (timestamp, frame) of the last count frames, oldest first.
+        """
+        return [(timestamp, zlib.decompress(self.payloads[digest][0]))
+                for (timestamp, digest) in list(self.frames)[-count:]]
+
+    @property
+    def memory_size(self) -> int:
+        """
+        :return: Size of the compressed frames held.
+        """
+        return sum(len(payload) for (payload, _) in self.payloads.values())
+
+    @staticmethod
+    def __compress(frame: IO[bytes]) -> bytes:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL)
+        chunks = []
+        while chunk := frame.read(CHUNK_SIZE):
+            chunks.append(compressor.compress(chunk))
+        chunks.append(compressor.flush())
+        return b''.join(chunks)
+
+
+@dataclass
+class PendingDump:
+    failure: str
+    details: str
+    time: float
+    # Frames in the buffer up to the failing one, and frames still to be read after it.
+    frames_before: int
+    frames_to_wait: int
+
+
+class FailureCapture:
+    """
+    Debug capture of one client. Recent frames are kept in a FrameRingBuffer; on a failure, the frames around it are
+    written to a zip file along with the error, once the following frames are read. The same failure is dumped once,
+    dumps of a client are rate limited, and no dump is written once the output folder holds max_total_bytes of them.
+    """
+    def __init__(self, client_name: str, output_dir: str = 'tmp', frames_before: int = FRAMES_BEFORE,
+                 frames_after: int = FRAMES_AFTER, min_dump_interval: float = MIN_DUMP_INTERVAL,
+                 max_total_bytes: int = MAX_TOTAL_DUMP_BYTES):
+        self.client_name = client_name
+        self.output_dir = output_dir
+        self.frames_before = frames_before
+        self.frames_after = frames_after
+        self.min_dump_interval = min_dump_interval
+        self.max_total_bytes = max_total_bytes
+        self.buffer = FrameRingBuffer(frames_before + frames_after + 1)
+        self.dumped_failures: set[str] = set()
+        self.pending_dump: Optional[PendingDump] = None
+        self.last_dump_time = 0.0
+        self.lock = threading.Lock()
+
+    def add_frame(self, frame: IO[bytes]) -> None:
+        """
+        :param frame: Seekable binary file of the frame JSON.
+        """
+        with self.lock:
+            self.buffer.add(frame, time.time())
+            if self.pending_dump:
+                self.pending_dump.frames_to_wait -= 1
+                if self.pending_dump.frames_to_wait <= 0:
+                    self.__dump(self.pending_dump)
+                    self.pending_dump = None
+
+    def capture_failure(self, failure: str, details: str) -> None:
+        """
+        Dump the frames around a failure, after the next frames are read.
+        :param failure: Failure signature, e.g. the failing bot and the error type. A signature is dumped once.
+        :param details: Error description, like the traceback.
+        """
+        with self.lock:
+            now = time.time()
+            if failure in self.dumped_failures or self.pending_dump:
+                return
+            if now - self.last_dump_time < self.min_dump_interval:
+                return
+
+            self.dumped_failures.add(failure)
+            self.last_dump_time = now
+            self.pending_dump = PendingDump(failure, details, now,
+                                            min(self.frames_before + 1, len(self.buffer.frames)), self.frames_after)
+            if self.frames_after <= 0:
+                self.__dump(self.pending_dump)
+                self.pending_dump = None
+
+    def __dump(self, pending_dump: PendingDump) -> None:
+        total_bytes = self.__get_total_dump_bytes()
+        if total_bytes >= self.max_total_bytes:
+            logger.warning(f'[{self.client_name}] Failure not captured, {self.output_dir}/ already holds '
+                           f'{total_bytes / 1e6:.0f} MB of failure captures')
+            return
+
+        frames = self.buffer.get_frames(pending_dump.frames_before + self.frames_after - pending_dump.frames_to_wait)
+        dump_file = f'{self.output_dir}/failure-{self.client_name}-{pending_dump.time:.0f}.zip'
+        os.makedirs(self.output_dir, exist_ok=True)
+        with zipfile.ZipFile(dump_file, 'w', zipfile.ZIP_DEFLATED) as f:
+            f.writestr('failure.txt', f'{time.ctime(pending_dump.time)}\n{pending_dump.failure}\n\n'
+                                      f'{pending_dump.details}')
+            for i, (timestamp, frame) in enumerate(frames):
+                frame_position = i - (pending_dump.frames_before - 1)
+                f.writestr(f'frame-{i:02}-{frame_position:+}-{timestamp:.3f}.json', frame)
+        logger.warning(f'[{self.client_name}] Failure captured to {dump_file}: {pending_dump.failure}')
+
+    def __get_total_dump_bytes(self) -> int:
+        if not os.path.isdir(self.output_dir):
+            return 0
+        return sum(entry.stat().st_size for entry in os.scandir(self.output_dir)
+                   if entry.name.startswith('failure-') and entry.name.endswith('.zip'))
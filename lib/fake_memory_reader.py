@@ -0,0 +1,77 @@
+"""
+Stand-in for the persistent memory reader. Speaks the PipeMemoryReader protocol on stdin/stdout and replays recorded
+frames in a loop, so the reader session can run without a game client:
+
+python -m lib.fake_memory_reader tmp/mem-read-1.json tmp/mem-read-2.json --fail-requests 2 3
+
+A request naming a ring file is answered through the frame ring, as the real reader does, unless --no-ring is given.
+"""
+import argparse
+import json
+import sys
+
+from lib.frame_ring import FrameRingWriter, SLOT_SIZE
+from lib.memory_reader import REQUEST_HEADER, RESPONSE_HEADER, STATUS_OK, STATUS_ERROR, STATUS_MAPPED, MAPPED_FRAME
+from lib.ui_node_index import ADDRESS
+
+
+def serve(frame_files: list[str], fail_requests: set[int], exit_after: int = None,
+          check_root_address: bool = False, use_ring: bool = True, slot_size: int = SLOT_SIZE) -> None:
+    frames = []
+    root_addresses = []
+    for frame_file in frame_files:
+        with open(frame_file, 'rb') as f:
+            frames.append(f.read())
+        root_addresses.append(json.loads(frames[-1])[ADDRESS])
+
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    request_count = 0
+    ring = None
+    while exit_after is None or request_count < exit_after:
+        header = stdin.read(REQUEST_HEADER.size)
+        if len(header) != REQUEST_HEADER.size:
+            return
+        (length,) = REQUEST_HEADER.unpack(header)
+        request = json.loads(stdin.read(length))
+        root_address = request['rootAddress']
+        request_count += 1
+        frame_index = (request_count - 1) % len(frames)
+
+        if request_count in fail_requests:
+            status, payload = STATUS_ERROR, f'Simulated failure of request {request_count}'.encode()
+        elif check_root_address and root_address and root_address != root_addresses[frame_index]:
+            status, payload = STATUS_ERROR, f'No UI root at address {root_address}'.encode()
+        else:
+            status, payload = STATUS_OK, frames[frame_index]
+            if use_ring and request.get('ringFile'):
+                if not ring:
+                    ring = FrameRingWriter(request['ringFile'], slot_size=slot_size)
+                sequence = ring.write_frame(payload)
+                if sequence is not None:
+                    status, payload = STATUS_MAPPED, MAPPED_FRAME.pack(sequence)
+
+        stdout.write(RESPONSE_HEADER.pack(status, len(payload)) + payload)
+        stdout.flush()
+
+
+def __get_command_arguments() -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser()
+
+    arg_parser.add_argument('frames', help='Recorded memory read files, replayed in a loop', nargs='+')
+    arg_parser.add_argument('--fail-requests', help='1-based request numbers to answer with an error', type=int,
+                            nargs='*', default=[])
+    arg_parser.add_argument('--exit-after', help='Exit after this many requests, like a crashed reader', type=int)
+    arg_parser.add_argument('--check-root-address', help='Answer with an error when the requested root address is not '
+                                                         'the root of the frame', action='store_true')
+    arg_parser.add_argument('--no-ring', help='Answer in the pipe even when a frame ring is requested, like a reader '
+                                              'without ring support', action='store_true')
+    arg_parser.add_argument('--slot-size', help='Size of the frame ring slots, in bytes', type=int, default=SLOT_SIZE)
+
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = __get_command_arguments()
+    serve(args.frames, set(args.fail_requests), args.exit_after, args.check_root_address, not args.no_ring,
+          args.slot_size)
@@ -0,0 +1,150 @@
+"""
+Compact recorded frames. A session file is a header followed by appended frame records:
+
+    record: timestamp (double), payload length (uint32), payload
+    payload: zlib-compressed JSON of [strings, root]
+
+Frames are pruned to the windows the parser reads and their ancestors. Node addresses, type names, entry keys and
+string entry values are replaced by their index in the strings table of the frame. A node is encoded as:
+
+    [address, type name, entry keys, entry values, positions of the interned entry values, children or null]
+"""
+import io
+import json
+import struct
+import zlib
+from typing import IO, Iterable, Iterator, Optional
+
+from lib.memory_read_reader import read_pruned_ui_tree
+from lib.ui_node_index import ADDRESS, TYPE_NAME, ENTRIES_OF_INTEREST, CHILDREN
+
+SESSION_HEADER = b'EVEFRAMES1\n'
+RECORD_HEADER = struct.Struct('<dI')
+COMPRESSION_LEVEL = 6
+
+
+class FrameFormatError(ValueError):
+    pass
+
+
+class FrameWriter:
+    """
+    Append frames to a session file. An existing session file is appended to, not overwritten.
+    """
+    def __init__(self, session_file: str):
+        self.session_file = session_file
+        self.file = open(session_file, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(SESSION_HEADER)
+
+    def write_frame(self, frame: IO[str], timestamp: float, window_types: Iterable[str]) -> int:
+        """
+        :param frame: Memory read JSON.
+        :param timestamp: Time the frame was read.
+        :param window_types: Type names of the windows to keep, e.g. the section windows and the root types of the
+            registered selectors.
+        :return: Size of the record in bytes.
+        """
+        payload = encode_frame(read_pruned_ui_tree(frame, window_types))
+        self.file.write(RECORD_HEADER.pack(timestamp, len(payload)) + payload)
+        self.file.flush()
+        return RECORD_HEADER.size + len(payload)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def read_frames(session_file: str) -> Iterator[tuple[float, dict]]:
+    """
+    Read the frames of a session file in recording order. A record cut short, like the last one of a session still
+    being recorded, ends the iteration.
+    :param session_file: Session file.
+    :return: (timestamp, UI tree root) of each frame.
+    """
+    with open(session_file, 'rb') as f:
+        if f.read(len(SESSION_HEADER)) != SESSION_HEADER:
+            raise FrameFormatError(f'Not a recorded session file: {session_file}')
+
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) != RECORD_HEADER.size:
+                return
+            timestamp, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) != length:
+                return
+            yield timestamp, decode_frame(payload)
+
+
+def encode_frame(ui_tree_root: dict) -> bytes:
+    strings = {}
+    root = __encode_node(ui_tree_root, strings)
+    return zlib.compress(json.dumps([list(strings), root], separators=(',', ':')).encode(), COMPRESSION_LEVEL)
+
+
+def decode_frame(payload: bytes) -> dict:
+    try:
+        strings, root = json.loads(zlib.decompress(payload))
+    except (zlib.error, ValueError) as ex:
+        raise FrameFormatError(f'Corrupted frame record: {ex}') from ex
+    return __decode_node(root, strings)
+
+
+def frame_to_file(ui_tree_root: dict) -> IO[str]:
+    """
+    Memory read JSON of a decoded frame, as the parser reads it from the memory reader.
+    """
+    return io.StringIO(json.dumps(ui_tree_root))
+
+
+def __intern(text: Optional[str], strings: dict[str, int]) -> Optional[int]:
+    if text is None:
+        return None
+    if text not in strings:
+        strings[text] = len(strings)
+    return strings[text]
+
+
+def __encode_node(ui_tree_root: dict, strings: dict[str, int]) -> list:
+    # Depth-first with an explicit stack: UI trees can be deeper than the recursion limit. Children are pushed in
+    # reverse, so each one is appended to its parent in order.
+    encoded_roots = []
+    stack = [(ui_tree_root, encoded_roots)]
+    while stack:
+        node, parent_children = stack.pop()
+        entries = node.get(ENTRIES_OF_INTEREST) or {}
+        keys = [__intern(key, strings) for key in entries]
+        values = []
+        interned_positions = []
+        for i, value in enumerate(entries.values()):
+            if isinstance(value, str):
+                interned_positions.append(i)
+                value = __intern(value, strings)
+            values.append(value)
+
+        # The subtree hash is computed by the reader when the frame is read again.
+        children = node.get(CHILDREN)
+        encoded_children = None if children is None else []
+        parent_children.append([__intern(node.get(ADDRESS), strings), __intern(node.get(TYPE_NAME), strings), keys,
+                                values, interned_positions, encoded_children])
+        if children:
+            stack.extend((child, encoded_children) for child in reversed(children))
+    return encoded_roots[0]
+
+
+def __decode_node(encoded_root: list, strings: list[str]) -> dict:
+    root = {}
+    stack = [(encoded_root, root)]
+    while stack:
+        encoded_node, node = stack.pop()
+        address, type_name, keys, values, interned_positions, children = encoded_node
+        for i in interned_positions:
+            values[i] = strings[values[i]]
+
+        node[ADDRESS] = None if address is None else strings[address]
+        node[TYPE_NAME] = None if type_name is None else strings[type_name]
+        node[ENTRIES_OF_INTEREST] = {strings[key]: value for key, value in zip(keys, values)}
+        if children is not None:
+            node[CHILDREN] = [{} for _ in children]
+            stack.extend(zip(children, node[CHILDREN]))
+    return root
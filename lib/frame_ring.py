@@ -0,0 +1,170 @@
+"""
+Shared-memory transport of frames: the memory reader writes each frame into a ring of slots of a memory-mapped file,
+and the parser reads it from the mapping instead of a file written to disk and read back. Put the ring file on a tmpfs,
+like /dev/shm, to keep it off the disk altogether.
+
+    header: magic, slot count (uint32), slot size (uint32), last written sequence number (uint64)
+    slot: sequence number (uint64), payload length (uint32), payload
+
+The frame with sequence number n is in slot n % slot count. Sequence numbers start at 1: a slot being written has
+sequence number 0, so a reader can tell a frame overwritten while it reads it.
+"""
+import io
+import mmap
+import os
+import struct
+from typing import IO, Optional
+
+RING_MAGIC = b'EVERING1'
+RING_HEADER = struct.Struct('<8sIIQ')
+SLOT_HEADER = struct.Struct('<QI')
+SLOT_COUNT = 2
+SLOT_SIZE = 32 * 1024 * 1024
+# Directory of the ring files: a tmpfs when there is one.
+SHARED_MEMORY_DIR = '/dev/shm'
+
+
+class FrameRingError(RuntimeError):
+    pass
+
+
+def get_ring_file(name: str) -> str:
+    """
+    :param name: File name of the ring.
+    :return: Path of the ring file on the shared memory tmpfs, or in tmp/ when there is none, like on Windows.
+    """
+    return os.path.join(SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR) else 'tmp', name)
+
+
+class FrameRingWriter:
+    """
+    Memory reader side of the ring. Creates the ring file, replacing an existing one.
+    """
+    def __init__(self, ring_file: str, slot_count: int = SLOT_COUNT, slot_size: int = SLOT_SIZE):
+        self.ring_file = ring_file
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.sequence = 0
+        with open(ring_file, 'wb') as f:
+            f.truncate(RING_HEADER.size + slot_count * (SLOT_HEADER.size + slot_size))
+        self.file = open(ring_file, 'r+b')
+        self.mapping = mmap.mmap(self.file.fileno(), 0)
+        RING_HEADER.pack_into(self.mapping, 0, RING_MAGIC, slot_count, slot_size, 0)
+
+    def write_frame(self, payload: bytes) -> Optional[int]:
+        """
+        :param payload: Memory read JSON.
+        :return: Sequence number of the frame, None if it does not fit in a slot.
+        """
+        if len(payload) > self.slot_size:
+            return None
+        sequence = self.sequence + 1
+        offset = get_slot_offset(sequence, self.slot_count, self.slot_size)
+        SLOT_HEADER.pack_into(self.mapping, offset, 0, 0)
+        start = offset + SLOT_HEADER.size
+        self.mapping[start:start + len(payload)] = payload
+        SLOT_HEADER.pack_into(self.mapping, offset, sequence, len(payload))
+        RING_HEADER.pack_into(self.mapping, 0, RING_MAGIC, self.slot_count, self.slot_size, sequence)
+        self.sequence = sequence
+        return sequence
+
+    def close(self) -> None:
+        self.mapping.close()
+        self.file.close()
+
+
+class FrameRingReader:
+    """
+    Parser side of the ring: opens the frames straight from the mapping.
+    """
+    def __init__(self, ring_file: str):
+        self.ring_file = ring_file
+        with open(ring_file, 'rb') as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mapping) < RING_HEADER.size:
+            self.mapping.close()
+            raise FrameRingError(f'Not a frame ring file: {ring_file}')
+        magic, self.slot_count, self.slot_size, _ = RING_HEADER.unpack_from(self.mapping, 0)
+        if magic != RING_MAGIC:
+            self.mapping.close()
+            raise FrameRingError(f'Not a frame ring file: {ring_file}')
+
+    @property
+    def last_sequence(self) -> int:
+        return RING_HEADER.unpack_from(self.mapping, 0)[3]
+
+    def open_frame(self, sequence: int) -> IO[str]:
+        """
+        :param sequence: Sequence number of the frame.
+        :return: Memory read JSON of the frame, decoded chunk by chunk from the mapping as it is read.
+        :raise FrameRingError: The frame is not in the ring anymore, or is overwritten while read.
+        """
+        return io.TextIOWrapper(MappedFrame(self, sequence), encoding='utf-8')
+
+    def open_frame_bytes(self, sequence: int) -> 'MappedFrame':
+        """
+        :param sequence: Sequence number of the frame.
+        :return: Seekable binary file over the frame in the mapping.
+        :raise FrameRingError: The frame is not in the ring anymore.
+        """
+        return MappedFrame(self, sequence)
+
+    def read_frame_bytes(self, sequence: int) -> bytes:
+        with MappedFrame(self, sequence) as frame:
+            return frame.read()
+
+    def check_sequence(self, offset: int, sequence: int) -> int:
+        """
+        :return: Payload length of the slot at offset.
+        :raise FrameRingError: The slot does not hold the frame with this sequence number.
+        """
+        slot_sequence, length = SLOT_HEADER.unpack_from(self.mapping, offset)
+        if slot_sequence != sequence:
+            raise FrameRingError(f'Frame {sequence} was overwritten in {self.ring_file}')
+        return length
+
+    def close(self) -> None:
+        self.mapping.close()
+
+
+class MappedFrame(io.BufferedIOBase):
+    """
+    Binary file over a frame of the ring. Each read copies only the bytes requested, then checks that the slot still
+    holds the frame.
+    """
+    def __init__(self, ring: FrameRingReader, sequence: int):
+        super().__init__()
+        self.ring = ring
+        self.sequence = sequence
+        self.offset = get_slot_offset(sequence, ring.slot_count, ring.slot_size)
+        self.start = self.offset + SLOT_HEADER.size
+        self.length = ring.check_sequence(self.offset, sequence)
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        end = self.length if size is None or size < 0 else min(self.length, self.position + size)
+        data = self.ring.mapping[self.start + self.position:self.start + end]
+        self.ring.check_sequence(self.offset, self.sequence)
+        self.position = end
+        return data
+
+    def read1(self, size: Optional[int] = -1) -> bytes:
+        return self.read(size)
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.length}[whence]
+        self.position = max(0, min(self.length, base + offset))
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+
+def get_slot_offset(sequence: int, slot_count: int, slot_size: int) -> int:
+    return RING_HEADER.size + (sequence % slot_count) * (SLOT_HEADER.size + slot_size)
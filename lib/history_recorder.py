@@ -0,0 +1,68 @@
+from typing import Iterable, Optional
+
+import lib.metrics as metrics
+from models.data_models import OverviewIndicator, UiTree
+from models.state_history import StateHistory, SHIELD, ARMOR, STRUCTURE, CAPACITOR, DRONE_SHIELD, DRONE_ARMOR, \
+    DRONE_STRUCTURE, DRONES_IN_SPACE, OVERVIEW_ENTRIES, get_indicator_metric
+
+INDICATOR_METRICS = {indicator.value: get_indicator_metric(indicator) for indicator in OverviewIndicator}
+
+
+def record_ui_tree(history: StateHistory, ui_tree: UiTree, time: float,
+                   sections: Optional[Iterable[str]] = None) -> None:
+    """
+    Append the metrics of a frame to the history. Values missing from the frame, like the hit points of a ship UI
+    without gauges, get no sample.
+    :param history: History of the client.
+    :param ui_tree: Frame to record.
+    :param time: Time of the frame, in seconds.
+    :param sections: UiTree sections to record, e.g. the sections a lazy UiTree reads anyway. None for all of them.
+    """
+    sections = None if sections is None else set(sections)
+    with metrics.stage('history'):
+        if sections is None or 'ship_ui' in sections:
+            __record_ship_ui(history, ui_tree, time)
+        if sections is None or 'drones' in sections:
+            __record_drones(history, ui_tree, time)
+        if sections is None or 'overview' in sections:
+            __record_overview(history, ui_tree, time)
+
+
+def __record_ship_ui(history: StateHistory, ui_tree: UiTree, time: float) -> None:
+    ship_ui = ui_tree.ship_ui
+    if not ship_ui:
+        return
+    if ship_ui.hp_percentages:
+        history.append(SHIELD, time, ship_ui.hp_percentages.shield)
+        history.append(ARMOR, time, ship_ui.hp_percentages.armor)
+        history.append(STRUCTURE, time, ship_ui.hp_percentages.structure)
+    if ship_ui.capacitor_percentage is not None:
+        history.append(CAPACITOR, time, ship_ui.capacitor_percentage)
+
+
+def __record_drones(history: StateHistory, ui_tree: UiTree, time: float) -> None:
+    drones_in_space = ui_tree.drones.in_space
+    history.append(DRONES_IN_SPACE, time, len(drones_in_space))
+    hp_percentages = [drone.hp_percentages for drone in drones_in_space if drone.hp_percentages]
+    if hp_percentages:
+        history.append(DRONE_SHIELD, time, sum(hp.shield for hp in hp_percentages) / len(hp_percentages))
+        history.append(DRONE_ARMOR, time, sum(hp.armor for hp in hp_percentages) / len(hp_percentages))
+        history.append(DRONE_STRUCTURE, time, sum(hp.structure for hp in hp_percentages) / len(hp_percentages))
+
+
+def __record_overview(history: StateHistory, ui_tree: UiTree, time: float) -> None:
+    overview = ui_tree.overview
+    counts = dict.fromkeys(INDICATOR_METRICS, 0)
+    all_flags = 0
+    for entry in overview:
+        flags = entry.indicators.flags
+        all_flags |= flags
+        while flags:
+            bit = flags & -flags
+            counts[bit] += 1
+            flags &= ~bit
+
+    history.append(OVERVIEW_ENTRIES, time, len(overview))
+    for bit, count in counts.items():
+        history.append(INDICATOR_METRICS[bit], time, count)
+    history.record_indicators(time, all_flags)
@@ -0,0 +1,184 @@
+import json
+import re
+from typing import IO, Iterable, Optional
+
+from lib.ui_node_index import ADDRESS, CHILDREN, TYPE_NAME
+
+CHUNK_SIZE = 1 << 16
+LOOKAHEAD = 1 << 10
+# Set on the nodes decoded whole: hash of their JSON text, to recognize unchanged subtrees across frames.
+SUBTREE_HASH = 'subtreeHash'
+# Set along with SUBTREE_HASH when asked for: the JSON text itself, e.g. to send the subtree to a worker process.
+SUBTREE_TEXT = 'subtreeText'
+# Node keys never contain escapes. Separators are skipped along with the whitespace around the tokens.
+KEY_TOKEN = re.compile(r'[\s,]*"([^"\\]*)"\s*:\s*')
+START_OF_OBJECT_TOKEN = re.compile(r'[\s,]*({)')
+# Sanderling writes the address and the type name first. Reading both with one match is the fast path.
+NODE_HEADER_TOKEN = re.compile(
+    r'[\s,]*({)\s*"' + ADDRESS + r'"\s*:\s*"([^"\\]*)"\s*,\s*"' + TYPE_NAME + r'"\s*:\s*"([^"\\]*)"')
+END_OF_OBJECT_TOKEN = re.compile(r'\s*(})')
+START_OF_ARRAY_TOKEN = re.compile(r'\s*(\[)')
+END_OF_ARRAY_TOKEN = re.compile(r'\s*(])')
+# Sanderling writes the children of leaves as null.
+NULL_TOKEN = re.compile(r'\s*(null)')
+
+
+class MemoryReadStream:
+    """
+    Buffered, forward-only reader over the memory-read JSON text. Only the unread part of the file, plus the node being
+    read, is held in memory. Values are decoded by the C JSON scanner, straight from the buffer.
+    """
+    def __init__(self, file: IO[str], chunk_size: int = CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.text = ''
+        self.position = 0
+        # Absolute file offset of text[0]
+        self.base = 0
+        self.decoder = json.JSONDecoder()
+
+    def tell(self) -> int:
+        return self.base + self.position
+
+    def seek(self, offset: int) -> None:
+        self.position = offset - self.base
+
+    def compact(self) -> None:
+        """
+        Drop the already consumed text. Nothing before the current position can be seeked to afterwards.
+        """
+        if self.position > self.chunk_size:
+            self.base += self.position
+            self.text = self.text[self.position:]
+            self.position = 0
+
+    def match(self, pattern: re.Pattern) -> Optional[re.Match]:
+        """
+        Match pattern at the current position and consume the match. Tokens are assumed to be shorter than LOOKAHEAD.
+        :param pattern: Compiled pattern.
+        :return: Match, or None if the pattern does not match.
+        """
+        while len(self.text) - self.position < LOOKAHEAD and self.__read_chunk():
+            pass
+
+        token = pattern.match(self.text, self.position)
+        if token:
+            self.position = token.end()
+        return token
+
+    def expect(self, pattern: re.Pattern) -> re.Match:
+        token = self.match(pattern)
+        if not token:
+            raise json.JSONDecodeError(f'Expecting {pattern.pattern!r}', self.text, self.position)
+        return token
+
+    def read_value(self):
+        """
+        Decode the JSON value at the current position. A value that runs past the buffer is retried with more of the file.
+        :return: Decoded value.
+        """
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.position)
+            except json.JSONDecodeError:
+                if not self.__read_chunk():
+                    raise
+                continue
+            # A number or literal ending at the buffer boundary might continue in the next chunk.
+            if end == len(self.text) and self.__read_chunk():
+                continue
+            self.position = end
+            return value
+
+    def __read_chunk(self) -> bool:
+        # Grow geometrically, so retrying a large value costs linear time overall.
+        chunk = self.file.read(max(self.chunk_size, len(self.text) - self.position))
+        if not chunk:
+            return False
+        self.text += chunk
+        return True
+
+
+class NodeFrame:
+    def __init__(self, start: int):
+        self.start = start
+        self.node = {}
+        self.children = []
+        self.in_children = False
+
+
+def read_pruned_ui_tree(file: IO[str], section_types: Iterable[str], chunk_size: int = CHUNK_SIZE,
+                        keep_section_text: bool = False) -> dict:
+    """
+    Read the memory-read JSON as a stream of nodes and only build the subtrees rooted at section_types. Other nodes are
+    kept (without their unrelated children) only when they are ancestors of a section, so the display region offsets
+    and the breadth-first order of the sections are the same as in the fully loaded tree.
+    :param file: Memory-read JSON file.
+    :param section_types: Python object type names of the subtrees to keep.
+    :param chunk_size: Size of each read from the file.
+    :param keep_section_text: Whether to keep the JSON text of the nodes decoded whole, as their SUBTREE_TEXT.
+    :return: Pruned UI tree root.
+    """
+    section_types = frozenset(section_types)
+    stream = MemoryReadStream(file, chunk_size)
+
+    frames = []
+    while True:
+        if not frames or frames[-1].in_children:
+            # Every open node is past its header, so nothing read so far will be seeked to again.
+            stream.compact()
+            if frames and stream.match(END_OF_ARRAY_TOKEN):
+                frames[-1].in_children = False
+                continue
+
+            header_token = stream.match(NODE_HEADER_TOKEN)
+            if header_token:
+                frame = NodeFrame(stream.base + header_token.start(1))
+                frame.node[ADDRESS] = header_token.group(2)
+                frame.node[TYPE_NAME] = header_token.group(3)
+                is_section = header_token.group(3) in section_types
+            else:
+                frame = NodeFrame(stream.base + stream.expect(START_OF_OBJECT_TOKEN).start(1))
+                is_section = False
+            frames.append(frame)
+        else:
+            frame = frames[-1]
+            key_token = stream.match(KEY_TOKEN)
+            if not key_token:
+                stream.expect(END_OF_OBJECT_TOKEN)
+                frames.pop()
+                if CHILDREN in frame.node:
+                    frame.node[CHILDREN] = frame.children
+                if not frames:
+                    return frame.node
+                if frame.children:
+                    frames[-1].children.append(frame.node)
+                continue
+
+            key = key_token.group(1)
+            if key == CHILDREN and TYPE_NAME in frame.node:
+                frame.node[CHILDREN] = None
+                if not stream.match(NULL_TOKEN):
+                    stream.expect(START_OF_ARRAY_TOKEN)
+                    frame.in_children = True
+                continue
+
+            # A node listing its children before its type is decoded whole, like a section.
+            is_section = key == CHILDREN
+            if not is_section:
+                value = stream.read_value()
+                frame.node[key] = value
+                is_section = key == TYPE_NAME and value in section_types
+
+        if is_section:
+            stream.seek(frame.start)
+            start = stream.position
+            node = stream.read_value()
+            text = stream.text[start:stream.position]
+            node[SUBTREE_HASH] = hash(text)
+            if keep_section_text:
+                node[SUBTREE_TEXT] = text
+            frames.pop()
+            if not frames:
+                return node
+            frames[-1].children.append(node)
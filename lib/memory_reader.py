@@ -0,0 +1,299 @@
+import io
+import json
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import time
+from typing import IO, Optional
+
+import lib.metrics as metrics
+import lib.user_interface_parser as parser
+from lib.failure_capture import FailureCapture
+from lib.frame_format import FrameWriter
+from lib.frame_ring import FrameRingReader, FrameRingError
+from lib.memory_read_reader import read_pruned_ui_tree
+from lib.profile_loader import get_bot_selectors
+from lib.section_pool import SectionPool
+from lib.ui_node_index import ADDRESS, TYPE_NAME
+from lib.ui_selector import Selector
+from models.data_models import UiTree
+
+READ_MEMORY_EXECUTABLE = 'mem_reader/read-memory-64-bit.exe'
+UI_ROOT_TYPE_NAME = 'UIRoot'
+
+# Request: payload length, then a JSON payload. Response: status, payload length, then the payload.
+REQUEST_HEADER = struct.Struct('<I')
+RESPONSE_HEADER = struct.Struct('<BI')
+STATUS_OK = 0
+STATUS_ERROR = 1
+# The frame is in the frame ring named by the request: the payload is its sequence number.
+STATUS_MAPPED = 2
+MAPPED_FRAME = struct.Struct('<Q')
+
+logger = logging.getLogger('memory-reader')
+logger.setLevel(logging.INFO)
+
+
+class MemoryReadError(RuntimeError):
+    pass
+
+
+class SubprocessMemoryReader:
+    """
+    One-shot backend: run the memory reader once per frame, which writes the frame to output_file.
+    """
+    def __init__(self, pid: int, output_file: str):
+        self.pid = pid
+        self.output_file = output_file
+
+    def read_frame(self, root_address: Optional[str]) -> IO[str]:
+        os.makedirs(os.path.dirname(self.output_file) or '.', exist_ok=True)
+
+        command = f'"{READ_MEMORY_EXECUTABLE}" read-memory-eve-online --remove-other-dict-entries --pid {self.pid} ' \
+                  f'--output-file {self.output_file}'
+        if root_address:
+            command += f' --root-address {root_address}'
+
+        mem_read_process = subprocess.run(command, shell=True, capture_output=True, text=True)
+        if mem_read_process.returncode != 0:
+            raise MemoryReadError(f'Failed to run memory reader: {mem_read_process.stderr}')
+
+        return open(self.output_file)
+
+    def open_last_frame(self) -> IO[str]:
+        return open(self.output_file)
+
+    def open_last_frame_bytes(self) -> IO[bytes]:
+        return open(self.output_file, 'rb')
+
+    def save_last_frame(self, file_path: str) -> None:
+        shutil.copy2(self.output_file, file_path)
+
+    def close(self) -> None:
+        pass
+
+
+class PipeMemoryReader:
+    """
+    Persistent backend: keep one reader process attached to the game client and request frames over its stdin/stdout
+    with length-prefixed messages. The process is restarted on the next request if it dies.
+
+    With a ring file, the reader is asked to write the frames into a shared-memory frame ring rather than the pipe, and
+    they are parsed straight from the mapping. A reader without ring support, or a frame too large for a ring slot, is
+    answered in the pipe as before.
+    """
+    def __init__(self, command: list[str], ring_file: Optional[str] = None):
+        self.command = command
+        self.ring_file = ring_file
+        self.process: Optional[subprocess.Popen] = None
+        self.ring: Optional[FrameRingReader] = None
+        self.last_frame: bytes = b''
+        # Sequence number of the last frame, when it is in the frame ring.
+        self.last_sequence: Optional[int] = None
+
+    def read_frame(self, root_address: Optional[str]) -> IO[str]:
+        if not self.process or self.process.poll() is not None:
+            self.close()
+            self.__start()
+
+        request = {'rootAddress': root_address}
+        if self.ring_file:
+            request['ringFile'] = self.ring_file
+        request = json.dumps(request).encode()
+        try:
+            self.process.stdin.write(REQUEST_HEADER.pack(len(request)) + request)
+            self.process.stdin.flush()
+            status, length = RESPONSE_HEADER.unpack(self.__read_exactly(RESPONSE_HEADER.size))
+            payload = self.__read_exactly(length)
+        except (OSError, struct.error, MemoryReadError) as ex:
+            self.close()
+            raise MemoryReadError(f'Memory reader pipe is broken: {ex}') from ex
+
+        if status == STATUS_MAPPED:
+            (self.last_sequence,) = MAPPED_FRAME.unpack(payload)
+            self.last_frame = b''
+            return self.open_last_frame()
+        if status != STATUS_OK:
+            raise MemoryReadError(f'Failed to read memory: {payload.decode(errors="replace")}')
+
+        self.last_sequence = None
+        self.last_frame = payload
+        return io.StringIO(payload.decode())
+
+    def open_last_frame(self) -> IO[str]:
+        if self.last_sequence is not None:
+            return self.__get_ring().open_frame(self.last_sequence)
+        return io.StringIO(self.last_frame.decode())
+
+    def open_last_frame_bytes(self) -> IO[bytes]:
+        """
+        :return: Seekable binary file of the last frame JSON, over the ring slot or the pipe payload, without a copy.
+        """
+        if self.last_sequence is not None:
+            return self.__get_ring().open_frame_bytes(self.last_sequence)
+        return io.BytesIO(self.last_frame)
+
+    def save_last_frame(self, file_path: str) -> None:
+        with self.open_last_frame_bytes() as frame, open(file_path, 'wb') as f:
+            shutil.copyfileobj(frame, f)
+
+    def close(self) -> None:
+        if self.process:
+            self.process.kill()
+            self.process.wait()
+            for pipe in (self.process.stdin, self.process.stdout):
+                try:
+                    pipe.close()
+                except OSError:
+                    # Request bytes left in the buffer of a broken pipe.
+                    pass
+            self.process = None
+        # A restarted reader creates the ring file again.
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+        self.last_sequence = None
+
+    def __start(self) -> None:
+        try:
+            self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except OSError as ex:
+            raise MemoryReadError(f'Failed to start memory reader: {ex}') from ex
+        logger.info(f'Started memory reader process. PID: {self.process.pid}')
+
+    def __get_ring(self) -> FrameRingReader:
+        if not self.ring:
+            try:
+                self.ring = FrameRingReader(self.ring_file)
+            except OSError as ex:
+                raise MemoryReadError(f'Failed to map frame ring {self.ring_file}: {ex}') from ex
+        return self.ring
+
+    def __read_exactly(self, size: int) -> bytes:
+        data = self.process.stdout.read(size)
+        if len(data) != size:
+            raise MemoryReadError('Memory reader closed the pipe')
+        return data
+
+
+class MemoryReaderSession:
+    """
+    Read UI trees through the first working backend. A backend failing max_attempts times in a row is dropped in favor
+    of the next one; the last backend is never dropped. In incremental mode, windows unchanged since the previous read
+    are reused instead of parsed again.
+
+    In lazy mode, UI trees parse each section on first access. Only the sections used in earlier frames are read along
+    with the frame; a section used for the first time is read again from the last frame.
+
+    With a frame writer, every frame read is also appended to a recorded session file, for the replay engine. With a
+    failure capture, every frame read is kept in its ring buffer. With a section pool, the windows of large frames are
+    parsed in parallel by its workers.
+
+    The selectors of the bots reading the UI trees, set with set_bots, are evaluated on every frame into
+    UiTree.selections.
+    """
+    def __init__(self, backends: list, max_attempts: int = 2, retry_delay: float = 1, incremental: bool = True,
+                 lazy: bool = False, frame_writer: Optional[FrameWriter] = None,
+                 failure_capture: Optional[FailureCapture] = None, section_pool: Optional[SectionPool] = None):
+        if not backends:
+            raise ValueError('At least one memory reader backend is required')
+
+        self.backends = backends
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.window_cache = parser.ParsedWindowCache() if incremental else None
+        self.lazy = lazy
+        # UiTree attributes accessed by the bots so far, read along with each frame in lazy mode.
+        self.used_sections: set[str] = set()
+        self.frame_writer = frame_writer
+        self.failure_capture = failure_capture
+        self.section_pool = section_pool
+        # Selectors of the current bots, by selection name.
+        self.selectors: dict[str, Selector] = {}
+
+    @property
+    def backend(self):
+        return self.backends[0]
+
+    def read_ui_tree(self, root_address: Optional[str] = None) -> UiTree:
+        if not root_address:
+            logger.info('Detecting UI tree root might take a few minutes...')
+
+        current_attempts = 0
+        while True:
+            current_attempts += 1
+            try:
+                with metrics.stage('read'):
+                    frame = self.backend.read_frame(root_address)
+                with frame:
+                    if self.frame_writer:
+                        self.__record_last_frame()
+                    if self.failure_capture:
+                        self.__capture_last_frame()
+                    if self.lazy:
+                        return parser.parse_memory_read_lazily(
+                            frame, self.backend.open_last_frame, self.window_cache, self.used_sections,
+                            self.section_pool, self.selectors)
+                    return parser.parse_memory_read(frame, self.window_cache, self.section_pool, self.selectors)
+            except (MemoryReadError, FrameRingError) as ex:
+                if current_attempts < self.max_attempts:
+                    metrics.count('read_retries')
+                    time.sleep(self.retry_delay)
+                elif len(self.backends) > 1:
+                    metrics.count('backend_fallbacks')
+                    logger.warning(f'{type(self.backend).__name__} failed, falling back to the next backend: {ex}')
+                    self.backends.pop(0).close()
+                    current_attempts = 0
+                else:
+                    logger.error(str(ex))
+                    raise ex
+
+    def validate_root_address(self, root_address: str) -> bool:
+        """
+        Check with one read that the UI tree root is still at root_address, e.g. an address cached by an earlier run.
+        A failed read does not count against the backend.
+        :param root_address: UI tree root address to check.
+        :return: Whether the read returned a UI root at root_address.
+        """
+        try:
+            with self.backend.read_frame(root_address) as frame:
+                ui_tree_root = read_pruned_ui_tree(frame, ())
+        except (MemoryReadError, FrameRingError, ValueError) as ex:
+            logger.info(f'UI tree root address {root_address} is not valid anymore: {ex}')
+            return False
+
+        if ui_tree_root.get(TYPE_NAME) != UI_ROOT_TYPE_NAME or ui_tree_root.get(ADDRESS) != root_address:
+            logger.info(f'UI tree root address {root_address} is not valid anymore: found a '
+                        f'{ui_tree_root.get(TYPE_NAME)} at {ui_tree_root.get(ADDRESS)}')
+            return False
+        return True
+
+    def __record_last_frame(self) -> None:
+        with metrics.stage('record'), self.backend.open_last_frame() as frame:
+            self.frame_writer.write_frame(frame, time.time(), parser.get_window_types(self.selectors))
+
+    def __capture_last_frame(self) -> None:
+        with metrics.stage('capture'), self.backend.open_last_frame_bytes() as frame:
+            self.failure_capture.add_frame(frame)
+
+    def set_bots(self, bots: list) -> None:
+        """
+        Evaluate the selectors of these bots on the next frames, in place of the selectors of the previous bots.
+        :param bots: Bots reading the UI trees of this session.
+        :raise SelectorError: A selector of a bot is invalid.
+        """
+        self.selectors = get_bot_selectors(bots)
+
+    def record_used_sections(self, ui_tree: UiTree) -> None:
+        self.used_sections.update(getattr(ui_tree, 'used_sections', ()))
+
+    def save_last_frame(self, file_path: str) -> None:
+        self.backend.save_last_frame(file_path)
+
+    def close(self) -> None:
+        for backend in self.backends:
+            backend.close()
+        if self.frame_writer:
+            self.frame_writer.close()
@@ -0,0 +1,250 @@
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+# Upper bounds of the histogram buckets, in seconds.
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, float('inf'))
+TICK_PERIOD_BUCKETS = (0.5, 1, 2, 3, 4, 6, 10, 30, float('inf'))
+
+PROMETHEUS_PREFIX = 'eve_tools'
+
+logger = logging.getLogger('metrics')
+logger.setLevel(logging.INFO)
+
+# Metrics of the tick running on the current thread. Unset while instrumentation is switched off.
+_current_tick = threading.local()
+# Held by the TickProfiler profiling a tick.
+_profiler_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class StageTimer:
+    def __init__(self, metrics: 'ClientMetrics', stage: str):
+        self.metrics = metrics
+        self.stage = stage
+        self.start_time = 0.0
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.metrics.record_stage(self.stage, time.perf_counter() - self.start_time)
+
+
+class NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class ClientMetrics:
+    """
+    Stage timings and counters of one client. The timings and counters of the running tick are kept apart from the
+    totals, so each tick can be written as one record.
+    """
+    def __init__(self, client_name: str):
+        self.client_name = client_name
+        self.stages: dict[str, Histogram] = {}
+        self.counters: dict[str, int] = {}
+        self.tick_period = Histogram(TICK_PERIOD_BUCKETS)
+        self.tick_stages: dict[str, float] = {}
+        self.tick_counters: dict[str, int] = {}
+        self.tick_start_time: Optional[float] = None
+        self.last_tick_start_time: Optional[float] = None
+
+    def start_tick(self, now: float) -> None:
+        if self.last_tick_start_time is not None:
+            self.tick_period.observe(now - self.last_tick_start_time)
+        self.last_tick_start_time = now
+        self.tick_start_time = now
+        self.tick_stages = {}
+        self.tick_counters = {}
+        set_current(self)
+
+    def end_tick(self, now: float) -> dict:
+        """
+        :return: Record of the tick: latency, stage timings in seconds and counters incremented during the tick.
+        """
+        set_current(None)
+        return {
+            'time': now,
+            'client': self.client_name,
+            'latency': now - self.tick_start_time,
+            'stages': self.tick_stages,
+            'counters': self.tick_counters
+        }
+
+    def record_stage(self, stage: str, duration: float) -> None:
+        # A stage entered several times in a tick, like a section parsed from two windows, adds up.
+        self.tick_stages[stage] = self.tick_stages.get(stage, 0) + duration
+        if stage not in self.stages:
+            self.stages[stage] = Histogram(STAGE_BUCKETS)
+        self.stages[stage].observe(duration)
+
+    def count(self, counter: str, value: int = 1) -> None:
+        self.tick_counters[counter] = self.tick_counters.get(counter, 0) + value
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+
+def get_current() -> Optional[ClientMetrics]:
+    return getattr(_current_tick, 'metrics', None)
+
+
+def set_current(metrics: Optional[ClientMetrics]) -> None:
+    """
+    Record the stages and counters of this thread into metrics, e.g. for the work a tick hands over to a worker thread.
+    """
+    _current_tick.metrics = metrics
+
+
+def stage(name: str):
+    """
+    Time a stage of the tick running on this thread: with stage('read'): ...
+    Without instrumentation, this is a no-op context manager.
+    """
+    metrics = get_current()
+    return StageTimer(metrics, name) if metrics else NULL_TIMER
+
+
+def count(counter: str, value: int = 1) -> None:
+    """
+    Increment a counter of the tick running on this thread. Without instrumentation, this does nothing.
+    """
+    metrics = get_current()
+    if metrics:
+        metrics.count(counter, value)
+
+
+class MetricsWriter:
+    """
+    Write tick records to a rolling JSON-lines file, and optionally the totals of every client to a Prometheus
+    text-format file, e.g. for the node exporter textfile collector. The JSON-lines file is rotated to <file>.1 ...
+    <file>.<backups> once it grows past max_bytes.
+    """
+    def __init__(self, jsonl_file: str, prometheus_file: Optional[str] = None, max_bytes: int = 10 * 1024 * 1024,
+                 backups: int = 3):
+        self.jsonl_file = jsonl_file
+        self.prometheus_file = prometheus_file
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock = threading.Lock()
+
+    def write_tick(self, record: dict) -> None:
+        line = json.dumps(record) + '\n'
+        with self.lock:
+            if os.path.exists(self.jsonl_file) and os.path.getsize(self.jsonl_file) + len(line) > self.max_bytes:
+                self.__rotate()
+            with open(self.jsonl_file, 'a') as f:
+                f.write(line)
+
+    def write_prometheus(self, client_metrics: list[ClientMetrics]) -> None:
+        if not self.prometheus_file:
+            return
+
+        lines = [f'# TYPE {PROMETHEUS_PREFIX}_stage_seconds histogram']
+        for metrics in client_metrics:
+            for stage_name, histogram in metrics.stages.items():
+                lines.extend(self.__format_histogram(
+                    f'{PROMETHEUS_PREFIX}_stage_seconds', f'client="{metrics.client_name}",stage="{stage_name}"',
+                    histogram))
+        lines.append(f'# TYPE {PROMETHEUS_PREFIX}_tick_period_seconds histogram')
+        for metrics in client_metrics:
+            lines.extend(self.__format_histogram(
+                f'{PROMETHEUS_PREFIX}_tick_period_seconds', f'client="{metrics.client_name}"', metrics.tick_period))
+        lines.append(f'# TYPE {PROMETHEUS_PREFIX}_events_total counter')
+        for metrics in client_metrics:
+            for counter, value in metrics.counters.items():
+                lines.append(
+                    f'{PROMETHEUS_PREFIX}_events_total{{client="{metrics.client_name}",event="{counter}"}} {value}')
+
+        # Replace the file at once, so a scraper never reads it half written.
+        temporary_file = f'{self.prometheus_file}.tmp'
+        with open(temporary_file, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temporary_file, self.prometheus_file)
+
+    def __rotate(self) -> None:
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{self.jsonl_file}.{i}'):
+                os.replace(f'{self.jsonl_file}.{i}', f'{self.jsonl_file}.{i + 1}')
+        if self.backups > 0:
+            os.replace(self.jsonl_file, f'{self.jsonl_file}.1')
+        else:
+            os.remove(self.jsonl_file)
+
+    @staticmethod
+    def __format_histogram(name: str, labels: str, histogram: Histogram) -> list[str]:
+        lines = []
+        cumulative_count = 0
+        for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+            cumulative_count += bucket_count
+            le = '+Inf' if bound == float('inf') else f'{bound:g}'
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative_count}')
+        lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+        lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return lines
+
+
+class TickProfiler:
+    """
+    cProfile the first ticks of a client, then dump the profile to output_file (readable with pstats or snakeviz).
+    The profiler only sees the thread it is enabled on, which is the one running the tick.
+
+    Only one profiler can be active at a time in a process (Python 3.12 and later refuse a second one), so the clients
+    profile one tick at a time: a tick starting while another client profiles runs without the profiler, and is not
+    counted in the ticks to profile.
+    """
+    def __init__(self, ticks: int, output_file: str):
+        self.remaining_ticks = ticks
+        self.output_file = output_file
+        self.profiler = cProfile.Profile()
+        self.enabled = False
+
+    def __enter__(self):
+        if self.remaining_ticks > 0 and _profiler_lock.acquire(blocking=False):
+            try:
+                self.profiler.enable()
+                self.enabled = True
+            except ValueError as ex:
+                # Another profiler, not one of ours, is active.
+                _profiler_lock.release()
+                logger.warning(f'Tick not profiled: {ex}')
+        return self
+
+    def __exit__(self, *_):
+        if not self.enabled:
+            return
+
+        self.profiler.disable()
+        self.enabled = False
+        _profiler_lock.release()
+        self.remaining_ticks -= 1
+        if self.remaining_ticks == 0:
+            os.makedirs(os.path.dirname(self.output_file) or '.', exist_ok=True)
+            self.profiler.dump_stats(self.output_file)
+            logger.info(f'Profile written to {self.output_file}')
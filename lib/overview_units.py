@@ -0,0 +1,50 @@
+import math
+import re
+from typing import Optional
+
+DISTANCE_COLUMN = 'Distance'
+VELOCITY_COLUMN = 'Velocity'
+ANGULAR_VELOCITY_COLUMN = 'Angular Velocity'
+
+METERS_PER_UNIT = {'m': 1, 'km': 1000, 'AU': 149_597_870_700}
+METERS_PER_SECOND_PER_UNIT = {'m/s': 1, 'km/s': 1000}
+RADIANS_PER_SECOND_PER_UNIT = {'rad/s': 1}
+# A number, e.g. 12,345 or 3.2, and an optional unit. Thousands may be separated by commas or spaces, depending on the
+# client language.
+NUMBER_PATTERN = re.compile(r'^\s*<?\s*(\d[\d,\s]*(?:\.\d+)?)\s*([a-zA-Z/]*)\s*$')
+THOUSANDS_SEPARATOR_PATTERN = re.compile(r'[,\s]')
+
+
+def parse_distance(text: Optional[str]) -> Optional[float]:
+    """
+    :param text: Distance column text, e.g. 12,345 m or 3.2 AU
+    :return: Distance in meters, None if the text is not a distance.
+    """
+    return __parse_number(text, METERS_PER_UNIT, 'm')
+
+
+def parse_velocity(text: Optional[str]) -> Optional[float]:
+    """
+    :param text: Velocity column text, e.g. 1,234 m/s. Without unit, in m/s.
+    :return: Velocity in m/s, None if the text is not a velocity.
+    """
+    return __parse_number(text, METERS_PER_SECOND_PER_UNIT, 'm/s')
+
+
+def parse_angular_velocity(text: Optional[str]) -> Optional[float]:
+    """
+    :param text: Angular velocity column text, e.g. 0.0123. Without unit, in rad/s.
+    :return: Angular velocity in rad/s, None if the text is not an angular velocity.
+    """
+    return __parse_number(text, RADIANS_PER_SECOND_PER_UNIT, 'rad/s')
+
+
+def __parse_number(text: Optional[str], units: dict[str, float], default_unit: str) -> Optional[float]:
+    match = NUMBER_PATTERN.match(text) if text else None
+    if not match:
+        return None
+    unit = units.get(match.group(2) or default_unit)
+    if unit is None:
+        return None
+    value = float(THOUSANDS_SEPARATOR_PATTERN.sub('', match.group(1))) * unit
+    return value if math.isfinite(value) else None
@@ -0,0 +1,68 @@
+import importlib
+import json
+from types import ModuleType
+from typing import Optional
+
+from lib.ui_selector import Selector
+from lib.user_interface_parser import compile_bot_selector
+
+BOTS_KEY = 'Bots'
+BOTS_PACKAGE = 'plugins.bots'
+# Bot classes declare selectors to evaluate on every frame with this attribute, by selection name, e.g.:
+# selectors = {'fleet_members': 'FleetWindow FleetMemberEntry'}. Matching nodes are in ui_tree.selections.
+SELECTORS_ATTRIBUTE = 'selectors'
+
+
+def get_profile_path(profile_name: str) -> str:
+    return f'plugins/profiles/{profile_name}.json'
+
+
+def read_profile(profile_name: str) -> dict:
+    with open(get_profile_path(profile_name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def get_bot_module_name(bot_name: str) -> str:
+    """
+    :param bot_name: Bot name as configured in profiles: <module name>.<class name>
+    :return: Full name of the bot module.
+    """
+    [module_name, _] = bot_name.split('.')
+    return f'{BOTS_PACKAGE}.{module_name}'
+
+
+def create_bot(bot_name: str, bot_config: dict, module: Optional[ModuleType] = None):
+    """
+    Instantiate a configured bot. Only the module of the bot is imported.
+    :param bot_name: Bot name as configured in profiles: <module name>.<class name>
+    :param bot_config: Configuration of the bot in the profile.
+    :param module: Bot module, e.g. just reloaded. None to import it.
+    :return: Bot instance.
+    :raise SelectorError: A selector of the bot is invalid.
+    """
+    [_, class_name] = bot_name.split('.')
+    module = module or importlib.import_module(get_bot_module_name(bot_name))
+    bot = getattr(module, class_name)(bot_config)
+    # Invalid selectors fail the bot here, rather than the client on the next frame.
+    get_bot_selectors([bot])
+    return bot
+
+
+def get_bot_selectors(bots: list) -> dict[str, Selector]:
+    """
+    :param bots: Bots of a client.
+    :return: Compiled selectors declared by the bots, by selection name. A selection name declared by several bots gets
+        the selector of the last one.
+    :raise SelectorError: A selector of a bot is invalid.
+    """
+    return {selection_name: compile_bot_selector(selector)
+            for bot in bots for selection_name, selector in getattr(bot, SELECTORS_ATTRIBUTE, {}).items()}
+
+
+def initialize_bots(profile: dict) -> list:
+    bots_in_config = [create_bot(bot_name, bot_config) for bot_name, bot_config in profile.get(BOTS_KEY, {}).items()]
+
+    if not bots_in_config:
+        raise RuntimeError('No bot is configured!')
+
+    return bots_in_config
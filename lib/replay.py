@@ -0,0 +1,114 @@
+import io
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import IO, Iterator, Optional
+
+from lib.frame_format import read_frames, frame_to_file
+from lib.memory_reader import MemoryReaderSession
+from models.data_models import UiTree
+
+logger = logging.getLogger('replay')
+logger.setLevel(logging.INFO)
+
+
+class EndOfRecording(Exception):
+    pass
+
+
+class RecordedMemoryReader:
+    """
+    Memory reader backend serving the frames of a recorded session file, in recording order.
+    """
+    def __init__(self, session_file: str):
+        self.frames: Iterator[tuple[float, dict]] = read_frames(session_file)
+        self.last_frame = ''
+        self.last_timestamp: Optional[float] = None
+
+    def read_frame(self, root_address: Optional[str]) -> IO[str]:
+        try:
+            self.last_timestamp, ui_tree_root = next(self.frames)
+        except StopIteration:
+            raise EndOfRecording() from None
+
+        frame = frame_to_file(ui_tree_root)
+        self.last_frame = frame.getvalue()
+        return frame
+
+    def open_last_frame(self) -> IO[str]:
+        return io.StringIO(self.last_frame)
+
+    def open_last_frame_bytes(self) -> IO[bytes]:
+        return io.BytesIO(self.last_frame.encode())
+
+    def save_last_frame(self, file_path: str) -> None:
+        with open(file_path, 'w') as f:
+            f.write(self.last_frame)
+
+    def close(self) -> None:
+        pass
+
+
+@dataclass
+class ReplayResult:
+    frames: int = 0
+    # Wall time of the replay and time span of the recorded frames, in seconds.
+    duration: float = 0
+    recorded_duration: float = 0
+    bot_runs: int = 0
+    bot_failures: dict[str, int] = field(default_factory=dict)
+
+    def report(self) -> str:
+        speedup = self.recorded_duration / self.duration if self.duration > 0 else 0
+        return f'{self.frames} frames in {self.duration:.2f}s ({self.recorded_duration:.0f}s recorded, ' \
+               f'{speedup:.0f}x), {self.bot_runs} bot runs, failures: {self.bot_failures or "none"}'
+
+
+def replay_session(session_file: str, bots: list, realtime: bool = False, lazy: bool = False) -> ReplayResult:
+    """
+    Run bots on every frame of a recorded session, through the same parser and reader session as live frames. Every
+    bot runs on every frame.
+    :param session_file: Session file recorded with bot.py --record.
+    :param bots: Bots to run.
+    :param realtime: Wait between frames as long as during the recording, instead of replaying as fast as possible.
+    :param lazy: Parse the UI tree sections lazily, like bot.py does.
+    :return: Replay statistics.
+    """
+    backend = RecordedMemoryReader(session_file)
+    session = MemoryReaderSession([backend], lazy=lazy)
+    session.set_bots(bots)
+    result = ReplayResult()
+    start_time = time.perf_counter()
+    first_timestamp = None
+
+    while True:
+        try:
+            # Recorded frames start at the UI root already, no root address to detect.
+            ui_tree = session.read_ui_tree(root_address='recorded')
+        except EndOfRecording:
+            break
+
+        if first_timestamp is None:
+            first_timestamp = backend.last_timestamp
+        result.frames += 1
+        result.recorded_duration = backend.last_timestamp - first_timestamp
+        if realtime:
+            time.sleep(max(0.0, result.recorded_duration - (time.perf_counter() - start_time)))
+
+        __run_bots(bots, ui_tree, result)
+        session.record_used_sections(ui_tree)
+
+    result.duration = time.perf_counter() - start_time
+    session.close()
+    return result
+
+
+def __run_bots(bots: list, ui_tree: UiTree, result: ReplayResult) -> None:
+    for bot in bots:
+        result.bot_runs += 1
+        try:
+            bot.run(ui_tree)
+        except Exception as e:
+            bot_name = type(bot).__name__
+            result.bot_failures[bot_name] = result.bot_failures.get(bot_name, 0) + 1
+            logger.warning(f'Bot: {bot_name} failed on frame {result.frames}: {str(e)}')
@@ -0,0 +1,63 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+ROOT_ADDRESS_CACHE_FILE = 'tmp/ui-root-addresses.json'
+# Entries kept in the cache file, the most recently used ones.
+MAX_ENTRIES = 64
+
+logger = logging.getLogger('memory-reader')
+
+
+class RootAddressCache:
+    """
+    UI tree root addresses found in earlier runs, persisted so that a restart skips the root search. Entries are keyed
+    by process ID, process start time and character name: a new game client, or a reused PID, never hits an old entry.
+    Addresses read from the cache still need a validation read, since the root may have moved within the same process.
+    """
+    def __init__(self, cache_file: str = ROOT_ADDRESS_CACHE_FILE):
+        self.cache_file = cache_file
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.__load().get(key)
+        return entry['address'] if entry else None
+
+    def put(self, key: str, address: str) -> None:
+        with self.lock:
+            entries = self.__load()
+            entries[key] = {'address': address, 'time': time.time()}
+            self.__save(entries)
+
+    def remove(self, key: str) -> None:
+        with self.lock:
+            entries = self.__load()
+            if entries.pop(key, None):
+                self.__save(entries)
+
+    def __load(self) -> dict:
+        try:
+            with open(self.cache_file) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as ex:
+            logger.warning(f'Ignoring unreadable UI root address cache {self.cache_file}: {ex}')
+            return {}
+
+    def __save(self, entries: dict) -> None:
+        newest_entries = sorted(entries.items(), key=lambda item: item[1]['time'], reverse=True)[:MAX_ENTRIES]
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        # Replace the file at once, so a crash while writing does not lose the other entries.
+        temporary_file = f'{self.cache_file}.tmp'
+        with open(temporary_file, 'w') as f:
+            json.dump(dict(newest_entries), f, indent=2)
+        os.replace(temporary_file, self.cache_file)
+
+
+def get_cache_key(pid: int, process_start_time: float, character_name: Optional[str]) -> str:
+    return f'{pid}:{process_start_time:.3f}:{character_name or ""}'
@@ -0,0 +1,64 @@
+"""
+Worker pool for the parallel parse mode: the section windows of a large frame are parsed by worker processes while the
+main process parses the largest one. Workers get the JSON text of their window, already sliced out of the frame by the
+stream reader, so sending it costs a copy of the text rather than a pickle of the decoded tree. On a free-threaded
+build, threads parse the decoded windows directly.
+"""
+import logging
+import os
+import sys
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+# JSON size of the windows sent to the workers below which a frame is parsed in one process. A window costs a worker
+# about 0.3 ms of round trip plus a fifth of its parse time (decoding the text again, pickling the result), and costs
+# the main process about a twentieth (sending the text, unpickling the result). Parsing runs at about 15 MB/s, so from
+# here on the parse moved off the main process outweighs the overhead. Check the crossover with benchmark.py --parallel.
+MIN_PARALLEL_BYTES = 256 * 1024
+MAX_DEFAULT_WORKERS = 4
+
+logger = logging.getLogger('bot-master')
+
+
+class SectionPool:
+    """
+    Executor of the section parse workers, shared by the memory reader sessions of every client. A broken process pool,
+    e.g. after a worker was killed, is replaced on the next submit.
+    """
+    def __init__(self, max_workers: Optional[int] = None, min_parallel_bytes: int = MIN_PARALLEL_BYTES,
+                 use_threads: Optional[bool] = None):
+        """
+        :param max_workers: Number of workers. By default, one less than the CPU count, at most MAX_DEFAULT_WORKERS.
+        :param min_parallel_bytes: JSON size of the windows sent to the workers below which a frame is parsed in one
+            process.
+        :param use_threads: Whether the workers are threads rather than processes. By default, threads only on a
+            free-threaded build.
+        """
+        self.max_workers = max_workers or max(1, min(MAX_DEFAULT_WORKERS, (os.cpu_count() or 1) - 1))
+        self.min_parallel_bytes = min_parallel_bytes
+        self.uses_threads = is_free_threaded() if use_threads is None else use_threads
+        self.executor = self.__create_executor()
+
+    def submit(self, function: Callable, *args) -> Future:
+        try:
+            return self.executor.submit(function, *args)
+        except BrokenExecutor as ex:
+            logger.warning(f'Section parse workers stopped, starting new ones: {ex}')
+            self.executor = self.__create_executor()
+            return self.executor.submit(function, *args)
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+    def __create_executor(self) -> Executor:
+        if self.uses_threads:
+            return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='section-parse')
+        return ProcessPoolExecutor(max_workers=self.max_workers)
+
+
+def is_free_threaded() -> bool:
+    """
+    :return: Whether this interpreter runs without the GIL, e.g. a free-threaded 3.13 build.
+    """
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
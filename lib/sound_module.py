@@ -1,13 +1,44 @@
-import winsound
+"""
+Sound alerts for the tools and the bots. Calls return at once: the alerts are played by the AlertDispatcher worker.
+"""
+import threading
+from typing import Optional
 
+from lib.alert_dispatcher import AlertDispatcher, ALARM, SOUND, get_default_backends
 
-def alarm(count: int) -> None:
-    frequency = 440
-    duration_in_millis = 250
-    for i in range(count):
-        winsound.Beep(frequency, duration_in_millis)
+__dispatcher: Optional[AlertDispatcher] = None
+__dispatcher_lock = threading.Lock()
 
 
-def play_file(file_name: str) -> None:
-    file_path = f'plugins/resources/{file_name}'
-    winsound.PlaySound(file_path, winsound.SND_ASYNC)
+def configure(backends: list, **dispatcher_options) -> AlertDispatcher:
+    """
+    Replace the dispatcher of the alerts, e.g. to add a FileBackend.
+    :param backends: Backends playing every alert.
+    :param dispatcher_options: AlertDispatcher options, like min_interval.
+    :return: New dispatcher.
+    """
+    global __dispatcher
+    with __dispatcher_lock:
+        if __dispatcher:
+            __dispatcher.close()
+        __dispatcher = AlertDispatcher(backends, **dispatcher_options)
+        return __dispatcher
+
+
+def get_dispatcher() -> AlertDispatcher:
+    """
+    :return: Dispatcher of the alerts, created with the default backends on first use.
+    """
+    global __dispatcher
+    with __dispatcher_lock:
+        if __dispatcher is None:
+            __dispatcher = AlertDispatcher(get_default_backends())
+        return __dispatcher
+
+
+def alarm(count: int, source: Optional[str] = None) -> None:
+    get_dispatcher().submit(ALARM, count, source)
+
+
+def play_file(file_name: str, source: Optional[str] = None) -> None:
+    get_dispatcher().submit(SOUND, file_name, source)
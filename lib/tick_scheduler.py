@@ -0,0 +1,86 @@
+import time
+
+from models.data_models import UiTree
+
+# Bot classes declare their cadence with this attribute, in seconds. e.g.: tick_interval = 1
+TICK_INTERVAL_ATTRIBUTE = 'tick_interval'
+DEFAULT_TICK_INTERVAL = 3
+COMBAT_TICK_INTERVAL = 1
+IDLE_TICK_INTERVAL = 6
+
+
+class TickScheduler:
+    """
+    Deadline-aware schedule of one client. The next tick is due one period after the previous tick started, so the time
+    spent reading and running bots is not added to the period. A tick running past its deadline coalesces the missed
+    ticks into one, which starts right away.
+
+    Bots declaring tick_interval run at their own cadence. The other bots follow the adaptive interval: faster when an
+    overview entry is attacking or warp disrupting, slower when nothing changed since the previous frame. A frame is
+    only idle when some sections were compared with the previous frame and none of them changed: a lazy frame where no
+    section was compared, like the first one, is active. The tick period is the shortest interval among the bots.
+
+    A bot runs on the first tick at or after its due time, one interval after the due time of its previous run rather
+    than the run itself. A bot whose interval is not a multiple of the period, e.g. 5 seconds with a 3 seconds period,
+    runs at 0, 6, 12, 15, 21... seconds: 5 seconds apart on average. A bot a whole interval late, e.g. after a long
+    tick, is due one interval after this run, so missed runs are not caught up.
+    """
+    def __init__(self, bots: list, default_interval: float = DEFAULT_TICK_INTERVAL,
+                 combat_interval: float = COMBAT_TICK_INTERVAL, idle_interval: float = IDLE_TICK_INTERVAL):
+        self.bots = bots
+        self.default_interval = default_interval
+        self.combat_interval = combat_interval
+        self.idle_interval = idle_interval
+        self.adaptive_interval = default_interval
+        # Due time of the last run of each bot, by bot id. The next run is due one bot interval later.
+        self.last_due_times: dict[int, float] = {}
+        self.next_tick_time = time.time()
+        self.skipped_ticks = 0
+
+    @property
+    def period(self) -> float:
+        return min((self.get_bot_interval(bot) for bot in self.bots), default=self.adaptive_interval)
+
+    def get_bot_interval(self, bot) -> float:
+        return getattr(bot, TICK_INTERVAL_ATTRIBUTE, None) or self.adaptive_interval
+
+    def set_bots(self, bots: list) -> None:
+        """
+        Replace the bots, e.g. after a reload. Bots kept keep their schedule.
+        """
+        self.last_due_times = {id(bot): self.last_due_times[id(bot)] for bot in bots if id(bot) in self.last_due_times}
+        self.bots = bots
+
+    def is_bot_due(self, bot, now: float) -> bool:
+        """
+        :param now: Start time of the tick. Ticks never start before they are due, so a bot due every period runs on
+            every tick.
+        """
+        last_due_time = self.last_due_times.get(id(bot))
+        return last_due_time is None or now >= last_due_time + self.get_bot_interval(bot)
+
+    def mark_bot_run(self, bot, now: float) -> None:
+        last_due_time = self.last_due_times.get(id(bot))
+        interval = self.get_bot_interval(bot)
+        if last_due_time is None or now - last_due_time >= 2 * interval:
+            self.last_due_times[id(bot)] = now
+        else:
+            self.last_due_times[id(bot)] = last_due_time + interval
+
+    def adapt(self, ui_tree: UiTree) -> None:
+        # An overview no bot looked at is not parsed just to adapt the interval.
+        if ui_tree.is_parsed('overview') and any(
+                entry.indicators.attacking_me or entry.indicators.warp_disrupt for entry in ui_tree.overview):
+            self.adaptive_interval = self.combat_interval
+        elif not ui_tree.changed_sections and (ui_tree.compared_sections is None or ui_tree.compared_sections):
+            self.adaptive_interval = self.idle_interval
+        else:
+            self.adaptive_interval = self.default_interval
+
+    def schedule_next(self, tick_start_time: float) -> None:
+        period = self.period
+        now = time.time()
+        self.next_tick_time = tick_start_time + period
+        if self.next_tick_time < now:
+            self.skipped_ticks += int((now - tick_start_time) // period)
+            self.next_tick_time = now
@@ -0,0 +1,251 @@
+import sys
+from bisect import bisect_left
+from typing import Callable, Optional, Sequence
+
+from models.data_models import DisplayRegion
+
+TOTAL_DISPLAY_REGION = 'totalDisplayRegion'
+CHILDREN = 'children'
+ADDRESS = 'pythonObjectAddress'
+TYPE_NAME = 'pythonObjectTypeName'
+ENTRIES_OF_INTEREST = 'dictEntriesOfInterest'
+NAME = '_name'
+HINT = '_hint'
+TEXT_KEYS = ('_setText', '_text')
+DISPLAY_REGION_KEYS = ('_displayX', '_displayY', '_displayWidth', '_displayHeight')
+# Children of the leaves, shared.
+NO_CHILDREN = ()
+NUMBER_TYPES = frozenset([int, float])
+
+
+class UiTreeNode:
+    """
+    Node of the UI tree, decoded from its memory-read JSON by UiNodeIndex: type name and '_name' interned, display
+    region unwrapped to numbers (None without a display region), and the text and hint read out of the entries of
+    interest. The other entries stay in entries. Only the displayed children are kept.
+    """
+    __slots__ = ('address', 'type_name', 'name', 'text', 'hint', 'entries', 'x', 'y', 'width', 'height', 'children',
+                 'position')
+
+    def __init__(self, address: Optional[str], type_name: str, entries: dict):
+        get = entries.get
+        self.address = address
+        self.type_name = sys.intern(type_name)
+        self.entries = entries
+        name = get(NAME)
+        self.name = sys.intern(name) if name.__class__ is str else name
+        # The longer of the texts, None without any.
+        set_text = get('_setText')
+        text = get('_text')
+        self.text: Optional[str] = \
+            text if set_text is None else set_text if text is None or len(set_text) >= len(text) else text
+        self.hint = get(HINT)
+
+        x = get('_displayX')
+        y = get('_displayY')
+        width = get('_displayWidth')
+        height = get('_displayHeight')
+        if x is None or y is None or width is None or height is None:
+            self.x = self.y = self.width = self.height = None
+        else:
+            self.x = x if x.__class__ in NUMBER_TYPES else get_json_int(entries, '_displayX')
+            self.y = y if y.__class__ in NUMBER_TYPES else get_json_int(entries, '_displayY')
+            self.width = width if width.__class__ in NUMBER_TYPES else get_json_int(entries, '_displayWidth')
+            self.height = height if height.__class__ in NUMBER_TYPES else get_json_int(entries, '_displayHeight')
+        self.children: Sequence[UiTreeNode] = NO_CHILDREN
+        # Position in the UiNodeIndex.
+        self.position = -1
+
+    def __repr__(self) -> str:
+        return f'UiTreeNode({self.type_name}, {self.address})'
+
+
+class UiNodeIndex:
+    """
+    Flat index of the UI tree, built in one pre-order traversal of the memory-read JSON, which decodes every visible
+    node (a node with a display region whose ancestors all have display regions) into a UiTreeNode. Every visible node
+    gets a position; the subtree of a node is the position range [position, subtree_end). Lookups by type name, '_name',
+    and text/hint presence are sorted position lists, so a subtree query is a bisect over the range instead of a new
+    walk. The absolute display region of each node is computed once, into the xs, ys, widths and heights lists by
+    position.
+    """
+    def __init__(self, ui_tree_root: dict):
+        """
+        :param ui_tree_root: Memory-read JSON of the root, e.g. a window. Its absolute display region is its
+            TOTAL_DISPLAY_REGION, if set.
+        """
+        self.nodes: list[UiTreeNode] = []
+        self.depths: list[int] = []
+        self.subtree_ends: list[int] = []
+        # Position of the parent of each node, -1 for the root.
+        self.parents: list[int] = []
+        self.xs: list[float] = []
+        self.ys: list[float] = []
+        self.widths: list[float] = []
+        self.heights: list[float] = []
+        self.by_type: dict[str, list[int]] = {}
+        self.by_name: dict[str, list[int]] = {}
+        self.with_name: list[int] = []
+        self.with_text: list[int] = []
+        self.with_hint: list[int] = []
+
+        self.__build(ui_tree_root)
+
+    @property
+    def root(self) -> UiTreeNode:
+        return self.nodes[0]
+
+    def find_by_type(self, root: UiTreeNode, type_name: str, parent_only: bool = True) -> list[UiTreeNode]:
+        return self.filter(root, self.by_type.get(type_name, []), parent_only)
+
+    def find_by_types(self, root: UiTreeNode, type_condition: Callable[[str], bool],
+                      parent_only: bool = True) -> list[UiTreeNode]:
+        positions = []
+        for type_name, type_positions in self.by_type.items():
+            if type_condition(type_name):
+                positions.extend(type_positions)
+        positions.sort()
+        return self.filter(root, positions, parent_only)
+
+    def find_by_name(self, root: UiTreeNode, name: str, parent_only: bool = True) -> list[UiTreeNode]:
+        return self.filter(root, self.by_name.get(name, []), parent_only)
+
+    def find_named(self, root: UiTreeNode, parent_only: bool = True) -> list[UiTreeNode]:
+        return self.filter(root, self.with_name, parent_only)
+
+    def find_with_text(self, root: UiTreeNode, parent_only: bool = True) -> list[UiTreeNode]:
+        return self.filter(root, self.with_text, parent_only)
+
+    def find_with_hint(self, root: UiTreeNode, parent_only: bool = True) -> list[UiTreeNode]:
+        return self.filter(root, self.with_hint, parent_only)
+
+    def get_display_region(self, node: UiTreeNode) -> DisplayRegion:
+        """
+        :param node: Indexed node.
+        :return: Absolute display region of the node, created on each call.
+        """
+        position = node.position
+        return DisplayRegion(self.xs[position], self.ys[position], self.widths[position], self.heights[position])
+
+    def filter(self, root: UiTreeNode, positions: list[int], parent_only: bool = True) -> list[UiTreeNode]:
+        """
+        Collect the indexed nodes in the subtree of root, in the same breadth-first order a walk from root would visit
+        them. By default, matching nodes nested under another matching node are dropped, as a walk that stops at the
+        parent subtree would never reach them.
+        :param root: Root of the subtree to search. Must be an indexed node.
+        :param positions: Sorted node positions satisfying the lookup condition.
+        :param parent_only: Whether to drop matches nested under another match.
+        :return: List of subtrees.
+        """
+        start = root.position
+        end = self.subtree_ends[start]
+        matches = positions[bisect_left(positions, start):bisect_left(positions, end)]
+
+        if parent_only:
+            parents = []
+            skip_until = start
+            for position in matches:
+                if position >= skip_until:
+                    parents.append(position)
+                    skip_until = self.subtree_ends[position]
+            matches = parents
+
+        depths = self.depths
+        matches.sort(key=lambda position: depths[position])
+        return [self.nodes[position] for position in matches]
+
+    def __build(self, ui_tree_root: dict) -> None:
+        root = UiTreeNode(ui_tree_root.get(ADDRESS), ui_tree_root[TYPE_NAME], ui_tree_root[ENTRIES_OF_INTEREST])
+        root_region = ui_tree_root.get(TOTAL_DISPLAY_REGION) or DisplayRegion(root.x, root.y, root.width, root.height)
+
+        parents = self.parents
+        xs = self.xs
+        ys = self.ys
+        # (node, its JSON children, parent position, depth, absolute region). Children are pushed in reverse to keep the
+        # pre-order.
+        nodes_to_visit = [(root, ui_tree_root.get(CHILDREN), -1, 0, root_region.x, root_region.y, root_region.width,
+                           root_region.height)]
+        while nodes_to_visit:
+            node, json_children, parent_position, depth, x, y, width, height = nodes_to_visit.pop()
+            position = len(self.nodes)
+            node.position = position
+            self.nodes.append(node)
+            self.depths.append(depth)
+            xs.append(x)
+            ys.append(y)
+            self.widths.append(width)
+            self.heights.append(height)
+            parents.append(parent_position)
+            self.__index_entries(node, position)
+
+            if json_children:
+                children = []
+                for json_child in json_children:
+                    child = UiTreeNode(json_child.get(ADDRESS), json_child[TYPE_NAME], json_child[ENTRIES_OF_INTEREST])
+                    if child.x is not None:
+                        children.append((child, json_child.get(CHILDREN)))
+                if children:
+                    node.children = [child for (child, _) in children]
+                    for (child, json_grandchildren) in reversed(children):
+                        nodes_to_visit.append((child, json_grandchildren, position, depth + 1, x + child.x, y + child.y,
+                                               child.width, child.height))
+
+        # Descendants always follow their ancestors, so one reverse pass settles every subtree end.
+        self.subtree_ends = list(range(1, len(self.nodes) + 1))
+        for position in range(len(self.nodes) - 1, 0, -1):
+            parent_position = parents[position]
+            if self.subtree_ends[position] > self.subtree_ends[parent_position]:
+                self.subtree_ends[parent_position] = self.subtree_ends[position]
+
+    def __index_entries(self, node: UiTreeNode, position: int) -> None:
+        self.by_type.setdefault(node.type_name, []).append(position)
+
+        if NAME in node.entries:
+            self.with_name.append(position)
+            if isinstance(node.name, str):
+                self.by_name.setdefault(node.name, []).append(position)
+        if node.text is not None:
+            self.with_text.append(position)
+        if HINT in node.entries:
+            self.with_hint.append(position)
+
+
+def get_children_with_display_region(parent: dict) -> list[dict]:
+    parent_display_region = parent[TOTAL_DISPLAY_REGION]
+    children = parent.get(CHILDREN, None)
+    children_results = []
+
+    if children:
+        for child in children:
+            display_region = get_display_region(child)
+            if display_region:
+                display_region.x += parent_display_region.x
+                display_region.y += parent_display_region.y
+                child[TOTAL_DISPLAY_REGION] = display_region
+
+                children_results.append(child)
+
+    return children_results
+
+
+def get_display_region(node: dict) -> Optional[DisplayRegion]:
+    entries_of_interest = node[ENTRIES_OF_INTEREST]
+    if all(key in entries_of_interest for key in DISPLAY_REGION_KEYS):
+        return DisplayRegion(
+            x=get_json_int(entries_of_interest, '_displayX'),
+            y=get_json_int(entries_of_interest, '_displayY'),
+            width=get_json_int(entries_of_interest, '_displayWidth'),
+            height=get_json_int(entries_of_interest, '_displayHeight')
+        )
+    else:
+        return None
+
+
+def get_json_int(node: dict, key: str) -> float:
+    value = node[key]
+    if isinstance(value, int) or isinstance(value, float):
+        return value
+    elif 'int_low32' in value:
+        return value['int_low32']
+    else:
+        return 0
@@ -0,0 +1,292 @@
+"""
+Selectors over the UI tree, in a small CSS-like language:
+
+    ShipUI > ShipSlot ModuleButton          type names, with the descendant and child combinators
+    [_name=shieldGauge]                     dictEntriesOfInterest value
+    [_hint]                                 dictEntriesOfInterest key presence
+    [type^=Drone][type$=Entry]              type name prefix and suffix, *= for a substring
+    [type*=scroll i]                        case-insensitive comparison
+    XmppChatSimpleUserEntry, XmppChatUserEntry    either selector
+
+Selectors are compiled once to matchers and evaluated on a UiNodeIndex: the candidates of the last compound come from
+the index lookups, and the combinators are checked on the ancestors of each candidate.
+"""
+import re
+from dataclasses import dataclass, field
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Callable, Optional
+
+from lib.ui_node_index import UiNodeIndex, UiTreeNode, NAME, HINT, TEXT_KEYS
+
+# Attribute selector key of the type name, e.g. [type*=scroll i]
+TYPE_KEY = 'type'
+DESCENDANT = ' '
+CHILD = '>'
+# Index lookups of the nodes having any of the keys.
+PRESENCE_LOOKUPS: dict[frozenset[str], Callable[[UiNodeIndex], list[int]]] = {
+    frozenset([NAME]): lambda index: index.with_name,
+    frozenset([HINT]): lambda index: index.with_hint,
+    frozenset(TEXT_KEYS): lambda index: index.with_text
+}
+
+TOKEN_PATTERN = re.compile(r'''
+    \s*(?P<separator>[>,])\s*
+    | (?P<whitespace>\s+)
+    | (?P<type>\*|[A-Za-z_][\w.]*)
+    | \[\s*(?P<key>[\w.]+)\s*(?:(?P<operator>[\^$*]?=)\s*(?:"(?P<double_quoted>[^"]*)"|'(?P<single_quoted>[^']*)'
+        |(?P<value>[^\s\]]+))\s*(?P<ignore_case>i)?\s*)?]
+''', re.VERBOSE)
+
+
+class SelectorError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class AttributeCondition:
+    key: str
+    operator: Optional[str] = None
+    value: Optional[str] = None
+    ignore_case: bool = False
+    # Whether each type name seen so far matches, for a type name condition. The UI has a few hundred type names, the
+    # same in every frame.
+    matching_types: dict[str, bool] = field(default_factory=dict, init=False, compare=False, repr=False)
+
+    def matches(self, node: UiTreeNode) -> bool:
+        if self.key == TYPE_KEY:
+            return self.matches_type(node.type_name)
+        if self.key in node.entries:
+            return self.matches_value(node.entries[self.key])
+        return False
+
+    def matches_value(self, actual) -> bool:
+        """
+        :param actual: Value of the key of the condition in a node.
+        """
+        if self.operator is None:
+            return True
+        if not isinstance(actual, str):
+            return False
+
+        expected = self.value
+        if self.ignore_case:
+            (actual, expected) = (actual.lower(), expected.lower())
+        if self.operator == '=':
+            return actual == expected
+        if self.operator == '^=':
+            return actual.startswith(expected)
+        if self.operator == '$=':
+            return actual.endswith(expected)
+        return expected in actual
+
+    def matches_type(self, type_name: str) -> bool:
+        matches = self.matching_types.get(type_name)
+        if matches is None:
+            matches = self.matching_types[type_name] = self.matches_value(type_name)
+        return matches
+
+    def get_type_candidates(self, index: UiNodeIndex) -> list[int]:
+        """
+        :return: Sorted positions of the nodes whose type name matches this type name condition.
+        """
+        positions = []
+        for type_name, type_positions in index.by_type.items():
+            if self.matches_type(type_name):
+                positions.extend(type_positions)
+        return sorted(positions)
+
+
+@dataclass(frozen=True)
+class CompoundSelector:
+    # Exact type name, None for any type.
+    type_name: Optional[str]
+    conditions: tuple[AttributeCondition, ...]
+    # Combinator to the previous compound of the selector: DESCENDANT or CHILD.
+    combinator: str = DESCENDANT
+
+    def matches(self, node: UiTreeNode) -> bool:
+        return (self.type_name is None or node.type_name == self.type_name) and \
+            all(condition.matches(node) for condition in self.conditions)
+
+    @property
+    def is_index_lookup(self) -> bool:
+        """
+        :return: Whether the candidates of get_candidates all match, with nothing left to check.
+        """
+        if self.type_name is not None:
+            return not self.conditions
+        if len(self.conditions) != 1:
+            return False
+        condition = self.conditions[0]
+        return condition.key == NAME and condition.operator == '=' and not condition.ignore_case or \
+            condition.key in (NAME, HINT) and condition.operator is None
+
+    def get_candidates(self, index: UiNodeIndex) -> Optional[list[int]]:
+        """
+        :return: Sorted positions of the index lookup narrowest for this compound, None to check every position.
+        """
+        if self.type_name is not None:
+            return index.by_type.get(self.type_name, [])
+
+        for condition in self.conditions:
+            if condition.key == NAME and condition.operator == '=' and not condition.ignore_case:
+                return index.by_name.get(condition.value, [])
+        for condition in self.conditions:
+            if condition.key == TYPE_KEY:
+                return condition.get_type_candidates(index)
+            if condition.key == NAME:
+                return index.with_name
+            if condition.key == HINT:
+                return index.with_hint
+            if condition.key in TEXT_KEYS:
+                return index.with_text
+        return None
+
+
+class Selector:
+    """
+    Compiled selector: alternatives of compound selectors, each from the outermost to the matched node.
+    """
+    def __init__(self, text: str, alternatives: tuple[tuple[CompoundSelector, ...], ...]):
+        self.text = text
+        self.alternatives = alternatives
+        # Index lookup answering the selector alone, like a type name. None if the candidates must be checked.
+        self.index_lookup: Optional[Callable[[UiNodeIndex], list[int]]] = None
+        if all(len(compounds) == 1 for compounds in alternatives):
+            if len(alternatives) == 1 and alternatives[0][0].is_index_lookup:
+                self.index_lookup = alternatives[0][0].get_candidates
+            elif all(compounds[0].type_name is None and len(compounds[0].conditions) == 1 and
+                     compounds[0].conditions[0].operator is None for compounds in alternatives):
+                keys = frozenset(compounds[0].conditions[0].key for compounds in alternatives)
+                self.index_lookup = PRESENCE_LOOKUPS.get(keys)
+
+    @property
+    def root_types(self) -> Optional[set[str]]:
+        """
+        :return: Type names of the outermost compounds, None if an alternative does not start with a type name.
+        """
+        types = {compounds[0].type_name for compounds in self.alternatives}
+        return None if None in types else types
+
+    def select(self, index: UiNodeIndex, root: UiTreeNode, parent_only: bool = True) -> list[UiTreeNode]:
+        """
+        Find the nodes matching the selector in the subtree of root, root included.
+        :param index: Node index of the UI tree.
+        :param root: Root of the subtree to search. Must be an indexed node.
+        :param parent_only: Whether to drop matches nested under another match.
+        :return: Matching nodes, in breadth-first order.
+        """
+        if self.index_lookup:
+            return index.filter(root, self.index_lookup(index), parent_only)
+
+        start = root.position
+        end = index.subtree_ends[start]
+        # Alternatives drawing their candidates from the same lookup, like [_setText], [_text], scan it once.
+        alternatives_by_candidates: dict[int, tuple[Optional[list[int]], list]] = {}
+        for compounds in self.alternatives:
+            candidates = compounds[-1].get_candidates(index)
+            alternatives_by_candidates.setdefault(id(candidates), (candidates, []))[1].append(compounds)
+
+        matches = []
+        for (candidates, alternatives) in alternatives_by_candidates.values():
+            positions = range(start, end) if candidates is None else \
+                candidates[bisect_left(candidates, start):bisect_left(candidates, end)]
+            for position in positions:
+                node = index.nodes[position]
+                if any(compounds[-1].matches(node) and
+                       self.__matches_ancestors(index, compounds, len(compounds) - 1, position, start)
+                       for compounds in alternatives):
+                    matches.append(position)
+
+        if len(alternatives_by_candidates) > 1:
+            matches = sorted(set(matches))
+        return index.filter(root, matches, parent_only)
+
+    def __matches_ancestors(self, index: UiNodeIndex, compounds: tuple[CompoundSelector, ...], matched: int,
+                            position: int, start: int) -> bool:
+        """
+        :return: Whether the compounds before the matched one match ancestors of position, down from start.
+        """
+        if matched == 0:
+            return True
+        combinator = compounds[matched].combinator
+        ancestor = index.parents[position]
+        while ancestor >= start:
+            if compounds[matched - 1].matches(index.nodes[ancestor]) and \
+                    self.__matches_ancestors(index, compounds, matched - 1, ancestor, start):
+                return True
+            if combinator == CHILD:
+                return False
+            ancestor = index.parents[ancestor]
+        return False
+
+    def __repr__(self) -> str:
+        return f'Selector({self.text!r})'
+
+
+@lru_cache(maxsize=256)
+def compile_selector(text: str) -> Selector:
+    """
+    :param text: Selector, e.g. ShipUI > ShipSlot ModuleButton
+    :return: Compiled selector. Compiled selectors are cached by text.
+    :raise SelectorError: The text is not a valid selector.
+    """
+    alternatives = []
+    compounds = []
+    type_name = None
+    conditions = []
+    combinator = DESCENDANT
+    in_compound = False
+
+    def end_compound():
+        nonlocal type_name, conditions, in_compound, combinator
+        if in_compound:
+            compounds.append(CompoundSelector(type_name, tuple(conditions), combinator))
+        (type_name, conditions, in_compound, combinator) = (None, [], False, DESCENDANT)
+
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        token = TOKEN_PATTERN.match(text, position)
+        if not token:
+            raise SelectorError(f'Invalid selector {text!r} at {position}: {text[position:]!r}')
+        position = token.end()
+
+        if token.group('separator') or token.group('whitespace'):
+            if not in_compound:
+                raise SelectorError(f'Invalid selector {text!r}: combinator without a selector before it')
+            end_compound()
+            if token.group('separator') == ',':
+                alternatives.append(tuple(compounds))
+                compounds = []
+            elif token.group('separator') == CHILD:
+                combinator = CHILD
+        elif token.group('type'):
+            if in_compound:
+                raise SelectorError(f'Invalid selector {text!r}: type name {token.group("type")!r} within a compound')
+            type_name = None if token.group('type') == '*' else token.group('type')
+            in_compound = True
+        else:
+            value = next((token.group(group) for group in ('double_quoted', 'single_quoted', 'value')
+                          if token.group(group) is not None), None)
+            conditions.append(AttributeCondition(
+                token.group('key'), token.group('operator'), value, bool(token.group('ignore_case'))))
+            in_compound = True
+
+    if not in_compound:
+        raise SelectorError(f'Invalid selector {text!r}: it ends without a selector')
+    end_compound()
+    alternatives.append(tuple(compounds))
+    return Selector(text, tuple(alternatives))
+
+
+def select_all(index: UiNodeIndex, root: UiTreeNode, selectors: dict[str, Selector]) -> dict[str, list[UiTreeNode]]:
+    """
+    Evaluate a batch of selectors on the same index, built in one walk of the subtree.
+    :param index: Node index of the UI tree.
+    :param root: Root of the subtree to search.
+    :param selectors: Selectors by result name.
+    :return: Matching nodes by result name.
+    """
+    return {name: selector.select(index, root) for name, selector in selectors.items()}
@@ -0,0 +1,206 @@
+"""
+Synthetic memory reads shaped like the Sanderling output, for benchmarking the parser without a game client:
+
+python -m lib.ui_tree_generator tmp/synthetic.json --overview-rows 300 --chat-users 1000
+"""
+import argparse
+import itertools
+import json
+import random
+
+from lib.ui_node_index import ADDRESS, TYPE_NAME, ENTRIES_OF_INTEREST, CHILDREN
+
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+OVERVIEW_COLUMNS = ['Distance', 'Name', 'Type', 'Corporation', 'Alliance', 'Velocity', 'Angular Velocity', 'Size']
+INDICATOR_NAMES = ['hostile', 'attackingMe', 'targeting', 'targetedByMeIndicator', 'myActiveTargetIndicator']
+EWAR_HINTS = ['Pilot is warp disrupting me', 'Pilot is webifying me', 'Pilot is jamming me',
+              'Pilot is cap neutralizing me', 'Pilot is tracking disrupting me']
+STANDING_HINTS = ['Pilot is in your fleet', 'Pilot has good standing', 'Pilot has bad standing',
+                  'Pilot has terrible standing', None]
+
+
+class UiTreeGenerator:
+    def __init__(self, seed: int = 0, null_children: bool = False):
+        self.random = random.Random(seed)
+        # Write the children of leaves as null, like Sanderling, rather than leaving the key out.
+        self.null_children = null_children
+        self.addresses = itertools.count(0x1f0000000, 0x40)
+
+    def node(self, type_name: str, x: int = 0, y: int = 0, width: int = 10, height: int = 10,
+             children: list = None, **entries) -> dict:
+        entries_of_interest = {}
+        for key, value in (('_displayX', x), ('_displayY', y), ('_displayWidth', width), ('_displayHeight', height)):
+            # The reader writes some integers as objects.
+            entries_of_interest[key] = {'int_low32': value} if self.random.random() < 0.1 else value
+        entries_of_interest.update({key: value for key, value in entries.items() if value is not None})
+
+        node = {ADDRESS: str(next(self.addresses)), TYPE_NAME: type_name, ENTRIES_OF_INTEREST: entries_of_interest}
+        if children is not None or self.null_children:
+            node[CHILDREN] = children
+        return node
+
+    def color(self, alpha: float) -> dict:
+        return {'aPercent': alpha, 'rPercent': self.random.randint(0, 100), 'gPercent': self.random.randint(0, 100),
+                'bPercent': self.random.randint(0, 100)}
+
+    def nest(self, node: dict, depth: int) -> dict:
+        """
+        Wrap node in depth containers, like the layers between the UI root and a window.
+        """
+        for _ in range(depth):
+            node = self.node('Container', width=node[ENTRIES_OF_INTEREST]['_displayWidth'], height=SCREEN_HEIGHT,
+                             children=[node])
+        return node
+
+    def overview_window(self, rows: int, columns: int) -> dict:
+        column_names = (OVERVIEW_COLUMNS * (columns // len(OVERVIEW_COLUMNS) + 1))[:columns]
+        column_width = 80
+        headers = [self.node('Header', x=i * column_width, width=column_width, height=20,
+                             children=[self.node('EveLabelSmall', x=4, width=column_width - 8, height=16,
+                                                 _setText=column_name)])
+                   for i, column_name in enumerate(column_names)]
+
+        entries = []
+        for row in range(rows):
+            labels = [self.node('OverviewLabel', x=i * column_width + 6, width=column_width - 20, height=16,
+                                _text=self.column_text(column_name, row))
+                      for i, column_name in enumerate(column_names)]
+            indicators = [self.node('Sprite', width=16, height=16, _name=name)
+                          for name in self.random.sample(INDICATOR_NAMES, self.random.randint(0, 3))]
+            icon = self.node('SpaceObjectIcon', width=16, height=16, children=[
+                self.node('Sprite', width=16, height=16, _name='iconSprite', _color=self.color(100))] + indicators)
+            ewar_icons = [self.node('Icon', x=i * 16, width=16, height=16, _hint=hint)
+                          for i, hint in enumerate(self.random.sample(EWAR_HINTS, self.random.randint(0, 2)))]
+            right_aligned_icons = self.node('ContainerAutoSize', x=columns * column_width - 64, width=64, height=16,
+                                            _name='rightAlignedIconContainer', children=ewar_icons)
+            background = self.node('Fill', width=columns * column_width, height=20, children=[
+                self.node('Sprite', width=columns * column_width, height=20, _name='bgColor', _color=self.color(20))])
+            entries.append(self.node('OverviewScrollEntry', y=row * 20, width=columns * column_width, height=20,
+                                     children=[icon, right_aligned_icons, background] + labels))
+
+        width = columns * column_width
+        scroll = self.node('BasicDynamicScroll', y=30, width=width, height=600, children=[
+            self.node('ScrollColumnHeaders', width=width, height=20, children=headers),
+            self.node('Container', y=20, width=width, height=580, _name='__content', children=entries)])
+        return self.node('OverviewWindow', x=SCREEN_WIDTH - width, y=100, width=width, height=700, children=[scroll])
+
+    def chat_window_stack(self, channel: str, users: int) -> dict:
+        user_entries = []
+        for user in range(users):
+            standing = self.random.choice(STANDING_HINTS)
+            children = [self.node('EveLabelMedium', x=24, width=120, height=16, _text=f'{channel} Pilot {user}')]
+            if standing:
+                children.append(self.node('FlagIconWithState', width=9, height=9, _hint=standing))
+            entry_type = 'XmppChatSimpleUserEntry' if user % 2 else 'XmppChatUserEntry'
+            user_entries.append(self.node(entry_type, y=user * 18, width=150, height=18, children=children))
+
+        user_list = self.node('Container', x=250, width=150, height=300, _name='userlist', children=[
+            self.node('BasicDynamicScroll', width=150, height=300, children=user_entries)])
+        chat_window = self.node('XmppChatWindow', width=400, height=300, _name=f'chatchannel_{channel}',
+                                children=[user_list])
+        return self.node('ChatWindowStack', y=700, width=400, height=300, children=[chat_window])
+
+    def drones_window(self, drones: int) -> dict:
+        entries = []
+        for drone in range(drones):
+            gauges = [self.drone_gauge(gauge_name) for gauge_name in ('shieldGauge', 'armorGauge', 'structGauge')]
+            entry_type = 'DroneInBayEntry' if drone % 2 else 'DroneInSpaceEntry'
+            entries.append(self.node(entry_type, y=drone * 20, width=250, height=20, children=[
+                self.node('EveLabelMedium', x=20, width=120, height=16, _text=f'Hobgoblin II {drone}')] + gauges))
+        return self.node('DronesWindow', x=20, y=500, width=250, height=200, children=[
+            self.node('Container', width=250, height=200, children=entries)])
+
+    def drone_gauge(self, gauge_name: str) -> dict:
+        damage = self.random.randint(0, 30)
+        return self.node('Container', x=160, width=30, height=4, _name=gauge_name, children=[
+            self.node('Sprite', width=30, height=4, _name='droneGaugeBar'),
+            self.node('Sprite', width=damage, height=4, _name='droneGaugeBarDmg')])
+
+    def ship_ui(self, module_slots: int) -> dict:
+        slots = []
+        for slot in range(module_slots):
+            children = [self.node('ModuleButton', width=48, height=48, ramp_active=self.random.random() < 0.5)]
+            if self.random.random() < 0.3:
+                children.append(self.node('Sprite', width=48, height=48, _name='busy'))
+            slots.append(self.node('ShipSlot', x=200 + slot * 50, y=20, width=48, height=48, children=children))
+
+        p_marks = [self.node('Sprite', width=4, height=4, _name='pmark', _color=self.color(self.random.choice([10, 60])))
+                   for _ in range(24)]
+        gauges = [self.node('Sprite', width=80, height=80, _name=gauge_name, _lastValue=self.random.random())
+                  for gauge_name in ('shieldGauge', 'armorGauge', 'structureGauge')]
+        return self.node('ShipUI', x=600, y=SCREEN_HEIGHT - 200, width=800, height=200, children=[
+            self.node('CapacitorContainer', width=120, height=120, children=p_marks),
+            self.node('SpeedGauge', y=120, width=80, height=20, children=[
+                self.node('EveLabelSmall', width=80, height=16, _text=f'{self.random.randint(0, 3000)} m/s')]),
+            self.node('Container', width=120, height=120, children=gauges),
+            self.node('Container', width=800, height=100, children=slots)])
+
+    def filler_panel(self, nodes: int, depth: int) -> dict:
+        """
+        Panel of nodes the parser never reads, like the inventory or the neocom.
+        """
+        leaves = [self.node('EveLabelMedium', y=i * 16, width=100, height=16, _text=f'Item {i}') for i in range(nodes)]
+        return self.nest(self.node('InventoryPrimary', width=800, height=600, children=leaves), depth)
+
+    def column_text(self, column_name: str, row: int) -> str:
+        if column_name == 'Distance':
+            return f'{self.random.randint(1, 250000):,} m'
+        if column_name in ('Velocity', 'Angular Velocity'):
+            return f'{self.random.randint(0, 3000):,}'
+        return f'{column_name} {row}'
+
+
+def generate_ui_tree(overview_rows: int = 100, overview_columns: int = 5, chat_users: int = 50, drones: int = 5,
+                     module_slots: int = 8, depth: int = 4, filler_nodes: int = 1000, seed: int = 0,
+                     null_children: bool = False) -> dict:
+    """
+    Generate a memory read UI tree.
+    :param overview_rows: Number of overview entries.
+    :param overview_columns: Number of overview columns.
+    :param chat_users: Number of users in the local chat. The corp chat gets a tenth of it.
+    :param drones: Number of drone entries.
+    :param module_slots: Number of ship module slots.
+    :param depth: Number of containers between the UI root and each window.
+    :param filler_nodes: Number of nodes in a panel the parser never reads.
+    :param seed: Random seed. The same arguments and seed generate the same tree.
+    :param null_children: Whether leaves have null children, like in the Sanderling output, rather than none.
+    :return: UI tree root.
+    """
+    generator = UiTreeGenerator(seed, null_children)
+    windows = [
+        generator.filler_panel(filler_nodes, depth),
+        generator.overview_window(overview_rows, overview_columns),
+        generator.chat_window_stack('local', chat_users),
+        generator.chat_window_stack('corp', chat_users // 10),
+        generator.drones_window(drones),
+        generator.ship_ui(module_slots)
+    ]
+    layer = generator.node('LayerCore', width=SCREEN_WIDTH, height=SCREEN_HEIGHT, _name='l_main',
+                           children=[generator.nest(window, depth) for window in windows])
+    return generator.node('UIRoot', width=SCREEN_WIDTH, height=SCREEN_HEIGHT, children=[layer])
+
+
+def __get_command_arguments() -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser()
+
+    arg_parser.add_argument('output_file', help='Memory read file to write')
+    arg_parser.add_argument('--overview-rows', type=int, default=100)
+    arg_parser.add_argument('--overview-columns', type=int, default=5)
+    arg_parser.add_argument('--chat-users', type=int, default=50)
+    arg_parser.add_argument('--drones', type=int, default=5)
+    arg_parser.add_argument('--module-slots', type=int, default=8)
+    arg_parser.add_argument('--depth', type=int, default=4)
+    arg_parser.add_argument('--filler-nodes', type=int, default=1000)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--null-children', help='Write the children of leaves as null', action='store_true')
+
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = __get_command_arguments()
+    ui_tree = generate_ui_tree(args.overview_rows, args.overview_columns, args.chat_users, args.drones,
+                               args.module_slots, args.depth, args.filler_nodes, args.seed, args.null_children)
+    with open(args.output_file, 'w') as f:
+        json.dump(ui_tree, f)
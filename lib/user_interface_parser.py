@@ -1,213 +1,700 @@
 import json
-from typing import Optional
-
+from collections import deque
+from concurrent.futures import BrokenExecutor, Future
+from dataclasses import astuple, dataclass, field, replace
+from functools import partial
+from typing import IO, Callable, Iterable, Optional
+
+import lib.metrics as metrics
+from lib.column_layout import get_column_layout_from_texts
+from lib.memory_read_reader import read_pruned_ui_tree, SUBTREE_HASH, SUBTREE_TEXT
+from lib.section_pool import SectionPool
+from lib.overview_units import DISTANCE_COLUMN, VELOCITY_COLUMN, ANGULAR_VELOCITY_COLUMN, parse_distance, \
+    parse_velocity, parse_angular_velocity
+from lib.ui_node_index import UiNodeIndex, UiTreeNode, TOTAL_DISPLAY_REGION, ADDRESS, TYPE_NAME, NAME, \
+    get_children_with_display_region, get_display_region
+from lib.ui_selector import Selector, SelectorError, compile_selector, select_all
 from models.data_models import *
 
-TOTAL_DISPLAY_REGION = 'totalDisplayRegion'
-CHILDREN = 'children'
-ADDRESS = 'pythonObjectAddress'
-TYPE_NAME = 'pythonObjectTypeName'
-ENTRIES_OF_INTEREST = 'dictEntriesOfInterest'
-NAME = '_name'
-HINT = '_hint'
+# Window type name to the UiTree attribute it is parsed into.
+SECTION_ATTRIBUTES = {
+    'ChatWindowStack': 'chat_windows',
+    'OverviewWindow': 'overview',
+    'DronesWindow': 'drones',
+    'ShipUI': 'ship_ui'
+}
+SECTION_TYPES = tuple(SECTION_ATTRIBUTES)
+# Selectors of the section parsers.
+OVERVIEW_SCROLL = compile_selector('[type*=scroll i]')
+OVERVIEW_HEADERS = compile_selector('[type*=headers i]')
+OVERVIEW_ENTRY = compile_selector('OverviewScrollEntry')
+SPACE_OBJECT_ICON = compile_selector('SpaceObjectIcon')
+ICON_SPRITE = compile_selector('[_name=iconSprite]')
+RIGHT_ALIGNED_ICONS = compile_selector('[_name=rightAlignedIconContainer]')
+FILL = compile_selector('Fill')
+BACKGROUND_COLOR = compile_selector('[_name=bgColor]')
+CHAT_WINDOW = compile_selector('XmppChatWindow')
+USER_LIST = compile_selector('[_name=userlist]')
+USER_ENTRY = compile_selector('XmppChatSimpleUserEntry, XmppChatUserEntry')
+STANDING_ICON = compile_selector('FlagIconWithState')
+DRONE_ENTRY = compile_selector('[type^=Drone][type$=Entry]')
+DRONE_GAUGE_BAR = compile_selector('[_name=droneGaugeBar]')
+DRONE_GAUGE_DAMAGE_BAR = compile_selector('[_name=droneGaugeBarDmg]')
+# Hit point gauges of the ship UI, and of the drone entries, which name the structure gauge differently.
+SHIELD_GAUGE = compile_selector('[_name=shieldGauge]')
+ARMOR_GAUGE = compile_selector('[_name=armorGauge]')
+STRUCTURE_GAUGE = compile_selector('[_name=structureGauge]')
+DRONE_STRUCTURE_GAUGE = compile_selector('[_name=structGauge]')
+SPEED_GAUGE = compile_selector('SpeedGauge')
+CAPACITOR_CONTAINER = compile_selector('CapacitorContainer')
+CAPACITOR_MARK = compile_selector('[_name=pmark]')
+SHIP_SLOT = compile_selector('ShipSlot')
+MODULE_BUTTON = compile_selector('ModuleButton')
+SPRITE = compile_selector('Sprite')
+NAMED = compile_selector('[_name]')
+WITH_HINT = compile_selector('[_hint]')
+WITH_TEXT = compile_selector('[_setText], [_text]')
+# Space object icon texts, and right aligned icon hints of E-War against the user, to overview indicators.
+INDICATOR_FLAGS = {
+    'hostile': OverviewIndicator.LOCKED_ME,
+    'attackingMe': OverviewIndicator.ATTACKING_ME,
+    'targeting': OverviewIndicator.TARGETING,
+    'targetedByMeIndicator': OverviewIndicator.TARGETED,
+    'myActiveTargetIndicator': OverviewIndicator.IS_ACTIVE_TARGET
+}
+EWAR_INDICATOR_FLAGS = {
+    'is cap neutralizing me': OverviewIndicator.NEUT,
+    'is tracking disrupting me': OverviewIndicator.TRACKING_DISRUPT,
+    'is jamming me': OverviewIndicator.JAM,
+    'is warp disrupting me': OverviewIndicator.WARP_DISRUPT,
+    'is webifying me': OverviewIndicator.WEB
+}
+
+
+@dataclass
+class ParsedChatCache:
+    """
+    Last parse of each chat window, by window name: the ChatWindow, and its users by user entry fingerprint. Users of
+    unchanged entries are reused, and only the entries added or removed since are compared to find the member changes.
+    """
+    windows: dict[str, tuple[ChatWindow, dict]] = field(default_factory=dict)
 
 
-def parse_memory_read_to_ui_tree(file_path: str) -> UiTree:
+@dataclass
+class ParsedChatEntries:
+    """
+    Users of a chat window parsed without the chat cache, by a section pool worker: (user entry fingerprint, user) by
+    entry. The process holding the cache makes the ChatWindow out of them.
+    """
+    name: str
+    entries: list[tuple[tuple, Optional[ChatUserEntity]]]
+
+
+@dataclass
+class ParsedWindowCache:
+    """
+    Parsed windows of the previous frame for the incremental parse mode. Windows are keyed by their fingerprint:
+    address, hash of the subtree JSON, and absolute position.
+    """
+    windows: dict = field(default_factory=dict)
+    section_fingerprints: dict[str, list] = field(default_factory=dict)
+    chat: ParsedChatCache = field(default_factory=ParsedChatCache)
+
+
+def parse_memory_read_to_ui_tree(file_path: str, window_cache: Optional[ParsedWindowCache] = None) -> UiTree:
     with open(file_path) as f:
-        ui_tree_root = json.load(f)
-        ui_tree_root[TOTAL_DISPLAY_REGION] = __get_display_region(ui_tree_root)
+        return parse_memory_read(f, window_cache)
 
-        return __parse_ui_tree_json(ui_tree_root)
 
+def parse_memory_read(file: IO[str], window_cache: Optional[ParsedWindowCache] = None,
+                      section_pool: Optional[SectionPool] = None,
+                      selectors: Optional[dict[str, Selector]] = None) -> UiTree:
+    """
+    Parse a memory read into a UiTree. When a window cache is given, windows unchanged since the previous frame parsed
+    with the same cache are reused rather than parsed again, and the cache is updated with this frame. Reused objects
+    are shared between the UiTrees of both frames.
+    :param file: Memory read JSON.
+    :param window_cache: Cache of the previous frame. None to parse every window.
+    :param section_pool: Workers parsing the windows of large frames in parallel. None to parse in this process only.
+    :param selectors: Bot selectors (see compile_bot_selector) evaluated into UiTree.selections, by selection name.
+    :return: Parsed UiTree. Its changed_sections lists the attributes that differ from the previous frame.
+    """
+    selectors = selectors or {}
+    window_types = get_window_types(selectors)
+    with metrics.stage('decode'):
+        ui_tree_root = read_pruned_ui_tree(file, window_types, keep_section_text=section_pool is not None)
+    windows = __find_windows(ui_tree_root, window_types)
+    section_windows = __locate_windows(windows)
+    parsed_windows = __get_reusable_windows(section_windows, window_cache)
+    chat_cache = window_cache.chat if window_cache else None
+    pending_windows = __submit_windows(section_windows, parsed_windows, section_pool)
 
-def __parse_ui_tree_json(ui_tree_root: dict) -> UiTree:
     ui_tree = UiTree()
     ui_tree.root_address = ui_tree_root[ADDRESS]
+    # Sections parsed in this process go first, while the workers parse the others.
+    for attribute, section in sorted(section_windows.items(), key=lambda item: any(
+            fingerprint in pending_windows for (fingerprint, _) in item[1])):
+        setattr(ui_tree, attribute, __parse_section(attribute, section, parsed_windows, chat_cache, pending_windows))
+    ui_tree.changed_sections = __update_window_cache(section_windows, parsed_windows, window_cache)
+    ui_tree.selections = __select(windows, selectors)
 
-    nodes_to_check = [ui_tree_root]
-    while nodes_to_check:
-        node = nodes_to_check.pop(0)
-
-        if node[TYPE_NAME] == 'ChatWindowStack':
-            chat_window = __parse_chat_window(node)
-            if chat_window:
-                ui_tree.chat_windows.append(chat_window)
-        elif node[TYPE_NAME] == 'OverviewWindow':
-            ui_tree.overview = __parse_overview(node)
-        elif node[TYPE_NAME] == 'DronesWindow':
-            ui_tree.drones = __parse_drones_window(node)
-        elif node[TYPE_NAME] == 'ShipUI':
-            ui_tree.ship_ui = __parse_ship_ui(node)
+    return ui_tree
+
+
+def parse_memory_read_lazily(file: IO[str], reopen_frame: Callable[[], IO[str]],
+                             window_cache: Optional[ParsedWindowCache] = None,
+                             sections: Optional[Iterable[str]] = None,
+                             section_pool: Optional[SectionPool] = None,
+                             selectors: Optional[dict[str, Selector]] = None) -> LazyUiTree:
+    """
+    Parse a memory read into a LazyUiTree, which parses each section on first access. Only the windows of the given
+    sections are read from the frame now; other sections are read from the reopened frame if they are accessed.
+    :param file: Memory read JSON.
+    :param reopen_frame: Opens the same memory read again.
+    :param window_cache: Cache of the previous frame. None to parse every window.
+    :param sections: UiTree attributes to read now, e.g. the sections used in the previous frame. None for all of them.
+    :param section_pool: Workers parsing the windows read now, for large frames, until their sections are accessed.
+        None to parse in this process only.
+    :param selectors: Bot selectors (see compile_bot_selector) evaluated into UiTree.selections, by selection name.
+    :return: Lazily parsed UiTree. Its changed_sections only covers the sections read now, listed in its
+        compared_sections.
+    """
+    sections = set(SECTION_ATTRIBUTES.values() if sections is None else sections)
+    selectors = selectors or {}
+    window_types = {*[type_name for type_name, attribute in SECTION_ATTRIBUTES.items() if attribute in sections],
+                    *__get_root_types(selectors)}
+    with metrics.stage('decode'):
+        ui_tree_root = read_pruned_ui_tree(file, window_types, keep_section_text=section_pool is not None)
+    windows = __find_windows(ui_tree_root, window_types)
+    section_windows = {
+        attribute: section for attribute, section in __locate_windows(windows).items() if attribute in sections}
+    parsed_windows = __get_reusable_windows(section_windows, window_cache)
+    chat_cache = window_cache.chat if window_cache else None
+    pending_windows = __submit_windows(section_windows, parsed_windows, section_pool)
+
+    section_parsers = {}
+    for attribute in SECTION_ATTRIBUTES.values():
+        if attribute in section_windows:
+            section_parsers[attribute] = partial(
+                __parse_section, attribute, section_windows[attribute], parsed_windows, chat_cache, pending_windows)
         else:
-            nodes_to_check.extend(__get_children_with_display_region(node))
+            section_parsers[attribute] = partial(
+                __parse_section_from_frame, attribute, reopen_frame, parsed_windows, chat_cache)
+
+    changed_sections = __update_window_cache(section_windows, parsed_windows, window_cache)
+    return LazyUiTree(ui_tree_root[ADDRESS], section_parsers, changed_sections, __select(windows, selectors),
+                      set(section_windows))
+
+
+def compile_bot_selector(selector: str) -> Selector:
+    """
+    Compile a selector a bot evaluates on every frame, e.g. for a window no section parser reads.
+    :param selector: Selector starting with the type name of the window it searches, e.g. FleetWindow FleetMember, so
+        only these windows are read from the frame. The window must not be inside another window read.
+    :return: Compiled selector.
+    :raise SelectorError: The selector is invalid, or does not start with a type name.
+    """
+    compiled_selector = compile_selector(selector)
+    if compiled_selector.root_types is None:
+        raise SelectorError(f'Selector {selector!r} does not start with the type name of a window')
+    return compiled_selector
+
+
+def get_window_types(selectors: Optional[dict[str, Selector]] = None) -> set[str]:
+    """
+    :param selectors: Bot selectors, by selection name.
+    :return: Type names of the windows the parser reads: the section windows, and the root types of the selectors.
+    """
+    return {*SECTION_TYPES, *__get_root_types(selectors or {})}
+
+
+def __locate_windows(windows: list[dict]) -> dict[str, list]:
+    """
+    Group the windows of the sections.
+    :param windows: Windows found in the pruned UI tree.
+    :return: (fingerprint, window node) tuples by UiTree attribute.
+    """
+    section_windows = {attribute: [] for attribute in SECTION_ATTRIBUTES.values()}
+    for node in windows:
+        if node[TYPE_NAME] in SECTION_ATTRIBUTES:
+            section_windows[SECTION_ATTRIBUTES[node[TYPE_NAME]]].append((__get_window_fingerprint(node), node))
+
+    return section_windows
+
+
+def __get_root_types(selectors: dict[str, Selector]) -> set[str]:
+    return {type_name for selector in selectors.values() for type_name in selector.root_types}
+
+
+def __select(windows: list[dict], selectors: dict[str, Selector]) -> dict[str, list[UiNode]]:
+    """
+    Evaluate the registered selectors on the windows of their root types, as one batch per window.
+    :return: Matching nodes by selector name.
+    """
+    selections = {name: [] for name in selectors}
+    if not selectors:
+        return selections
+
+    with metrics.stage('select'):
+        for window in windows:
+            window_selectors = {
+                name: selector for name, selector in selectors.items() if window[TYPE_NAME] in selector.root_types}
+            if not window_selectors:
+                continue
+            index = UiNodeIndex(window)
+            for name, nodes in select_all(index, index.root, window_selectors).items():
+                selections[name].extend(UiNode(address=node.address, type_name=node.type_name, entries=node.entries,
+                                               display_region=index.get_display_region(node)) for node in nodes)
+    return selections
+
+
+def __get_reusable_windows(section_windows: dict[str, list], window_cache: Optional[ParsedWindowCache]) -> dict:
+    """
+    Collect the cached windows still present in this frame. Sections not read from this frame keep their windows.
+    """
+    if window_cache is None:
+        return {}
+
+    fingerprints = [fingerprint for windows in section_windows.values() for (fingerprint, _) in windows]
+    for attribute, section_fingerprints in window_cache.section_fingerprints.items():
+        if attribute not in section_windows:
+            fingerprints.extend(section_fingerprints)
+
+    return {fingerprint: window_cache.windows[fingerprint] for fingerprint in fingerprints
+            if fingerprint in window_cache.windows}
+
+
+def __update_window_cache(section_windows: dict[str, list], parsed_windows: dict,
+                          window_cache: Optional[ParsedWindowCache]) -> set[str]:
+    """
+    Store this frame in the window cache.
+    :return: Attributes of the sections that differ from the previous frame. All of them without a cache.
+    """
+    section_fingerprints = {
+        attribute: [fingerprint for (fingerprint, _) in windows] for attribute, windows in section_windows.items()}
+    if window_cache is None:
+        return set(section_fingerprints)
+
+    changed_sections = {
+        attribute for attribute, fingerprints in section_fingerprints.items()
+        if fingerprints != window_cache.section_fingerprints.get(attribute)}
+    window_cache.windows = parsed_windows
+    window_cache.section_fingerprints.update(section_fingerprints)
+    return changed_sections
+
+
+def __submit_windows(section_windows: dict[str, list], parsed_windows: dict,
+                     section_pool: Optional[SectionPool]) -> dict[object, Future]:
+    """
+    Send the windows to parse to the section pool, but the largest one, which this process parses meanwhile. Nothing is
+    sent unless the JSON text of the windows to send adds up to the min_parallel_bytes of the pool.
+    :return: Future parse results of the windows sent, by fingerprint.
+    """
+    if section_pool is None:
+        return {}
+
+    windows = sorted(((fingerprint, node) for windows in section_windows.values() for (fingerprint, node) in windows
+                      if fingerprint not in parsed_windows and SUBTREE_TEXT in node),
+                     key=lambda window: len(window[1][SUBTREE_TEXT]), reverse=True)[1:]
+    if sum(len(node[SUBTREE_TEXT]) for (_, node) in windows) < section_pool.min_parallel_bytes:
+        return {}
+
+    with metrics.stage('parallel_submit'):
+        return {fingerprint: section_pool.submit(parse_window_json,
+                                                 node if section_pool.uses_threads else node[SUBTREE_TEXT],
+                                                 astuple(node[TOTAL_DISPLAY_REGION]))
+                for (fingerprint, node) in windows}
+
+
+def __parse_section(attribute: str, windows: list, parsed_windows: dict, chat_cache: Optional[ParsedChatCache],
+                    pending_windows: dict[object, Future]):
+    """
+    Parse the windows of a section, reusing the already parsed ones.
+    :param attribute: UiTree attribute of the section.
+    :param windows: (fingerprint, window node) tuples of the section.
+    :param parsed_windows: Parsed windows by fingerprint. Newly parsed windows are added.
+    :param chat_cache: Chat windows of the previous parse. None to parse every user entry.
+    :param pending_windows: Future parse results of the windows sent to the section pool, by fingerprint.
+    :return: Value of the UiTree attribute.
+    """
+    values = []
+    for (fingerprint, node) in windows:
+        if fingerprint in parsed_windows:
+            values.append(__get_reused_window(parsed_windows[fingerprint]))
+        elif fingerprint in pending_windows:
+            parsed_windows[fingerprint] = __get_pending_window(
+                attribute, node, pending_windows.pop(fingerprint), chat_cache)
+            values.append(parsed_windows[fingerprint])
+        else:
+            parsed_windows[fingerprint] = __parse_window(node, chat_cache)
+            values.append(parsed_windows[fingerprint])
+
+    if attribute == 'chat_windows':
+        return [chat_window for chat_window in values if chat_window]
+    return values[-1] if values else getattr(UiTree(), attribute)
+
+
+def __parse_section_from_frame(attribute: str, reopen_frame: Callable[[], IO[str]], parsed_windows: dict,
+                               chat_cache: Optional[ParsedChatCache]):
+    section_types = [type_name for type_name, section_attribute in SECTION_ATTRIBUTES.items()
+                     if section_attribute == attribute]
+    with reopen_frame() as file, metrics.stage('decode'):
+        ui_tree_root = read_pruned_ui_tree(file, section_types)
+
+    windows = __find_windows(ui_tree_root, section_types)
+    return __parse_section(attribute, __locate_windows(windows)[attribute], parsed_windows, chat_cache, {})
+
+
+def __get_pending_window(attribute: str, window_json: dict, pending_window: Future,
+                         chat_cache: Optional[ParsedChatCache]):
+    with metrics.stage(f'parallel_wait.{attribute}'):
+        try:
+            parsed_window = pending_window.result()
+        except BrokenExecutor:
+            # The worker died: parse here instead. The pool starts new workers on the next submit.
+            metrics.count('parallel_parse_fallbacks')
+            return __parse_window(window_json, chat_cache)
+
+    if isinstance(parsed_window, ParsedChatEntries):
+        with metrics.stage(f'parse.{attribute}'):
+            return __create_chat_window(parsed_window, chat_cache)
+    return parsed_window
 
-    return ui_tree
+
+def __get_reused_window(window):
+    if isinstance(window, ChatWindow) and window.changes:
+        # The window did not change since it was parsed, nor did its members.
+        return replace(window, changes=[])
+    return window
+
+
+def __find_windows(ui_tree_root: dict, window_types: Iterable[str]) -> list[dict]:
+    """
+    Find the windows in breadth-first order, setting the total display region of the nodes on the way. The pruned tree
+    only holds the windows and their ancestors, so the walk is short.
+    :param ui_tree_root: Root of the pruned UI tree.
+    :param window_types: Type names of the windows read in the pruned tree.
+    :return: Window nodes.
+    """
+    window_types = frozenset(window_types)
+    with metrics.stage('tree_walk'):
+        ui_tree_root[TOTAL_DISPLAY_REGION] = get_display_region(ui_tree_root)
+        windows = []
+
+        nodes_to_check = deque([ui_tree_root])
+        while nodes_to_check:
+            node = nodes_to_check.popleft()
+            if node[TYPE_NAME] in window_types:
+                windows.append(node)
+            else:
+                nodes_to_check.extend(get_children_with_display_region(node))
+
+    return windows
+
+
+def __get_window_fingerprint(window: dict):
+    if SUBTREE_HASH not in window:
+        # Not read as a section, so there is nothing to compare with. Never equal to another fingerprint.
+        return object()
+
+    display_region: DisplayRegion = window[TOTAL_DISPLAY_REGION]
+    return window[ADDRESS], window[SUBTREE_HASH], display_region.x, display_region.y
+
+
+def __parse_window(window_json: dict, chat_cache: Optional[ParsedChatCache]):
+    attribute = SECTION_ATTRIBUTES[window_json[TYPE_NAME]]
+    with metrics.stage(f'index.{attribute}'):
+        index = UiNodeIndex(window_json)
+
+    with metrics.stage(f'parse.{attribute}'):
+        return __parse_indexed_window(index, chat_cache)
+
+
+def parse_window_json(window_json: str | dict, display_region: tuple[float, float, float, float]):
+    """
+    Parse a section window in a section pool worker. The users of a chat window are parsed without the chat cache, which
+    stays in the process that submitted the window.
+    :param window_json: JSON text of the window, or the window itself for a thread worker.
+    :param display_region: Absolute display region of the window: x, y, width and height.
+    :return: Parsed window, or ParsedChatEntries for a chat window stack.
+    """
+    if isinstance(window_json, str):
+        window_json = json.loads(window_json)
+        window_json[TOTAL_DISPLAY_REGION] = DisplayRegion(*display_region)
+    index = UiNodeIndex(window_json)
+
+    if index.root.type_name == 'ChatWindowStack':
+        return __parse_chat_entries(index, index.root, None)
+    return __parse_indexed_window(index, None)
+
+
+def __parse_indexed_window(index: UiNodeIndex, chat_cache: Optional[ParsedChatCache]):
+    window = index.root
+    if window.type_name == 'ChatWindowStack':
+        return __parse_chat_window(index, window, chat_cache)
+    elif window.type_name == 'OverviewWindow':
+        return __parse_overview(index, window)
+    elif window.type_name == 'DronesWindow':
+        return __parse_drones_window(index, window)
+    elif window.type_name == 'ShipUI':
+        return __parse_ship_ui(index, window)
 
 
 # Overview parsing functions start
-def __parse_overview(overview_window: dict) -> list[OverviewEntry]:
+def __parse_overview(index: UiNodeIndex, overview_window: UiTreeNode) -> list[OverviewEntry]:
     parsed_entries = []
 
-    scroll = __filter_nodes(overview_window, lambda node: 'scroll' in node[TYPE_NAME].lower())[0]
-    header = __filter_nodes(scroll, lambda node: 'headers' in node[TYPE_NAME].lower())[0]
-    entries = __filter_nodes(overview_window, lambda node: node[TYPE_NAME] == 'OverviewScrollEntry')
+    scroll = OVERVIEW_SCROLL.select(index, overview_window)[0]
+    header = OVERVIEW_HEADERS.select(index, scroll)[0]
+    entries = OVERVIEW_ENTRY.select(index, overview_window)
 
-    header_texts_nodes = __get_all_contained_text(header)
+    column_layout = get_column_layout_from_texts(__get_all_contained_text(index, header), index)
 
     for entry in entries:
         # parse text info.
-        entry_info = {}
-        for (entry_text, entry_node) in __get_all_contained_text(entry):
-            entry_display_region: DisplayRegion = entry_node[TOTAL_DISPLAY_REGION]
-            entry_x = entry_display_region.x
-            entry_width = entry_display_region.width
-            for (header_text, header_node) in header_texts_nodes:
-                header_display_region: DisplayRegion = header_node[TOTAL_DISPLAY_REGION]
-                header_x = header_display_region.x
-                header_width = header_display_region.width
-
-                if header_x < entry_x + 3 and header_x + header_width > entry_x + entry_width - 3:
-                    entry_info[header_text] = entry_text
-                    break
-
-        object_icon_nodes = __filter_nodes(entry, lambda node: node[TYPE_NAME] == 'SpaceObjectIcon')
-        indicator_texts = __parse_space_object_icon_texts(object_icon_nodes[0]) if object_icon_nodes else []
-        icon_texts = __parse_right_aligned_icons(entry)
-        icon_color = __get_entry_icon_color(object_icon_nodes[0]) if object_icon_nodes else None
-        icon_background_color = __get_background_color(entry)
-
-        indicators = OverviewEntryIndicators(
-            locked_me='hostile' in indicator_texts,
-            attacking_me='attackingMe' in indicator_texts,
-            targeting='targeting' in indicator_texts,
-            targeted='targetedByMeIndicator' in indicator_texts,
-            is_active_target='myActiveTargetIndicator' in indicator_texts,
-            neut=any('is cap neutralizing me' in text for text in icon_texts),
-            tracking_disrupt=any('is tracking disrupting me' in text for text in icon_texts),
-            jam=any('is jamming me' in text for text in icon_texts),
-            warp_disrupt=any('is warp disrupting me' in text for text in icon_texts),
-            web=any('is webifying me' in text for text in icon_texts)
-        )
+        entry_info = column_layout.assign_texts(__get_all_contained_text(index, entry), index)
+
+        object_icon_nodes = SPACE_OBJECT_ICON.select(index, entry)
+        indicator_texts = __parse_space_object_icon_texts(index, object_icon_nodes[0]) if object_icon_nodes else []
+        icon_texts = __parse_right_aligned_icons(index, entry)
+        icon_color = __get_entry_icon_color(index, object_icon_nodes[0]) if object_icon_nodes else None
+        icon_background_color = __get_background_color(index, entry)
+
+        indicators = OverviewEntryIndicators(__get_indicator_flags(indicator_texts, icon_texts))
 
         parsed_entries.append(OverviewEntry(
-            info=entry_info, indicators=indicators, icon_colors=icon_color, background_colors=icon_background_color))
+            info=entry_info, indicators=indicators, icon_colors=icon_color, background_colors=icon_background_color,
+            address=entry.address, distance=parse_distance(entry_info.get(DISTANCE_COLUMN)),
+            velocity=parse_velocity(entry_info.get(VELOCITY_COLUMN)),
+            angular_velocity=parse_angular_velocity(entry_info.get(ANGULAR_VELOCITY_COLUMN)),
+            display_region=index.get_display_region(entry)))
     return parsed_entries
 
 
-def __parse_space_object_icon_texts(object_icon_node) -> list[str]:
+def __get_indicator_flags(indicator_texts: list[str], icon_texts: list[str]) -> int:
+    flags = 0
+    for text in indicator_texts:
+        flags |= INDICATOR_FLAGS.get(text, 0)
+    for text in icon_texts:
+        for ewar_text, flag in EWAR_INDICATOR_FLAGS.items():
+            if ewar_text in text:
+                flags |= flag
+    return flags
+
+
+def __parse_space_object_icon_texts(index: UiNodeIndex, object_icon_node: UiTreeNode) -> list[str]:
     """
     Parse space object icon (icon of Overview entry) as texts.
     Describes if the entry is targeting, attacking, etc.
+    :param index: Node index of the UI tree.
     :param object_icon_node: Space object icon node.
     :return: Entry indicators. ie,: [hostile, attackingMe, targeting, targetedByMeIndicator, myActiveTargetIndicator]
     """
-    indicator_nodes = __filter_nodes(object_icon_node, lambda node: '_name' in node[ENTRIES_OF_INTEREST],
-                                     parent_only=False)
-    return [__get_text_from_dict_entries(node, NAME) for node in indicator_nodes]
+    indicator_nodes = NAMED.select(index, object_icon_node, parent_only=False)
+    return [node.name for node in indicator_nodes]
 
 
-def __parse_right_aligned_icons(entry: dict) -> list[str]:
+def __parse_right_aligned_icons(index: UiNodeIndex, entry: UiTreeNode) -> list[str]:
     """
     Parse right aligned icons as lower-case texts. Describes if the entry is E-War against the user.
+    :param index: Node index of the UI tree.
     :param entry: Overview entry node.
     :return: Entry indicators. ie.: [pilot is cap neutralizing me, pilot is warp disrupting me]
     """
     icon_texts = []
-    right_aligned_icons = __filter_nodes(
-        entry, lambda node: __get_text_from_dict_entries(node, NAME) == 'rightAlignedIconContainer')
+    right_aligned_icons = RIGHT_ALIGNED_ICONS.select(index, entry)
     if right_aligned_icons:
         # Should only be at most 1 right_aligned_icons container for each entry
-        icon_text_nodes = __filter_nodes(right_aligned_icons[0], lambda node: '_hint' in node[ENTRIES_OF_INTEREST])
-        icon_texts.extend([__get_text_from_dict_entries(node, HINT).lower() for node in icon_text_nodes])
+        icon_text_nodes = WITH_HINT.select(index, right_aligned_icons[0])
+        icon_texts.extend([node.hint.lower() for node in icon_text_nodes])
 
     return icon_texts
 
 
-def __get_entry_icon_color(object_icon_node: dict) -> Optional[ColorPercentages]:
-    sprite = __filter_nodes(object_icon_node, lambda node: __get_text_from_dict_entries(node, NAME) == 'iconSprite')
+def __get_entry_icon_color(index: UiNodeIndex, object_icon_node: UiTreeNode) -> Optional[ColorPercentages]:
+    sprite = ICON_SPRITE.select(index, object_icon_node)
     return __get_color_from_node(sprite[0]) if sprite else None
 
 
-def __get_background_color(entry: dict) -> Optional[ColorPercentages]:
-    fill_nodes = __filter_nodes(entry, lambda node: node[TYPE_NAME] == 'Fill')
-    bg_color_nodes = __filter_nodes(
-        fill_nodes[0], lambda node: __get_text_from_dict_entries(node, NAME) == 'bgColor') if fill_nodes else None
+def __get_background_color(index: UiNodeIndex, entry: UiTreeNode) -> Optional[ColorPercentages]:
+    fill_nodes = FILL.select(index, entry)
+    bg_color_nodes = BACKGROUND_COLOR.select(index, fill_nodes[0]) if fill_nodes else None
     return __get_color_from_node(bg_color_nodes[0]) if bg_color_nodes else None
 # Overview parsing functions end
 
 
 # Chat parsing functions start
-def __parse_chat_window(chat_window_stack: dict) -> Optional[ChatWindow]:
-    chat_window_nodes = __filter_nodes(chat_window_stack, lambda node: node[TYPE_NAME] == 'XmppChatWindow')
+def __parse_chat_window(index: UiNodeIndex, chat_window_stack: UiTreeNode,
+                        chat_cache: Optional[ParsedChatCache]) -> Optional[ChatWindow]:
+    chat_entries = __parse_chat_entries(index, chat_window_stack, chat_cache)
+    return __create_chat_window(chat_entries, chat_cache) if chat_entries else None
+
 
-    return ChatWindow(
-        name=__get_text_from_dict_entries(chat_window_nodes[0], NAME),
-        user_list=__parse_user_lists_from_chat(chat_window_nodes[0])
-    ) if chat_window_nodes else None
+def __parse_chat_entries(index: UiNodeIndex, chat_window_stack: UiTreeNode,
+                         chat_cache: Optional[ParsedChatCache]) -> Optional[ParsedChatEntries]:
+    chat_window_nodes = CHAT_WINDOW.select(index, chat_window_stack)
+    if not chat_window_nodes:
+        return None
+
+    name = chat_window_nodes[0].entries.get(NAME, '')
+    (_, previous_users) = chat_cache.windows.get(name, (None, {})) if chat_cache else (None, {})
+    return ParsedChatEntries(name, __parse_user_entries(index, chat_window_nodes[0], previous_users))
 
 
-def __parse_user_lists_from_chat(chat_ui_node: dict) -> list[ChatUserEntity]:
-    user_list_nodes = __filter_nodes(
-        chat_ui_node, lambda node: 'userlist' == __get_text_from_dict_entries(node, NAME))
-    user_entities = []
+def __create_chat_window(chat_entries: ParsedChatEntries, chat_cache: Optional[ParsedChatCache]) -> ChatWindow:
+    """
+    Make the chat window out of its user entries, and find the member changes since the previous parse.
+    """
+    name = chat_entries.name
+    chat_cache = chat_cache or ParsedChatCache()
+    (previous_window, previous_users) = chat_cache.windows.get(name, (ChatWindow(), {}))
+    user_list = []
+    users = {}
+    for (fingerprint, user) in chat_entries.entries:
+        # Users parsed by a worker are equal to the users of the previous parse, but not the same objects.
+        user = previous_users.get(fingerprint, user)
+        users[fingerprint] = user
+        if user:
+            user_list.append(user)
+
+    chat_window = ChatWindow(name=name, user_list=user_list)
+    # In entry order, so the member of a user listed twice is the same on every parse.
+    __update_members(chat_window, previous_window,
+                     [user for fingerprint, user in previous_users.items() if user and fingerprint not in users],
+                     [user for fingerprint, user in users.items() if user and fingerprint not in previous_users],
+                     {user.name: user for user in user_list})
+    chat_cache.windows[name] = (chat_window, users)
+    return chat_window
+
+
+def __parse_user_entries(index: UiNodeIndex, chat_ui_node: UiTreeNode,
+                         previous_users: dict) -> list[tuple[tuple, Optional[ChatUserEntity]]]:
+    """
+    Parse the users of a chat window. Users of entries unchanged since the previous parse are reused.
+    :param index: Node index of the UI tree.
+    :param chat_ui_node: Chat window node.
+    :param previous_users: Users of the previous parse by user entry fingerprint. None for entries without a user.
+    :return: (user entry fingerprint, user) by entry. None for entries without a user.
+    """
+    user_list_nodes = USER_LIST.select(index, chat_ui_node)
+    entries = []
 
     if user_list_nodes:
         user_list_node = user_list_nodes[0]
-        user_entry_nodes = __filter_nodes(
-            user_list_node, lambda node: node[TYPE_NAME] in ('XmppChatSimpleUserEntry', 'XmppChatUserEntry'))
+        user_entry_nodes = USER_ENTRY.select(index, user_list_node)
 
-        user_entities = []
         for user_entry_node in user_entry_nodes:
-            name_texts = __get_all_contained_text(user_entry_node)
-            if name_texts:
+            fingerprint = __get_user_entry_fingerprint(index, user_entry_node)
+            if fingerprint in previous_users:
+                user_entity = previous_users[fingerprint]
+            else:
+                name_texts = __get_all_contained_text(index, user_entry_node)
                 user_entity = ChatUserEntity(
                     name=max(name_texts, key=lambda node_text: len(node_text[0]))[0],
-                    standing=__get_standing_icon_hint(user_entry_node)
-                )
-                user_entities.append(user_entity)
-                
-    return user_entities
+                    standing=__get_standing_icon_hint(index, user_entry_node)
+                ) if name_texts else None
+
+            entries.append((fingerprint, user_entity))
+
+    return entries
 
 
-def __get_standing_icon_hint(user_entry_node: dict) -> Optional[str]:
-    standing_icon_node = __filter_nodes(
-        user_entry_node, lambda node: node[TYPE_NAME] == 'FlagIconWithState')
-    return standing_icon_node[0][ENTRIES_OF_INTEREST]['_hint'] if standing_icon_node else None
+def __get_user_entry_fingerprint(index: UiNodeIndex, user_entry_node: UiTreeNode) -> tuple:
+    """
+    :return: Address of the entry, and the type, text and hint of each node in it: everything its parse reads. Scrolled
+        lists reuse entries for other users, so the address alone does not identify the user.
+    """
+    start = user_entry_node.position
+    return user_entry_node.address, tuple(
+        (node.type_name, node.text, node.hint) for node in index.nodes[start:index.subtree_ends[start]])
+
+
+def __update_members(chat_window: ChatWindow, previous_window: ChatWindow, removed_users: list[ChatUserEntity],
+                     added_users: list[ChatUserEntity], listed_users: dict[str, ChatUserEntity]) -> None:
+    """
+    Set the members and the member changes of a chat window from the previous parse, and the users of the entries
+    removed and added since. Only the changed members are visited; the previous members are copied, not changed.
+    :param listed_users: Users of the entries of this parse, by name. A member whose entry was removed stays a member
+        while another entry lists the same name.
+    """
+    members = dict(previous_window.members)
+    left_users = {}
+    relisted_users = []
+    for user in removed_users:
+        if members.get(user.name) is user:
+            del members[user.name]
+            left_users[user.name] = user
+            if user.name in listed_users:
+                relisted_users.append(listed_users[user.name])
+
+    changes = []
+    for user in added_users + relisted_users:
+        previous_user = left_users.pop(user.name, None)
+        if previous_user is None and user.name not in members:
+            changes.append(ChatMemberChange(ChatMemberChangeType.JOINED, user))
+        elif previous_user and previous_user.standing != user.standing:
+            changes.append(ChatMemberChange(ChatMemberChangeType.STANDING_CHANGED, user, previous_user.standing))
+        members[user.name] = user
+    for user in left_users.values():
+        changes.append(ChatMemberChange(ChatMemberChangeType.LEFT, user))
+
+    members_by_standing = dict(previous_window.members_by_standing)
+    standing_changes: dict[Optional[str], tuple[set, set]] = {}
+    for change in changes:
+        if change.type == ChatMemberChangeType.LEFT:
+            standing_changes.setdefault(change.user.standing, (set(), set()))[1].add(change.user.name)
+            continue
+        standing_changes.setdefault(change.user.standing, (set(), set()))[0].add(change.user.name)
+        if change.type == ChatMemberChangeType.STANDING_CHANGED:
+            standing_changes.setdefault(change.previous_standing, (set(), set()))[1].add(change.user.name)
+    for standing, (added_names, removed_names) in standing_changes.items():
+        names = (members_by_standing.get(standing, frozenset()) - removed_names) | added_names
+        if names:
+            members_by_standing[standing] = names
+        else:
+            members_by_standing.pop(standing, None)
+
+    chat_window.members = members
+    chat_window.members_by_standing = members_by_standing
+    chat_window.changes = changes
+
+
+def __get_standing_icon_hint(index: UiNodeIndex, user_entry_node: UiTreeNode) -> Optional[str]:
+    standing_icon_node = STANDING_ICON.select(index, user_entry_node)
+    return standing_icon_node[0].hint if standing_icon_node else None
 # Chat parsing functions end
 
 
 # Drones parsing functions start
-def __parse_drones_window(drones_window: dict) -> DroneList:
-    drone_entries = __filter_nodes(
-        drones_window, lambda node: node[TYPE_NAME].startswith('Drone') and node[TYPE_NAME].endswith('Entry'))
+def __parse_drones_window(index: UiNodeIndex, drones_window: UiTreeNode) -> DroneList:
+    drone_entries = DRONE_ENTRY.select(index, drones_window)
 
     drones = DroneList()
 
     for entry in drone_entries:
-        entry_texts = __get_all_contained_text(entry)
+        entry_texts = __get_all_contained_text(index, entry)
         if entry_texts:
-            shield = __parse_drone_gauge_percentage(entry, 'shieldGauge')
-            armor = __parse_drone_gauge_percentage(entry, 'armorGauge')
-            structure = __parse_drone_gauge_percentage(entry, 'structGauge')
+            shield = __parse_drone_gauge_percentage(index, entry, SHIELD_GAUGE)
+            armor = __parse_drone_gauge_percentage(index, entry, ARMOR_GAUGE)
+            structure = __parse_drone_gauge_percentage(index, entry, DRONE_STRUCTURE_GAUGE)
             hp_percentages = None if any(hp is None for hp in [shield, armor, structure]) else HitPointPercentages(
                 shield=shield, armor=armor, structure=structure)
-            drone = Drone(text=entry_texts[0][0], hp_percentages=hp_percentages)
-            drones.in_bay.append(drone) if 'InBay' in entry[TYPE_NAME] else drones.in_space.append(drone)
+            drone = Drone(text=entry_texts[0][0], hp_percentages=hp_percentages,
+                          display_region=index.get_display_region(entry))
+            drones.in_bay.append(drone) if 'InBay' in entry.type_name else drones.in_space.append(drone)
 
     return drones
 
 
-def __parse_drone_gauge_percentage(entry: dict, gauge_name: str) -> Optional[float]:
-    containers = __filter_nodes(entry, lambda node: __get_text_from_dict_entries(node, NAME) == gauge_name)
+def __parse_drone_gauge_percentage(index: UiNodeIndex, entry: UiTreeNode, gauge: Selector) -> Optional[float]:
+    containers = gauge.select(index, entry)
     gauge_percentage = None
     if containers:
-        gauge_bar_nodes = __filter_nodes(
-            containers[0], lambda node: __get_text_from_dict_entries(node, NAME) == 'droneGaugeBar')
-        damage_bar_nodes = __filter_nodes(
-            containers[0], lambda node: __get_text_from_dict_entries(node, NAME) == 'droneGaugeBarDmg')
+        gauge_bar_nodes = DRONE_GAUGE_BAR.select(index, containers[0])
+        damage_bar_nodes = DRONE_GAUGE_DAMAGE_BAR.select(index, containers[0])
         if gauge_bar_nodes and damage_bar_nodes:
-            hp = gauge_bar_nodes[0][TOTAL_DISPLAY_REGION].width
-            dmg = damage_bar_nodes[0][TOTAL_DISPLAY_REGION].width
+            hp = index.widths[gauge_bar_nodes[0].position]
+            dmg = index.widths[damage_bar_nodes[0].position]
             gauge_percentage = (hp - dmg) / hp * 100 if hp > 0 else 0
 
     return gauge_percentage
@@ -215,163 +702,81 @@ def __parse_drone_gauge_percentage(entry: dict, gauge_name: str) -> Optional[flo
 
 
 # Ship UI parsing functions start
-def __parse_ship_ui(ship_ui: dict) -> ShipUI:
+def __parse_ship_ui(index: UiNodeIndex, ship_ui: UiTreeNode) -> ShipUI:
     return ShipUI(
-        capacitor_percentage=__get_ship_capacitor(ship_ui),
-        speed_text=__get_ship_speed(ship_ui),
-        hp_percentages=__get_ship_hit_points(ship_ui),
-        module_buttons=__parse_module_buttons(ship_ui)
+        capacitor_percentage=__get_ship_capacitor(index, ship_ui),
+        speed_text=__get_ship_speed(index, ship_ui),
+        hp_percentages=__get_ship_hit_points(index, ship_ui),
+        module_buttons=__parse_module_buttons(index, ship_ui)
     )
 
 
-def __get_ship_hit_points(ship_ui: dict) -> Optional[HitPointPercentages]:
-    shield = __get_last_value_from_gauge('shieldGauge', ship_ui)
-    armor = __get_last_value_from_gauge('armorGauge', ship_ui)
-    structure = __get_last_value_from_gauge('structureGauge', ship_ui)
+def __get_ship_hit_points(index: UiNodeIndex, ship_ui: UiTreeNode) -> Optional[HitPointPercentages]:
+    shield = __get_last_value_from_gauge(index, SHIELD_GAUGE, ship_ui)
+    armor = __get_last_value_from_gauge(index, ARMOR_GAUGE, ship_ui)
+    structure = __get_last_value_from_gauge(index, STRUCTURE_GAUGE, ship_ui)
     return None if any(hp is None for hp in [shield, armor, structure]) else HitPointPercentages(
         shield=shield, armor=armor, structure=structure)
 
 
-def __get_ship_speed(ship_ui: dict) -> Optional[str]:
-    speed_nodes = __filter_nodes(ship_ui, lambda node: node[TYPE_NAME] == 'SpeedGauge')
-    speed_text = __get_all_contained_text(speed_nodes[0]) if speed_nodes else None
+def __get_ship_speed(index: UiNodeIndex, ship_ui: UiTreeNode) -> Optional[str]:
+    speed_nodes = SPEED_GAUGE.select(index, ship_ui)
+    speed_text = __get_all_contained_text(index, speed_nodes[0]) if speed_nodes else None
     return speed_text[0][0] if speed_text else None
 
 
-def __get_ship_capacitor(ship_ui: dict) -> Optional[float]:
-    capacitor_container_nodes = __filter_nodes(ship_ui, lambda node: node[TYPE_NAME] == 'CapacitorContainer')
-    p_marks = __filter_nodes(
-        capacitor_container_nodes[0],
-        lambda node: __get_text_from_dict_entries(node, NAME) == 'pmark') if capacitor_container_nodes else []
+def __get_ship_capacitor(index: UiNodeIndex, ship_ui: UiTreeNode) -> Optional[float]:
+    capacitor_container_nodes = CAPACITOR_CONTAINER.select(index, ship_ui)
+    p_marks = CAPACITOR_MARK.select(index, capacitor_container_nodes[0]) if capacitor_container_nodes else []
     lit_p_marks = [color for color in map(__get_color_from_node, p_marks) if color and color.a < 20]
     return len(lit_p_marks) / len(p_marks) * 100 if p_marks else None
 
 
-def __parse_module_buttons(ship_ui: dict) -> list[ModuleButton]:
-    ship_slots = __filter_nodes(ship_ui, lambda node: node[TYPE_NAME] == 'ShipSlot')
+def __parse_module_buttons(index: UiNodeIndex, ship_ui: UiTreeNode) -> list[ModuleButton]:
+    ship_slots = SHIP_SLOT.select(index, ship_ui)
     buttons = []
     for slot in ship_slots:
-        module_button_nodes = __filter_nodes(slot, lambda node: node[TYPE_NAME] == 'ModuleButton')
+        module_button_nodes = MODULE_BUTTON.select(index, slot)
         if module_button_nodes:
             module = module_button_nodes[0]
-            slot_sprite = __filter_nodes(slot, lambda node: node[TYPE_NAME] == 'Sprite')
+            slot_sprite = SPRITE.select(index, slot)
 
             buttons.append(ModuleButton(
-                is_active=module[ENTRIES_OF_INTEREST].get('ramp_active', False),
-                is_busy=any([__get_text_from_dict_entries(sprite, NAME) == 'busy' for sprite in slot_sprite]),
-                display_region=module[TOTAL_DISPLAY_REGION]))
+                is_active=module.entries.get('ramp_active', False),
+                is_busy=any([sprite.name == 'busy' for sprite in slot_sprite]),
+                display_region=index.get_display_region(module)))
 
     return buttons
 
 
-def __get_last_value_from_gauge(gauge_name: str, ship_ui_node: dict) -> Optional[float]:
+def __get_last_value_from_gauge(index: UiNodeIndex, gauge: Selector, ship_ui_node: UiTreeNode) -> Optional[float]:
     """
     Get the percentage value from HP gauge. If the gauge element is not present, return None. If the HP is 0, the
     '_lastValue' node will not be present, so, return 0.
-    :param gauge_name: HP gauge name.
+    :param index: Node index of the UI tree.
+    :param gauge: Selector of the HP gauge, e.g. SHIELD_GAUGE.
     :param ship_ui_node: Ship UI node.
     :return: HP gauge percentage value. None if the gauge is not found.
     """
-    gauge_nodes = __filter_nodes(ship_ui_node, lambda node: __get_text_from_dict_entries(node, NAME) == gauge_name)
-    last_value = gauge_nodes[0][ENTRIES_OF_INTEREST].get('_lastValue', 0) if gauge_nodes else None
+    gauge_nodes = gauge.select(index, ship_ui_node)
+    last_value = gauge_nodes[0].entries.get('_lastValue', 0) if gauge_nodes else None
     return last_value * 100 if type(last_value) in [int, float] else None
 # Ship UI parsing functions end
 
 
 # Utility methods
-def __filter_nodes(ui_tree: dict, node_condition, parent_only: bool = True) -> list[dict]:
-    """
-    Collect the subtrees, which satisfies the node_condition, from the root ui_tree. By default, the function only
-    returns the parent subtrees, then stops searching their children. When parent_only is False, the function will
-    return the parent subtree, but keep searching their children.
-    :param ui_tree: Root of the UI tree or subtree to start the search.
-    :param node_condition: Conditions to collect the subtrees.
-    :param parent_only: Whether to stop the search at the parent subtree.
-    :return: List of subtrees.
-    """
-    nodes_to_check = [ui_tree]
-    results = []
-
-    # use iteration to avoid exceeding recursion limit.
-    while nodes_to_check:
-        node = nodes_to_check.pop(0)
-
-        if node_condition(node):
-            results.append(node)
-
-            if not parent_only:
-                nodes_to_check.extend(__get_children_with_display_region(node))
-        else:
-            nodes_to_check.extend(__get_children_with_display_region(node))
-
-    return results
-
-
-def __get_text_from_dict_entries(node: dict,  key: str) -> str:
-    return node[ENTRIES_OF_INTEREST].get(key, '')
-
-
-def __get_all_contained_text(root_node) -> list[(str, dict)]:
+def __get_all_contained_text(index: UiNodeIndex, root_node: UiTreeNode) -> list[(str, UiTreeNode)]:
     """
     Parse contained texts as a list from root_node and its children.
+    :param index: Node index of the UI tree.
     :param root_node: Root
     :return: List of (text, node) tuples.
     """
-    results = []
+    return [(node.text, node) for node in WITH_TEXT.select(index, root_node, parent_only=False)]
 
-    nodes_with_text = __filter_nodes(
-        root_node, lambda n: any(key in n[ENTRIES_OF_INTEREST] for key in ['_setText', '_text']), parent_only=False)
-    for node in nodes_with_text:
-        entries_of_interest = node[ENTRIES_OF_INTEREST]
-        text = max([entries_of_interest.get('_setText', ''), entries_of_interest.get('_text', '')], key=len)
-        results.append((text, node))
 
-    return results
-
-
-def __get_color_from_node(node: dict) -> Optional[ColorPercentages]:
-    color = node[ENTRIES_OF_INTEREST].get('_color', None)
+def __get_color_from_node(node: UiTreeNode) -> Optional[ColorPercentages]:
+    color = node.entries.get('_color', None)
     return ColorPercentages(
         a=color['aPercent'], r=color['rPercent'], g=color['gPercent'], b=color['bPercent']
     ) if type(color) is dict else None
-
-
-def __get_children_with_display_region(parent: dict) -> list:
-    parent_display_region = parent[TOTAL_DISPLAY_REGION]
-    children = parent.get(CHILDREN, None)
-    children_results = []
-
-    if children:
-        for child in children:
-            display_region = __get_display_region(child)
-            if display_region:
-                display_region.x += parent_display_region.x
-                display_region.y += parent_display_region.y
-                child[TOTAL_DISPLAY_REGION] = display_region
-
-                children_results.append(child)
-
-    return children_results
-
-
-def __get_display_region(node) -> Optional[DisplayRegion]:
-    entries_of_interest = node[ENTRIES_OF_INTEREST]
-    if all(key in entries_of_interest for key in ('_displayX', '_displayY', '_displayWidth', '_displayHeight')):
-        return DisplayRegion(
-            x=__get_json_int(entries_of_interest, '_displayX'),
-            y=__get_json_int(entries_of_interest, '_displayY'),
-            width=__get_json_int(entries_of_interest, '_displayWidth'),
-            height=__get_json_int(entries_of_interest, '_displayHeight')
-        )
-    else:
-        return None
-
-
-def __get_json_int(node, key) -> float:
-    value = node[key]
-    if isinstance(value, int) or isinstance(value, float):
-        return value
-    elif 'int_low32' in value:
-        return value['int_low32']
-    else:
-        return 0
@@ -26,3 +26,16 @@ def get_game_process_id(character_name: str) -> int:
         raise RuntimeError(f'Expecting exactly one game client PID for character {character_name}, found: {result}')
 
     return result[0]
+
+
+def get_process_start_time(pid: int) -> float:
+    """
+    Get the creation time of a process. Together with the PID, it identifies the process across PID reuse.
+    :param pid: Process ID.
+    :return: Creation time as a POSIX timestamp.
+    """
+    handle = win32api.OpenProcess(win32con.PROCESS_QUERY_INFORMATION, False, pid)
+    try:
+        return win32process.GetProcessTimes(handle)['CreationTime'].timestamp()
+    finally:
+        win32api.CloseHandle(handle)
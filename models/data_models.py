@@ -1,7 +1,15 @@
+import math
+import threading
+from bisect import bisect_right
 from dataclasses import dataclass, field
+from enum import Enum, IntFlag
+from typing import Callable, Iterable, Optional
 
+from models.spatial_index import SpatialIndex
+from models.state_history import StateHistory
 
-@dataclass
+
+@dataclass(slots=True)
 class ColorPercentages:
     a: float = 0
     r: float = 0
@@ -9,14 +17,14 @@ class ColorPercentages:
     b: float = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class HitPointPercentages:
     shield: float = 0
     armor: float = 0
     structure: float = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class DisplayRegion:
     x: float = None
     y: float = None
@@ -24,60 +32,143 @@ class DisplayRegion:
     height: float = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Drone:
     text: str = None
     hp_percentages: HitPointPercentages = field(default_factory=HitPointPercentages)
+    display_region: DisplayRegion = None
 
 
-@dataclass
+@dataclass(slots=True)
 class DroneList:
     in_bay: list[Drone] = field(default_factory=list)
     in_space: list[Drone] = field(default_factory=list)
 
 
-@dataclass
+class OverviewIndicator(IntFlag):
+    LOCKED_ME = 1 << 0
+    ATTACKING_ME = 1 << 1
+    TARGETING = 1 << 2
+    TARGETED = 1 << 3
+    IS_ACTIVE_TARGET = 1 << 4
+    NEUT = 1 << 5
+    TRACKING_DISRUPT = 1 << 6
+    JAM = 1 << 7
+    WARP_DISRUPT = 1 << 8
+    WEB = 1 << 9
+
+
+def _indicator_property(indicator: OverviewIndicator) -> property:
+    def get(self) -> bool:
+        return bool(self.flags & indicator)
+
+    def set(self, value: bool) -> None:
+        self.flags = self.flags | indicator if value else self.flags & ~indicator
+
+    return property(get, set)
+
+
 class OverviewEntryIndicators:
-    locked_me: bool = False
-    attacking_me: bool = False
-    targeting: bool = False
-    targeted: bool = False
-    is_active_target: bool = False
-    neut: bool = False
-    tracking_disrupt: bool = False
-    jam: bool = False
-    warp_disrupt: bool = False
-    web: bool = False
-
-
-@dataclass
+    """
+    Indicators of an overview entry, stored as OverviewIndicator bits in flags and read as booleans, e.g.
+    indicators.warp_disrupt. Created from flags, or from booleans like the former dataclass: locked_me=True.
+    """
+    __slots__ = ('flags',)
+
+    def __init__(self, flags: int = 0, **indicators: bool):
+        for name, value in indicators.items():
+            if value:
+                flags |= OverviewIndicator[name.upper()]
+        self.flags = int(flags)
+
+    def has(self, indicators: int) -> bool:
+        """
+        :param indicators: OverviewIndicator bits, e.g. OverviewIndicator.JAM | OverviewIndicator.WEB
+        :return: Whether all of them are set.
+        """
+        return self.flags & indicators == indicators
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, OverviewEntryIndicators):
+            return NotImplemented
+        return self.flags == other.flags
+
+    def __repr__(self) -> str:
+        return f'OverviewEntryIndicators({OverviewIndicator(self.flags)!r})'
+
+    locked_me = _indicator_property(OverviewIndicator.LOCKED_ME)
+    attacking_me = _indicator_property(OverviewIndicator.ATTACKING_ME)
+    targeting = _indicator_property(OverviewIndicator.TARGETING)
+    targeted = _indicator_property(OverviewIndicator.TARGETED)
+    is_active_target = _indicator_property(OverviewIndicator.IS_ACTIVE_TARGET)
+    neut = _indicator_property(OverviewIndicator.NEUT)
+    tracking_disrupt = _indicator_property(OverviewIndicator.TRACKING_DISRUPT)
+    jam = _indicator_property(OverviewIndicator.JAM)
+    warp_disrupt = _indicator_property(OverviewIndicator.WARP_DISRUPT)
+    web = _indicator_property(OverviewIndicator.WEB)
+
+
+@dataclass(slots=True)
 class OverviewEntry:
     info: dict = field(default_factory=dict)
     indicators: OverviewEntryIndicators = field(default_factory=OverviewEntryIndicators)
     icon_colors: ColorPercentages = field(default_factory=ColorPercentages)
     background_colors: ColorPercentages = field(default_factory=ColorPercentages)
+    # pythonObjectAddress of the entry, to follow it across frames.
+    address: str = None
+    # Distance in meters, velocity in m/s and angular velocity in rad/s. None if the column is not shown.
+    distance: float = None
+    velocity: float = None
+    angular_velocity: float = None
+    display_region: DisplayRegion = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatUserEntity:
     name: str = None
     standing: str = None
 
 
-@dataclass
+class ChatMemberChangeType(Enum):
+    JOINED = 'joined'
+    LEFT = 'left'
+    STANDING_CHANGED = 'standing_changed'
+
+
+@dataclass(slots=True)
+class ChatMemberChange:
+    type: ChatMemberChangeType = None
+    user: ChatUserEntity = None
+    # Standing before a STANDING_CHANGED.
+    previous_standing: str = None
+
+
+@dataclass(slots=True)
 class ChatWindow:
     name: str = None
     user_list: list[ChatUserEntity] = field(default_factory=list)
+    # Members by name, and member names by standing.
+    members: dict[str, ChatUserEntity] = field(default_factory=dict)
+    members_by_standing: dict[Optional[str], frozenset[str]] = field(default_factory=dict)
+    # Changes since the window was last parsed with the same parse cache. Without a cache, every member joins.
+    changes: list[ChatMemberChange] = field(default_factory=list)
 
+    def get_members_with_standing(self, standing: Optional[str]) -> frozenset[str]:
+        """
+        :param standing: Standing icon hint, e.g. Pilot is in your corporation. None for users without standing.
+        :return: Names of the members with this standing.
+        """
+        return self.members_by_standing.get(standing, frozenset())
 
-@dataclass
+
+@dataclass(slots=True)
 class ModuleButton:
     is_active: bool = False
     is_busy: bool = False
     display_region: DisplayRegion = field(default_factory=DisplayRegion)
 
 
-@dataclass
+@dataclass(slots=True)
 class ShipUI:
     capacitor_percentage: float = 0
     speed_text: str = None
@@ -85,10 +176,213 @@ class ShipUI:
     module_buttons: list[ModuleButton] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
+class UiNode:
+    """
+    UI tree node matched by a selector.
+    """
+    address: str = None
+    type_name: str = None
+    # dictEntriesOfInterest of the node, e.g. _name, _text or _hint.
+    entries: dict = field(default_factory=dict)
+    display_region: DisplayRegion = None
+
+    @property
+    def text(self) -> Optional[str]:
+        texts = [self.entries[key] for key in ('_setText', '_text') if isinstance(self.entries.get(key), str)]
+        return max(texts, key=len) if texts else None
+
+
+class DistanceOrder:
+    """
+    Overview entries sorted by distance, nearest first. Entries of unknown distance come last.
+    """
+    __slots__ = ('distances', 'entries')
+
+    def __init__(self, entries: Iterable[OverviewEntry]):
+        self.entries = sorted(entries, key=_get_sort_distance)
+        self.distances = [_get_sort_distance(entry) for entry in self.entries]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def within(self, max_distance: float = math.inf) -> list[OverviewEntry]:
+        """
+        :param max_distance: Maximum distance in meters. Entries of unknown distance only match without a maximum.
+        :return: Entries up to max_distance, nearest first.
+        """
+        return self.entries[:bisect_right(self.distances, max_distance)]
+
+
+def _get_sort_distance(entry: OverviewEntry) -> float:
+    return math.inf if entry.distance is None else entry.distance
+
+
+class OverviewIndex:
+    """
+    Overview entries sorted by distance, and grouped by type and by indicator, each group sorted by distance too. A query
+    walks the smallest group matching one of its criteria, from the nearest entry. Built once per frame, on first use of
+    UiTree.overview_index.
+    """
+    __slots__ = ('by_distance', 'by_type', 'by_indicator', 'by_address')
+
+    def __init__(self, entries: list[OverviewEntry]):
+        self.by_distance = DistanceOrder(entries)
+        types: dict[Optional[str], list[OverviewEntry]] = {}
+        indicators: dict[OverviewIndicator, list[OverviewEntry]] = {indicator: [] for indicator in OverviewIndicator}
+        for entry in self.by_distance.entries:
+            types.setdefault(entry.info.get('Type'), []).append(entry)
+            for indicator, indicator_entries in indicators.items():
+                if entry.indicators.flags & indicator:
+                    indicator_entries.append(entry)
+        # Groups are filled from the sorted entries, so they are sorted already.
+        self.by_type = {type_name: DistanceOrder(type_entries) for type_name, type_entries in types.items()}
+        self.by_indicator = {indicator: DistanceOrder(indicator_entries)
+                             for indicator, indicator_entries in indicators.items()}
+        self.by_address = {entry.address: entry for entry in entries if entry.address is not None}
+
+    def get(self, address: str) -> Optional[OverviewEntry]:
+        """
+        :param address: OverviewEntry.address, e.g. of an entry of a previous frame.
+        :return: Entry with this address in this frame, None if it left the overview.
+        """
+        return self.by_address.get(address)
+
+    def within(self, max_distance: float = math.inf, indicators: int = 0,
+               type_name: Optional[str] = None) -> list[OverviewEntry]:
+        """
+        Entries matching every criterion, e.g. within(20_000, OverviewIndicator.LOCKED_ME) for the hostiles within 20 km.
+        :param max_distance: Maximum distance in meters. Entries of unknown distance only match without a maximum.
+        :param indicators: OverviewIndicator bits the entries must all have.
+        :param type_name: Type column the entries must have.
+        :return: Matching entries, nearest first.
+        """
+        return [entry for entry in self.__get_smallest_group(indicators, type_name).within(max_distance)
+                if entry.indicators.flags & indicators == indicators
+                and (type_name is None or entry.info.get('Type') == type_name)]
+
+    def nearest(self, max_distance: float = math.inf, indicators: int = 0,
+                type_name: Optional[str] = None) -> Optional[OverviewEntry]:
+        """
+        :return: Nearest entry matching every criterion of within, None if no entry does.
+        """
+        for entry in self.__get_smallest_group(indicators, type_name).within(max_distance):
+            if entry.indicators.flags & indicators == indicators and \
+                    (type_name is None or entry.info.get('Type') == type_name):
+                return entry
+        return None
+
+    def __get_smallest_group(self, indicators: int, type_name: Optional[str]) -> DistanceOrder:
+        groups = [self.by_indicator[indicator] for indicator in OverviewIndicator if indicators & indicator]
+        if type_name is not None:
+            groups.append(self.by_type.get(type_name) or DistanceOrder([]))
+        return min(groups, key=len) if groups else self.by_distance
+
+
+@dataclass(slots=True)
 class UiTree:
     root_address: int = None
     chat_windows: list[ChatWindow] = field(default_factory=list)
     overview: list[OverviewEntry] = field(default_factory=list)
     drones: DroneList = field(default_factory=DroneList)
     ship_ui: ShipUI = None
+    # UiTree attributes that differ from the previous frame. Every attribute, unless parsed incrementally.
+    changed_sections: set[str] = field(default_factory=set)
+    # UiTree attributes compared with the previous frame for changed_sections. None for all of them.
+    compared_sections: Optional[set[str]] = None
+    # Nodes matched by the selectors registered by bots, by selector name.
+    selections: dict[str, list[UiNode]] = field(default_factory=dict)
+    # History of the client up to this frame, e.g. history.rate(SHIELD, 10). Set by the client before the bots run.
+    history: Optional[StateHistory] = field(default=None, repr=False, compare=False)
+    # Overview the index was built from, and the index.
+    _overview_index: tuple = field(default=None, init=False, repr=False, compare=False)
+    # Sections the spatial index was built from, and the index.
+    _spatial_index: tuple = field(default=None, init=False, repr=False, compare=False)
+
+    def is_parsed(self, section: str) -> bool:
+        return True
+
+    @property
+    def overview_index(self) -> OverviewIndex:
+        """
+        Index of the overview, built on first use.
+        """
+        overview = self.overview
+        if self._overview_index is None or self._overview_index[0] is not overview:
+            self._overview_index = (overview, OverviewIndex(overview))
+        return self._overview_index[1]
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """
+        Spatial index of the elements with a display region: overview entries, drones and module buttons, e.g.
+        spatial_index.at(x, y) for the element at a point. Built on first use, from the overview, drones and ship_ui.
+        """
+        sections = (self.overview, self.drones, self.ship_ui)
+        if self._spatial_index is None or any(
+                section is not indexed_section for section, indexed_section in zip(sections, self._spatial_index[0])):
+            spatial_index = SpatialIndex()
+            (overview, drones, ship_ui) = sections
+            for element in [*overview, *drones.in_bay, *drones.in_space, *(ship_ui.module_buttons if ship_ui else [])]:
+                region = element.display_region
+                if region and region.x is not None:
+                    spatial_index.add(element, region.x, region.y, region.width, region.height)
+            self._spatial_index = (sections, spatial_index)
+        return self._spatial_index[1]
+
+
+LAZY_SECTIONS = ('chat_windows', 'overview', 'drones', 'ship_ui')
+
+
+class LazyUiTree(UiTree):
+    """
+    UiTree parsing each section (chat_windows, overview, drones, ship_ui) on first access. The attribute API is the same
+    as UiTree. used_sections records the sections accessed so far. A section whose parse fails raises on each access,
+    and is parsed again every time.
+    """
+    def __init__(self, root_address: int, section_parsers: dict[str, Callable], changed_sections: set[str],
+                 selections: Optional[dict[str, list[UiNode]]] = None, compared_sections: Optional[set[str]] = None):
+        self.root_address = root_address
+        self.changed_sections = changed_sections
+        self.compared_sections = compared_sections
+        self.selections = selections or {}
+        self.used_sections = set()
+        self.history = None
+        self._overview_index = None
+        self._spatial_index = None
+        self.__section_parsers = section_parsers
+        self.__sections = {}
+        self.__lock = threading.Lock()
+
+    def is_parsed(self, section: str) -> bool:
+        return section in self.__sections
+
+    def _get_section(self, section: str):
+        self.used_sections.add(section)
+        if section not in self.__sections:
+            with self.__lock:
+                if section not in self.__sections:
+                    # The parser is only dropped once it succeeded, so a failed parse raises its own error again.
+                    self.__sections[section] = self.__section_parsers[section]()
+                    del self.__section_parsers[section]
+        return self.__sections[section]
+
+    def _set_section(self, section: str, value) -> None:
+        self.__sections[section] = value
+        self.__section_parsers.pop(section, None)
+
+    def __repr__(self) -> str:
+        # Unparsed sections are not parsed for a log line.
+        sections = ', '.join(f'{section}={self.__sections[section]!r}' if section in self.__sections
+                             else f'{section}=<not parsed>' for section in LAZY_SECTIONS)
+        return f'LazyUiTree(root_address={self.root_address!r}, {sections}, ' \
+               f'changed_sections={self.changed_sections!r}, selections={self.selections!r})'
+
+    chat_windows = property(lambda self: self._get_section('chat_windows'),
+                            lambda self, value: self._set_section('chat_windows', value))
+    overview = property(lambda self: self._get_section('overview'),
+                        lambda self, value: self._set_section('overview', value))
+    drones = property(lambda self: self._get_section('drones'),
+                      lambda self, value: self._set_section('drones', value))
+    ship_ui = property(lambda self: self._get_section('ship_ui'),
+                       lambda self, value: self._set_section('ship_ui', value))
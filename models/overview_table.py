@@ -0,0 +1,75 @@
+import math
+from array import array
+from typing import Iterable, Optional
+
+from models.data_models import OverviewEntry, ColorPercentages
+
+COLOR_CHANNELS = 4
+
+
+class OverviewTable:
+    """
+    Columnar copy of the overview: one array per column, a row per entry in overview order. Bots filter and sort rows on
+    the arrays, and get back to the entries by row number. Distances are in meters, NaN when unknown. Colors are
+    flattened ARGB quadruples, NaN when unknown.
+    """
+    __slots__ = ('entries', 'addresses', 'names', 'types', 'distances', 'indicator_flags', 'icon_colors',
+                 'background_colors')
+
+    def __init__(self, entries: list[OverviewEntry]):
+        self.entries = entries
+        self.addresses: list[Optional[str]] = [entry.address for entry in entries]
+        self.names: list[Optional[str]] = [entry.info.get('Name') for entry in entries]
+        self.types: list[Optional[str]] = [entry.info.get('Type') for entry in entries]
+        self.distances = array('d', [math.nan if entry.distance is None else entry.distance for entry in entries])
+        self.indicator_flags = array('Q', [entry.indicators.flags for entry in entries])
+        self.icon_colors = _get_color_column([entry.icon_colors for entry in entries])
+        self.background_colors = _get_color_column([entry.background_colors for entry in entries])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def select(self, indicators: int = 0, max_distance: float = math.inf, type_name: Optional[str] = None) -> list[int]:
+        """
+        :param indicators: OverviewIndicator bits the rows must all have, e.g. OverviewIndicator.WARP_DISRUPT
+        :param max_distance: Maximum distance in meters. Rows of unknown distance only match without a maximum.
+        :param type_name: Type the rows must have.
+        :return: Matching row numbers, in overview order.
+        """
+        distances = self.distances
+        flags = self.indicator_flags
+        types = self.types
+        return [row for row in range(len(distances))
+                if flags[row] & indicators == indicators
+                and (distances[row] <= max_distance or max_distance == math.inf)
+                and (type_name is None or types[row] == type_name)]
+
+    def sort_by_distance(self, rows: Optional[Iterable[int]] = None) -> list[int]:
+        """
+        :param rows: Row numbers to sort, e.g. selected ones. Every row if None.
+        :return: Row numbers, nearest first. Rows of unknown distance come last.
+        """
+        distances = self.distances
+        rows = range(len(distances)) if rows is None else rows
+        return sorted(rows, key=lambda row: (math.isnan(distances[row]), distances[row]))
+
+    def get_entries(self, rows: Iterable[int]) -> list[OverviewEntry]:
+        return [self.entries[row] for row in rows]
+
+    def get_icon_color(self, row: int) -> Optional[ColorPercentages]:
+        return _get_color(self.icon_colors, row)
+
+    def get_background_color(self, row: int) -> Optional[ColorPercentages]:
+        return _get_color(self.background_colors, row)
+
+
+def _get_color_column(colors: list[Optional[ColorPercentages]]) -> array:
+    column = array('f')
+    for color in colors:
+        column.extend((color.a, color.r, color.g, color.b) if color else (math.nan,) * COLOR_CHANNELS)
+    return column
+
+
+def _get_color(column: array, row: int) -> Optional[ColorPercentages]:
+    (a, r, g, b) = column[row * COLOR_CHANNELS:(row + 1) * COLOR_CHANNELS]
+    return None if math.isnan(a) else ColorPercentages(a, r, g, b)
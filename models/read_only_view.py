@@ -0,0 +1,76 @@
+import dataclasses
+import functools
+from enum import Enum
+from types import MappingProxyType
+from typing import Any, Callable
+
+
+class ReadOnlyView:
+    """
+    Read-only view of a model object, e.g. a UiTree shared by bots running concurrently. Attributes are read from the
+    model object, wrapped in turn: lists become tuples, dicts become mapping proxies and nested models become views.
+    Setting an attribute raises an AttributeError. Wrapped attributes are cached, so reading one twice is cheap.
+
+    A view passes for its model object in isinstance checks, and compares and hashes like it.
+    """
+    __slots__ = ('_target', '_attributes')
+
+    def __init__(self, target: Any):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_attributes', {})
+
+    @property
+    def __class__(self):
+        return type(object.__getattribute__(self, '_target'))
+
+    def __getattr__(self, name: str):
+        attributes = object.__getattribute__(self, '_attributes')
+        if name not in attributes:
+            attribute = getattr(object.__getattribute__(self, '_target'), name)
+            # Methods, like OverviewIndex.within, are bound to the model object. Their results are wrapped.
+            attributes[name] = _read_only_results(attribute) if callable(attribute) else read_only(attribute)
+        return attributes[name]
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f'{type(self._target).__name__} is read-only')
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f'{type(self._target).__name__} is read-only')
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ReadOnlyView):
+            other = other._target
+        return self._target == other
+
+    def __hash__(self) -> int:
+        # Unhashable like the model object, e.g. a mutable dataclass.
+        return hash(self._target)
+
+    def __repr__(self) -> str:
+        return f'ReadOnlyView({self._target!r})'
+
+
+def read_only(value: Any) -> Any:
+    """
+    Wrap value for read-only access. Immutable values, like enum members, and views are returned as they are.
+    """
+    if value is None or isinstance(value, (str, int, float, complex, bool, bytes, frozenset, range, Enum, type,
+                                           ReadOnlyView)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(read_only(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    if isinstance(value, dict):
+        return MappingProxyType({key: read_only(item) for key, item in value.items()})
+    if dataclasses.is_dataclass(value) or hasattr(value, '__dict__') or hasattr(value, '__slots__'):
+        return ReadOnlyView(value)
+    return value
+
+
+def _read_only_results(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def read_only_method(*args, **kwargs):
+        return read_only(method(*args, **kwargs))
+
+    return read_only_method
@@ -0,0 +1,66 @@
+from typing import Any
+
+# Width and height of the grid cells, in pixels.
+CELL_SIZE = 64
+
+
+class SpatialIndex:
+    """
+    Grid over the display regions of UI elements, for hit-testing. Each element is listed in the cells its region
+    overlaps, so a point query only checks the elements of one cell. Regions are kept in flat lists by element number.
+    """
+    __slots__ = ('cell_size', 'elements', 'xs', 'ys', 'widths', 'heights', 'cells')
+
+    def __init__(self, cell_size: int = CELL_SIZE):
+        self.cell_size = cell_size
+        self.elements: list = []
+        self.xs: list[float] = []
+        self.ys: list[float] = []
+        self.widths: list[float] = []
+        self.heights: list[float] = []
+        self.cells: dict[tuple[int, int], list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def add(self, element: Any, x: float, y: float, width: float, height: float) -> None:
+        number = len(self.elements)
+        self.elements.append(element)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.widths.append(width)
+        self.heights.append(height)
+        for cell in self.__get_cells(x, y, width, height):
+            self.cells.setdefault(cell, []).append(number)
+
+    def at(self, x: float, y: float) -> list:
+        """
+        :param x: Absolute x, in pixels.
+        :param y: Absolute y, in pixels.
+        :return: Elements whose region contains the point, smallest region first: the innermost element comes first.
+        """
+        numbers = [number for number in self.cells.get((int(x // self.cell_size), int(y // self.cell_size)), [])
+                   if self.xs[number] <= x < self.xs[number] + self.widths[number]
+                   and self.ys[number] <= y < self.ys[number] + self.heights[number]]
+        numbers.sort(key=lambda number: self.widths[number] * self.heights[number])
+        return [self.elements[number] for number in numbers]
+
+    def within(self, x: float, y: float, width: float, height: float) -> list:
+        """
+        :return: Elements whose region is inside the rectangle, in the order they were added.
+        """
+        numbers = set()
+        for cell in self.__get_cells(x, y, width, height):
+            numbers.update(number for number in self.cells.get(cell, [])
+                           if x <= self.xs[number] and self.xs[number] + self.widths[number] <= x + width
+                           and y <= self.ys[number] and self.ys[number] + self.heights[number] <= y + height)
+        return [self.elements[number] for number in sorted(numbers)]
+
+    def __get_cells(self, x: float, y: float, width: float, height: float):
+        cell_size = self.cell_size
+        # An empty region still covers the cell of its corner.
+        last_x = max(x, x + width - 1)
+        last_y = max(y, y + height - 1)
+        for cell_x in range(int(x // cell_size), int(last_x // cell_size) + 1):
+            for cell_y in range(int(y // cell_size), int(last_y // cell_size) + 1):
+                yield cell_x, cell_y
@@ -0,0 +1,302 @@
+import threading
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Optional
+
+# Samples kept per metric: 17 minutes at one tick per second.
+HISTORY_CAPACITY = 1024
+# Rolling windows kept up to date per metric. Queries over more window lengths scan the samples instead.
+MAX_WINDOWS = 8
+SHIELD = 'shield'
+ARMOR = 'armor'
+STRUCTURE = 'structure'
+CAPACITOR = 'capacitor'
+# Mean hit points of the drones in space.
+DRONE_SHIELD = 'drone_shield'
+DRONE_ARMOR = 'drone_armor'
+DRONE_STRUCTURE = 'drone_structure'
+DRONES_IN_SPACE = 'drones_in_space'
+OVERVIEW_ENTRIES = 'overview_entries'
+# UiTree section each metric is read from. Overview entry counts by indicator are overview metrics too.
+METRIC_SECTIONS = {
+    SHIELD: 'ship_ui',
+    ARMOR: 'ship_ui',
+    STRUCTURE: 'ship_ui',
+    CAPACITOR: 'ship_ui',
+    DRONE_SHIELD: 'drones',
+    DRONE_ARMOR: 'drones',
+    DRONE_STRUCTURE: 'drones',
+    DRONES_IN_SPACE: 'drones',
+    OVERVIEW_ENTRIES: 'overview'
+}
+INDICATOR_METRIC_PREFIX = 'overview_'
+
+
+class MetricSeries:
+    """
+    Ring buffer of the last capacity samples of a metric: sample times (seconds) and values in two arrays of doubles.
+    Sample n, counted from the first one, is at n % capacity. Queries cover the samples of the last seconds up to the
+    last sample. Each window length queried gets a rolling window, kept up to date on every append: a query over it
+    costs O(1), an append O(1) amortized per window.
+    """
+    __slots__ = ('name', 'capacity', 'times', 'values', 'count', 'windows')
+
+    def __init__(self, name: str, capacity: int = HISTORY_CAPACITY):
+        self.name = name
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.count = 0
+        self.windows: dict[float, RollingWindow] = {}
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    @property
+    def first_sample(self) -> int:
+        return max(0, self.count - self.capacity)
+
+    @property
+    def last_time(self) -> Optional[float]:
+        return self.times[(self.count - 1) % self.capacity] if self.count else None
+
+    @property
+    def last(self) -> Optional[float]:
+        return self.values[(self.count - 1) % self.capacity] if self.count else None
+
+    def get_time(self, sample: int) -> float:
+        return self.times[sample % self.capacity]
+
+    def get_value(self, sample: int) -> float:
+        return self.values[sample % self.capacity]
+
+    def append(self, time: float, value: float) -> None:
+        """
+        :param time: Sample time in seconds, not before the last sample.
+        :param value: Sample value.
+        """
+        position = self.count % self.capacity
+        self.times[position] = time
+        self.values[position] = value
+        self.count += 1
+        for window in self.windows.values():
+            window.push(self)
+
+    def rate(self, seconds: float) -> Optional[float]:
+        """
+        :return: Change per second between the first and the last sample of the last seconds, e.g. negative while taking
+            damage. None with less than two samples, or no time between them.
+        """
+        if self.count == 0:
+            return None
+        first_sample = self.__get_window_start(seconds)
+        elapsed = self.last_time - self.get_time(first_sample)
+        return (self.last - self.get_value(first_sample)) / elapsed if elapsed > 0 else None
+
+    def min(self, seconds: float) -> Optional[float]:
+        """
+        :return: Lowest value of the last seconds. None without samples.
+        """
+        if self.count == 0:
+            return None
+        window = self.__get_window(seconds)
+        if window:
+            return self.get_value(window.mins[0])
+        return min(self.get_value(sample) for sample in range(self.__get_window_start(seconds), self.count))
+
+    def max(self, seconds: float) -> Optional[float]:
+        """
+        :return: Highest value of the last seconds. None without samples.
+        """
+        if self.count == 0:
+            return None
+        window = self.__get_window(seconds)
+        if window:
+            return self.get_value(window.maxs[0])
+        return max(self.get_value(sample) for sample in range(self.__get_window_start(seconds), self.count))
+
+    def samples(self, seconds: float) -> list[tuple[float, float]]:
+        """
+        :return: (time, value) of the samples of the last seconds, oldest first.
+        """
+        if self.count == 0:
+            return []
+        return [(self.get_time(sample), self.get_value(sample))
+                for sample in range(self.__get_window_start(seconds), self.count)]
+
+    def __get_window(self, seconds: float) -> Optional['RollingWindow']:
+        window = self.windows.get(seconds)
+        if window is None and len(self.windows) < MAX_WINDOWS:
+            window = RollingWindow(seconds)
+            for sample in range(self.first_sample, self.count):
+                window.push(self, sample)
+            self.windows[seconds] = window
+        return window
+
+    def __get_window_start(self, seconds: float) -> int:
+        window = self.__get_window(seconds)
+        if window:
+            return window.start
+        # Sample times never decrease, so the samples held are sorted by time from the first one.
+        first_sample = self.first_sample
+        start_time = self.last_time - seconds
+        return first_sample + bisect_left(range(first_sample, self.count), start_time, key=self.get_time)
+
+
+class RollingWindow:
+    """
+    Samples of the last seconds of a MetricSeries: the first of them, and monotonic queues of the samples that are
+    still candidates for the minimum and the maximum. The queue fronts are the minimum and the maximum of the window.
+    """
+    __slots__ = ('seconds', 'start', 'mins', 'maxs')
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.start = 0
+        self.mins: deque[int] = deque()
+        self.maxs: deque[int] = deque()
+
+    def push(self, series: MetricSeries, sample: Optional[int] = None) -> None:
+        """
+        Add a sample to the window, and drop the samples older than seconds before it or overwritten in the series.
+        :param series: Series of the window.
+        :param sample: Sample to add. The last one of the series by default.
+        """
+        sample = series.count - 1 if sample is None else sample
+        value = series.get_value(sample)
+        mins = self.mins
+        maxs = self.maxs
+        while mins and series.get_value(mins[-1]) >= value:
+            mins.pop()
+        mins.append(sample)
+        while maxs and series.get_value(maxs[-1]) <= value:
+            maxs.pop()
+        maxs.append(sample)
+
+        start = max(self.start, series.first_sample)
+        start_time = series.get_time(sample) - self.seconds
+        while series.get_time(start) < start_time:
+            start += 1
+        self.start = start
+        while mins[0] < start:
+            mins.popleft()
+        while maxs[0] < start:
+            maxs.popleft()
+
+
+class StateHistory:
+    """
+    History of the ship and overview state of one client, filled every tick: a MetricSeries of fixed capacity per
+    metric, and the time each overview indicator appeared. Shared by the bots of the client, so every method locks.
+
+    Metrics are read from their UiTree section (METRIC_SECTIONS). With lazy parsing, only the sections the bots used or
+    queried the history of are read: a metric queried for the first time has samples from the next tick on.
+    """
+    def __init__(self, capacity: int = HISTORY_CAPACITY):
+        self.capacity = capacity
+        self.series: dict[str, MetricSeries] = {}
+        # Time the overview indicator bits set on the last record appeared, by bit.
+        self.indicator_times: dict[int, float] = {}
+        self.last_indicator_time: Optional[float] = None
+        # Sections of the metrics queried so far.
+        self.used_sections: set[str] = set()
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # Copied to the bots running in a worker process, without the lock.
+        with self.lock:
+            return {key: value for key, value in self.__dict__.items() if key != 'lock'}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def append(self, metric: str, time: float, value: float) -> None:
+        with self.lock:
+            if metric not in self.series:
+                self.series[metric] = MetricSeries(metric, self.capacity)
+            self.series[metric].append(time, value)
+
+    def record_indicators(self, time: float, flags: int) -> None:
+        """
+        :param time: Time of the overview.
+        :param flags: OverviewIndicator bits set on any overview entry.
+        """
+        with self.lock:
+            indicator_times = {}
+            while flags:
+                bit = flags & -flags
+                indicator_times[bit] = self.indicator_times.get(bit, time)
+                flags &= ~bit
+            self.indicator_times = indicator_times
+            self.last_indicator_time = time
+
+    def get(self, metric: str) -> Optional[MetricSeries]:
+        """
+        :param metric: Metric name, e.g. SHIELD, or get_indicator_metric(OverviewIndicator.ATTACKING_ME).
+        :return: Series of the metric, None without samples.
+        """
+        with self.lock:
+            self.__use(metric)
+            return self.series.get(metric)
+
+    def last(self, metric: str) -> Optional[float]:
+        with self.lock:
+            self.__use(metric)
+            return self.series[metric].last if metric in self.series else None
+
+    def rate(self, metric: str, seconds: float) -> Optional[float]:
+        """
+        :return: Change per second of the metric over the last seconds, e.g. rate(SHIELD, 10) < -2 while the shield
+            loses more than 2% per second. None with less than two samples.
+        """
+        with self.lock:
+            self.__use(metric)
+            return self.series[metric].rate(seconds) if metric in self.series else None
+
+    def min(self, metric: str, seconds: float) -> Optional[float]:
+        with self.lock:
+            self.__use(metric)
+            return self.series[metric].min(seconds) if metric in self.series else None
+
+    def max(self, metric: str, seconds: float) -> Optional[float]:
+        with self.lock:
+            self.__use(metric)
+            return self.series[metric].max(seconds) if metric in self.series else None
+
+    def time_since_first(self, indicators: int) -> Optional[float]:
+        """
+        :param indicators: OverviewIndicator bits, e.g. OverviewIndicator.WARP_DISRUPT
+        :return: Seconds from the time all of them were last shown on the overview, without a break, to the last record.
+            None unless all of them are shown on the last record.
+        """
+        with self.lock:
+            self.used_sections.add('overview')
+            times = []
+            while indicators:
+                bit = indicators & -indicators
+                if bit not in self.indicator_times:
+                    return None
+                times.append(self.indicator_times[bit])
+                indicators &= ~bit
+            return self.last_indicator_time - max(times) if times else None
+
+    def __use(self, metric: str) -> None:
+        section = get_metric_section(metric)
+        if section:
+            self.used_sections.add(section)
+
+
+def get_indicator_metric(indicator) -> str:
+    """
+    :param indicator: Single OverviewIndicator, e.g. OverviewIndicator.ATTACKING_ME
+    :return: Name of the metric counting the overview entries with it, e.g. overview_attacking_me.
+    """
+    return INDICATOR_METRIC_PREFIX + indicator.name.lower()
+
+
+def get_metric_section(metric: str) -> Optional[str]:
+    if metric.startswith(INDICATOR_METRIC_PREFIX):
+        return 'overview'
+    return METRIC_SECTIONS.get(metric)
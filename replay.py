@@ -0,0 +1,41 @@
+"""
+Replay a recorded session through the parser and the bots of a client profile, as fast as possible or at the recorded
+timing. Sessions are recorded with python bot.py -c <client_profile> --record:
+
+python replay.py tmp/session-client_profile-1700000000.frames -c client_profile
+"""
+import argparse
+import logging
+import os
+import sys
+
+from lib.profile_loader import read_profile, initialize_bots
+from lib.replay import replay_session
+
+# Configure logging root
+logging.basicConfig(format='%(asctime)s %(levelname)-8s %(message)s')
+
+logger = logging.getLogger('replay')
+
+
+def __get_command_arguments() -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser()
+
+    arg_parser.add_argument('session_files', help='Recorded session files, replayed one after the other', nargs='+')
+    arg_parser.add_argument('-c', help='Client profile file name, for the bots to run', required=True)
+    arg_parser.add_argument('--realtime', help='Replay at the recorded timing', action='store_true')
+
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    # Set working directory to current file dir
+    os.chdir(sys.path[0])
+
+    args = __get_command_arguments()
+    profile = read_profile(args.c)
+    for session_file in args.session_files:
+        # Fresh bots for every session, so no state leaks from one session to the next.
+        bots = initialize_bots(profile)
+        result = replay_session(session_file, bots, args.realtime, lazy=True)
+        logger.info(f'{session_file}: {result.report()}')
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+from lib.memory_reader import PipeMemoryReader
+from tests.frames import get_frame
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def frame_files(tmp_path):
+    frame_files = []
+    for root_address in ('100', '200'):
+        frame_file = tmp_path / f'frame-{root_address}.json'
+        frame_file.write_text(get_frame(root_address))
+        frame_files.append(frame_file)
+    return frame_files
+
+
+@pytest.fixture
+def create_pipe_reader(tmp_path, monkeypatch):
+    # The fake reader is started as a module of this repository.
+    monkeypatch.setenv('PYTHONPATH', ROOT_DIR)
+    readers = []
+
+    def create(frame_files: list, *options: str, ring: bool = True) -> PipeMemoryReader:
+        command = [sys.executable, '-m', 'lib.fake_memory_reader', *map(str, frame_files), *options]
+        reader = PipeMemoryReader(command, str(tmp_path / 'frames.ring') if ring else None)
+        readers.append(reader)
+        return reader
+
+    yield create
+    for reader in readers:
+        reader.close()
@@ -0,0 +1,9 @@
+import json
+
+
+def get_frame(root_address: str) -> str:
+    """
+    :return: Memory read JSON of a UI root without children.
+    """
+    return json.dumps({'pythonObjectAddress': root_address, 'pythonObjectTypeName': 'UIRoot',
+                       'dictEntriesOfInterest': {}, 'children': []})
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+import lib.bot_reloader as bot_reloader
+import lib.profile_loader as profile_loader
+from lib.bot_reloader import BotReloader, PluginModules
+from plugins.bots.dummy_bot import DummyBot
+
+PROFILE_NAME = 'test_profile'
+
+
+def write_profile(text: str, modification_time: float) -> None:
+    profile_path = f'plugins/profiles/{PROFILE_NAME}.json'
+    with open(profile_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.utime(profile_path, (modification_time, modification_time))
+
+
+def get_profile_text(bot_config: dict) -> str:
+    return json.dumps({'Bots': {'dummy_bot.DummyBot': bot_config}})
+
+
+@pytest.fixture
+def reloader(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('plugins/profiles')
+    write_profile(get_profile_text({}), 1000)
+    reloader = BotReloader(PROFILE_NAME, PluginModules(), check_interval=0)
+    reloader.load()
+    return reloader
+
+
+def test_changed_profile_reloads_the_bot(reloader):
+    (bot,) = reloader.bots
+
+    write_profile(get_profile_text({'range': 1}), 1001)
+    (reloaded_bot,) = reloader.poll()
+
+    assert isinstance(reloaded_bot, DummyBot) and reloaded_bot is not bot
+    assert reloaded_bot.config == {'range': 1}
+    assert reloader.poll() is None
+
+
+def test_unchanged_profile_keeps_the_bot(reloader):
+    (bot,) = reloader.bots
+    write_profile(get_profile_text({}), 1001)
+
+    assert reloader.poll() is None
+    assert reloader.bots == [bot]
+
+
+def test_invalid_profile_is_read_again(reloader):
+    (bot,) = reloader.bots
+    write_profile(get_profile_text({'range': 1})[:-5], 1001)
+
+    assert reloader.poll() is None
+    assert reloader.bots == [bot]
+    assert reloader.poll() is None
+
+    # Fixed within the resolution of the modification time.
+    write_profile(get_profile_text({'range': 1}), 1001)
+    (reloaded_bot,) = reloader.poll()
+
+    assert reloaded_bot.config == {'range': 1}
+    assert reloader.profile_version == 1001
+
+
+def test_profile_failing_to_open_is_read_again(reloader, monkeypatch):
+    write_profile(get_profile_text({'range': 1}), 1001)
+    failures = [PermissionError('Locked by the editor')]
+
+    def read_profile(profile_name):
+        if failures:
+            raise failures.pop()
+        return profile_loader.read_profile(profile_name)
+
+    monkeypatch.setattr(bot_reloader, 'read_profile', read_profile)
+
+    assert reloader.poll() is None
+    assert reloader.profile_version == 1000
+    (reloaded_bot,) = reloader.poll()
+    assert reloaded_bot.config == {'range': 1}
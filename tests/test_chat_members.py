@@ -0,0 +1,153 @@
+import io
+import json
+from collections import defaultdict
+
+import pytest
+
+from lib.ui_node_index import ADDRESS, CHILDREN, ENTRIES_OF_INTEREST, TYPE_NAME
+from lib.user_interface_parser import ParsedWindowCache, parse_memory_read
+from models.data_models import ChatMemberChangeType, ChatWindow
+
+JOINED = ChatMemberChangeType.JOINED
+LEFT = ChatMemberChangeType.LEFT
+STANDING_CHANGED = ChatMemberChangeType.STANDING_CHANGED
+GOOD = 'Pilot has good standing'
+BAD = 'Pilot has bad standing'
+
+
+def node(address: str, type_name: str, children: list = None, **entries) -> dict:
+    return {ADDRESS: address, TYPE_NAME: type_name,
+            ENTRIES_OF_INTEREST: {'_displayX': 0, '_displayY': 0, '_displayWidth': 100, '_displayHeight': 20, **entries},
+            CHILDREN: children or []}
+
+
+def chat_frame(users: list[tuple[str, str, str | None]]) -> str:
+    """
+    :param users: Address of the user entry, user name and standing hint of each entry of the local chat.
+    :return: Memory read JSON of a UI root with the local chat window.
+    """
+    user_entries = []
+    for (address, name, standing) in users:
+        children = [node(f'{address}1', 'EveLabelMedium', _text=name)]
+        if standing:
+            children.append(node(f'{address}2', 'FlagIconWithState', _hint=standing))
+        user_entries.append(node(address, 'XmppChatUserEntry', children))
+
+    user_list = node('40', 'Container', [node('41', 'BasicDynamicScroll', user_entries)], _name='userlist')
+    chat_window = node('30', 'XmppChatWindow', [user_list], _name='chatchannel_local')
+    return json.dumps(node('10', 'UIRoot', [node('20', 'ChatWindowStack', [chat_window])]))
+
+
+def get_changes(chat_window: ChatWindow) -> set[tuple]:
+    return {(change.type, change.user.name, change.user.standing, change.previous_standing)
+            for change in chat_window.changes}
+
+
+def assert_members(chat_window: ChatWindow, members: dict[str, str | None]):
+    assert {name: user.standing for name, user in chat_window.members.items()} == members
+    members_by_standing = defaultdict(set)
+    for name, standing in members.items():
+        members_by_standing[standing].add(name)
+    assert chat_window.members_by_standing == members_by_standing
+
+
+@pytest.fixture
+def parse_chat():
+    window_cache = ParsedWindowCache()
+
+    def parse_chat(users: list[tuple[str, str, str | None]]) -> ChatWindow:
+        (chat_window,) = parse_memory_read(io.StringIO(chat_frame(users)), window_cache).chat_windows
+        return chat_window
+
+    return parse_chat
+
+
+def test_every_member_joins_the_first_frame(parse_chat):
+    chat_window = parse_chat([('100', 'Alice', GOOD), ('200', 'Bob', None)])
+
+    assert get_changes(chat_window) == {(JOINED, 'Alice', GOOD, None), (JOINED, 'Bob', None, None)}
+    assert_members(chat_window, {'Alice': GOOD, 'Bob': None})
+
+
+def test_member_joins_and_leaves(parse_chat):
+    parse_chat([('100', 'Alice', GOOD), ('200', 'Bob', None)])
+
+    chat_window = parse_chat([('100', 'Alice', GOOD), ('300', 'Carol', BAD)])
+
+    assert get_changes(chat_window) == {(JOINED, 'Carol', BAD, None), (LEFT, 'Bob', None, None)}
+    assert_members(chat_window, {'Alice': GOOD, 'Carol': BAD})
+    assert [user.name for user in chat_window.user_list] == ['Alice', 'Carol']
+
+
+def test_member_changes_standing(parse_chat):
+    parse_chat([('100', 'Alice', GOOD), ('200', 'Bob', None)])
+
+    chat_window = parse_chat([('100', 'Alice', BAD), ('200', 'Bob', None)])
+
+    assert get_changes(chat_window) == {(STANDING_CHANGED, 'Alice', BAD, GOOD)}
+    assert_members(chat_window, {'Alice': BAD, 'Bob': None})
+
+
+def test_member_leaves_and_rejoins(parse_chat):
+    parse_chat([('100', 'Alice', GOOD), ('200', 'Bob', None)])
+
+    chat_window = parse_chat([('200', 'Bob', None)])
+    assert get_changes(chat_window) == {(LEFT, 'Alice', GOOD, None)}
+    assert_members(chat_window, {'Bob': None})
+
+    chat_window = parse_chat([('300', 'Alice', BAD), ('200', 'Bob', None)])
+    assert get_changes(chat_window) == {(JOINED, 'Alice', BAD, None)}
+    assert_members(chat_window, {'Alice': BAD, 'Bob': None})
+
+
+def test_scrolled_entries_change_no_member(parse_chat):
+    parse_chat([('100', 'Alice', GOOD), ('200', 'Bob', None)])
+
+    # The list reuses the entries for other users when scrolled: entries are matched by their content.
+    chat_window = parse_chat([('100', 'Bob', None), ('200', 'Alice', GOOD)])
+
+    assert get_changes(chat_window) == set()
+    assert_members(chat_window, {'Alice': GOOD, 'Bob': None})
+
+
+def test_member_moved_to_another_entry_changes_standing(parse_chat):
+    parse_chat([('100', 'Alice', GOOD), ('200', 'Bob', None)])
+
+    chat_window = parse_chat([('300', 'Alice', None), ('200', 'Bob', None)])
+
+    assert get_changes(chat_window) == {(STANDING_CHANGED, 'Alice', None, GOOD)}
+    assert_members(chat_window, {'Alice': None, 'Bob': None})
+
+
+@pytest.mark.parametrize('kept_entry', [0, 1])
+def test_member_listed_twice_leaves_with_the_last_entry(parse_chat, kept_entry):
+    users = [('100', 'Alice', GOOD), ('200', 'Alice', GOOD)]
+    parse_chat(users)
+
+    chat_window = parse_chat([users[kept_entry]])
+    assert get_changes(chat_window) == set()
+    assert_members(chat_window, {'Alice': GOOD})
+
+    chat_window = parse_chat([])
+    assert get_changes(chat_window) == {(LEFT, 'Alice', GOOD, None)}
+    assert_members(chat_window, {})
+
+
+def test_member_listed_twice_changes_standing_with_the_remaining_entry(parse_chat):
+    parse_chat([('100', 'Alice', GOOD), ('200', 'Alice', GOOD)])
+
+    chat_window = parse_chat([('100', 'Alice', GOOD), ('300', 'Alice', BAD)])
+
+    # The last entry lists the member.
+    assert get_changes(chat_window) == {(STANDING_CHANGED, 'Alice', BAD, GOOD)}
+    assert_members(chat_window, {'Alice': BAD})
+
+
+def test_unchanged_window_has_no_changes(parse_chat):
+    users = [('100', 'Alice', GOOD), ('200', 'Bob', None)]
+    previous_chat_window = parse_chat(users)
+
+    chat_window = parse_chat(users)
+
+    assert chat_window.changes == []
+    assert chat_window.members is previous_chat_window.members
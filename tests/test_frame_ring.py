@@ -0,0 +1,70 @@
+import pytest
+
+from lib.frame_ring import FrameRingError, FrameRingReader, FrameRingWriter
+
+
+@pytest.fixture
+def ring_file(tmp_path):
+    return str(tmp_path / 'frames.ring')
+
+
+@pytest.fixture
+def writer(ring_file):
+    writer = FrameRingWriter(ring_file, slot_count=2, slot_size=64)
+    yield writer
+    writer.close()
+
+
+@pytest.fixture
+def reader(ring_file, writer):
+    reader = FrameRingReader(ring_file)
+    yield reader
+    reader.close()
+
+
+def test_frame_is_read_from_its_slot(writer, reader):
+    sequence = writer.write_frame(b'{"frame": 1}')
+
+    assert sequence == 1
+    assert reader.last_sequence == 1
+    assert reader.read_frame_bytes(sequence) == b'{"frame": 1}'
+    with reader.open_frame(sequence) as frame:
+        assert frame.read() == '{"frame": 1}'
+
+
+def test_frames_wrap_around_the_slots(writer, reader):
+    sequences = [writer.write_frame(f'{{"frame": {i}}}'.encode()) for i in range(1, 6)]
+
+    assert sequences == [1, 2, 3, 4, 5]
+    assert reader.last_sequence == 5
+    assert reader.read_frame_bytes(4) == b'{"frame": 4}'
+    assert reader.read_frame_bytes(5) == b'{"frame": 5}'
+    for sequence in (1, 2, 3):
+        with pytest.raises(FrameRingError):
+            reader.read_frame_bytes(sequence)
+
+
+def test_frame_overwritten_while_read_fails(writer, reader):
+    sequence = writer.write_frame(b'{"frame": 1, "text": "abcdefgh"}')
+    frame = reader.open_frame(sequence).buffer
+    assert frame.read(4) == b'{"fr'
+
+    writer.write_frame(b'{"frame": 2}')
+    writer.write_frame(b'{"frame": 3}')
+
+    with pytest.raises(FrameRingError):
+        frame.read()
+
+
+def test_frame_larger_than_a_slot_is_not_written(writer, reader):
+    assert writer.write_frame(b'x' * 65) is None
+    assert reader.last_sequence == 0
+    assert writer.write_frame(b'x' * 64) == 1
+
+
+def test_other_file_is_not_a_ring(tmp_path):
+    other_file = tmp_path / 'frame.json'
+    other_file.write_bytes(b'{"frame": 1}' * 4)
+
+    with pytest.raises(FrameRingError):
+        FrameRingReader(str(other_file))
@@ -0,0 +1,165 @@
+import copy
+import io
+import json
+
+import pytest
+
+import lib.user_interface_parser as parser
+from lib.ui_node_index import CHILDREN, ENTRIES_OF_INTEREST, TYPE_NAME
+from lib.ui_tree_generator import generate_ui_tree
+from lib.user_interface_parser import ParsedWindowCache, SECTION_ATTRIBUTES, parse_memory_read
+
+FRAME = generate_ui_tree(overview_rows=10, chat_users=20, drones=3, depth=2, filler_nodes=20)
+
+
+@pytest.fixture
+def parsed_windows(monkeypatch):
+    """
+    Type names of the windows parsed rather than reused, in parse order.
+    """
+    parsed_windows = []
+    parse_window = getattr(parser, '__parse_window')
+
+    def record_parse(window_json, chat_cache):
+        parsed_windows.append(window_json[TYPE_NAME])
+        return parse_window(window_json, chat_cache)
+
+    monkeypatch.setattr(parser, '__parse_window', record_parse)
+    return parsed_windows
+
+
+def parse(frame: dict, window_cache: ParsedWindowCache):
+    return parse_memory_read(io.StringIO(json.dumps(frame)), window_cache)
+
+
+def find_path(node: dict, type_name: str, name: str = None) -> list[dict]:
+    """
+    :return: Nodes from node down to the first node of this type, and this name if given. Empty if there is none.
+    """
+    if node[TYPE_NAME] == type_name and name in (None, node[ENTRIES_OF_INTEREST].get('_name')):
+        return [node]
+    for child in node.get(CHILDREN) or []:
+        path = find_path(child, type_name, name)
+        if path:
+            return [node] + path
+    return []
+
+
+def test_first_frame_parses_every_window(parsed_windows):
+    ui_tree = parse(FRAME, ParsedWindowCache())
+
+    assert sorted(parsed_windows) == sorted([*SECTION_ATTRIBUTES, 'ChatWindowStack'])
+    assert ui_tree.changed_sections == set(SECTION_ATTRIBUTES.values())
+
+
+def test_unchanged_windows_are_reused(parsed_windows):
+    window_cache = ParsedWindowCache()
+    previous_ui_tree = parse(FRAME, window_cache)
+    parsed_windows.clear()
+
+    ui_tree = parse(copy.deepcopy(FRAME), window_cache)
+
+    assert parsed_windows == []
+    assert ui_tree.changed_sections == set()
+    assert ui_tree.overview is previous_ui_tree.overview
+    assert ui_tree.drones is previous_ui_tree.drones
+    assert ui_tree.ship_ui is previous_ui_tree.ship_ui
+    # Reused chat windows keep their members, with no member changes since the previous frame.
+    assert [chat_window.members for chat_window in ui_tree.chat_windows] == \
+        [chat_window.members for chat_window in previous_ui_tree.chat_windows]
+    assert all(chat_window.changes for chat_window in previous_ui_tree.chat_windows)
+    assert not any(chat_window.changes for chat_window in ui_tree.chat_windows)
+
+
+def test_moved_window_is_parsed_again(parsed_windows):
+    window_cache = ParsedWindowCache()
+    previous_ui_tree = parse(FRAME, window_cache)
+    parsed_windows.clear()
+    frame = copy.deepcopy(FRAME)
+    # Move the container of the overview window: the subtree of the window is the same.
+    find_path(frame, 'OverviewWindow')[-2][ENTRIES_OF_INTEREST]['_displayX'] = 15
+
+    ui_tree = parse(frame, window_cache)
+
+    assert parsed_windows == ['OverviewWindow']
+    assert ui_tree.changed_sections == {'overview'}
+    assert ui_tree.overview is not previous_ui_tree.overview
+    assert ui_tree.overview[0].display_region.x == previous_ui_tree.overview[0].display_region.x + 15
+    assert ui_tree.drones is previous_ui_tree.drones
+    assert ui_tree.ship_ui is previous_ui_tree.ship_ui
+
+
+def test_window_with_a_changed_subtree_is_parsed_again(parsed_windows):
+    window_cache = ParsedWindowCache()
+    previous_ui_tree = parse(FRAME, window_cache)
+    parsed_windows.clear()
+    frame = copy.deepcopy(FRAME)
+    find_path(frame, 'DronesWindow')[-1][ENTRIES_OF_INTEREST]['_displayHeight'] = 250
+
+    ui_tree = parse(frame, window_cache)
+
+    assert parsed_windows == ['DronesWindow']
+    assert ui_tree.changed_sections == {'drones'}
+    assert ui_tree.overview is previous_ui_tree.overview
+    assert ui_tree.ship_ui is previous_ui_tree.ship_ui
+
+
+def test_only_the_changed_window_of_a_section_is_parsed_again(parsed_windows):
+    window_cache = ParsedWindowCache()
+    parse(FRAME, window_cache)
+    parsed_windows.clear()
+    frame = copy.deepcopy(FRAME)
+    user_entries = find_path(frame, 'Container', 'userlist')[-1][CHILDREN][0][CHILDREN]
+    user_entry = copy.deepcopy(user_entries[-1])
+    user_entry[CHILDREN][0][ENTRIES_OF_INTEREST]['_text'] = 'local Pilot 20'
+    user_entries.append(user_entry)
+
+    ui_tree = parse(frame, window_cache)
+
+    assert parsed_windows == ['ChatWindowStack']
+    assert ui_tree.changed_sections == {'chat_windows'}
+    assert [len(chat_window.members) for chat_window in ui_tree.chat_windows] == [21, 2]
+
+
+def test_section_changed_back_is_changed(parsed_windows):
+    window_cache = ParsedWindowCache()
+    parse(FRAME, window_cache)
+    frame = copy.deepcopy(FRAME)
+    find_path(frame, 'ShipUI')[-1][ENTRIES_OF_INTEREST]['_displayWidth'] = 900
+    assert parse(frame, window_cache).changed_sections == {'ship_ui'}
+    parsed_windows.clear()
+
+    ui_tree = parse(FRAME, window_cache)
+
+    # The cache only holds the previous frame.
+    assert parsed_windows == ['ShipUI']
+    assert ui_tree.changed_sections == {'ship_ui'}
+
+
+def test_window_without_a_subtree_hash_is_never_reused(parsed_windows):
+    frame = copy.deepcopy(FRAME)
+    # A container listing its children first is decoded whole, so the ship UI window in it has no subtree hash.
+    container = find_path(frame, 'ShipUI')[-2]
+    children = container.pop(CHILDREN)
+    container_keys = dict(container)
+    container.clear()
+    container.update({CHILDREN: children, **container_keys})
+    window_cache = ParsedWindowCache()
+    parse(frame, window_cache)
+    parsed_windows.clear()
+
+    ui_tree = parse(frame, window_cache)
+
+    assert parsed_windows == ['ShipUI']
+    assert ui_tree.changed_sections == {'ship_ui'}
+    assert ui_tree.ship_ui is not None
+
+
+def test_windows_are_parsed_every_frame_without_a_cache(parsed_windows):
+    parse(FRAME, None)
+    parsed_windows.clear()
+
+    ui_tree = parse(FRAME, None)
+
+    assert len(parsed_windows) == len(SECTION_ATTRIBUTES) + 1
+    assert ui_tree.changed_sections == set(SECTION_ATTRIBUTES.values())
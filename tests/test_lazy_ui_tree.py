@@ -0,0 +1,113 @@
+import io
+import json
+
+import pytest
+
+from lib.ui_tree_generator import generate_ui_tree
+from lib.user_interface_parser import ParsedWindowCache, parse_memory_read, parse_memory_read_lazily
+from models.data_models import LazyUiTree, ShipUI
+
+FRAME = json.dumps(generate_ui_tree(overview_rows=10, chat_users=20, drones=3, depth=2, filler_nodes=20))
+
+
+class SectionParser:
+    """
+    Section parser returning a new value on each call, and failing the calls given by number, 1-based.
+    """
+    def __init__(self, failing_calls=()):
+        self.failing_calls = set(failing_calls)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls in self.failing_calls:
+            raise ValueError(f'Simulated failure of parse {self.calls}')
+        return [self.calls]
+
+
+def create_lazy_ui_tree(**section_parsers) -> LazyUiTree:
+    parsers = {section: SectionParser() for section in ('chat_windows', 'overview', 'drones', 'ship_ui')}
+    parsers.update(section_parsers)
+    return LazyUiTree('1', parsers, set())
+
+
+def test_section_is_parsed_on_first_access():
+    overview_parser = SectionParser()
+    drones_parser = SectionParser()
+    ui_tree = create_lazy_ui_tree(overview=overview_parser, drones=drones_parser)
+
+    assert overview_parser.calls == 0
+    assert not ui_tree.is_parsed('overview')
+    assert ui_tree.overview == [1]
+    assert overview_parser.calls == 1 and ui_tree.is_parsed('overview')
+    assert drones_parser.calls == 0 and not ui_tree.is_parsed('drones')
+
+
+def test_section_is_memoized():
+    overview_parser = SectionParser()
+    ui_tree = create_lazy_ui_tree(overview=overview_parser)
+
+    overview = ui_tree.overview
+
+    assert ui_tree.overview is overview
+    assert overview_parser.calls == 1
+
+
+def test_used_sections_are_recorded():
+    ui_tree = create_lazy_ui_tree()
+    assert ui_tree.used_sections == set()
+
+    ui_tree.drones
+    ui_tree.ship_ui
+    ui_tree.drones
+
+    assert ui_tree.used_sections == {'drones', 'ship_ui'}
+    # A log line parses nothing.
+    assert 'overview=<not parsed>' in repr(ui_tree)
+    assert ui_tree.used_sections == {'drones', 'ship_ui'}
+
+
+def test_failed_parse_is_retried():
+    overview_parser = SectionParser(failing_calls=[1, 2])
+    ui_tree = create_lazy_ui_tree(overview=overview_parser)
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match='Simulated failure'):
+            ui_tree.overview
+        assert not ui_tree.is_parsed('overview')
+    assert ui_tree.overview == [3]
+    assert ui_tree.overview == [3]
+    assert overview_parser.calls == 3
+    assert ui_tree.used_sections == {'overview'}
+
+
+def test_set_section_is_not_parsed():
+    overview_parser = SectionParser()
+    ui_tree = create_lazy_ui_tree(overview=overview_parser)
+
+    ui_tree.overview = []
+
+    assert ui_tree.overview == []
+    assert overview_parser.calls == 0
+
+
+def test_lazy_parse_equals_the_full_parse():
+    ui_tree = parse_memory_read(io.StringIO(FRAME))
+    reopened_frames = []
+
+    def reopen_frame():
+        reopened_frames.append(io.StringIO(FRAME))
+        return reopened_frames[-1]
+
+    lazy_ui_tree = parse_memory_read_lazily(io.StringIO(FRAME), reopen_frame, ParsedWindowCache(), {'overview'})
+
+    assert lazy_ui_tree.compared_sections == {'overview'}
+    assert lazy_ui_tree.changed_sections == {'overview'}
+    assert lazy_ui_tree.overview == ui_tree.overview
+    assert reopened_frames == []
+    # Sections not read along with the frame are read from the reopened frame.
+    assert lazy_ui_tree.ship_ui == ui_tree.ship_ui
+    assert isinstance(lazy_ui_tree.ship_ui, ShipUI)
+    assert len(reopened_frames) == 1 and reopened_frames[0].closed
+    assert lazy_ui_tree.chat_windows == ui_tree.chat_windows
+    assert lazy_ui_tree.used_sections == {'overview', 'ship_ui', 'chat_windows'}
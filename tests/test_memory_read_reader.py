@@ -0,0 +1,112 @@
+import io
+import json
+import random
+
+import pytest
+
+from lib.memory_read_reader import SUBTREE_HASH, SUBTREE_TEXT, read_pruned_ui_tree
+from lib.ui_node_index import ADDRESS, CHILDREN, ENTRIES_OF_INTEREST, TYPE_NAME
+from lib.ui_tree_generator import generate_ui_tree
+from lib.user_interface_parser import SECTION_TYPES
+
+
+def generate_frame(seed: int, null_children: bool = False) -> dict:
+    return generate_ui_tree(overview_rows=20, chat_users=15, drones=3, depth=3, filler_nodes=50, seed=seed,
+                            null_children=null_children)
+
+
+def reorder_keys(node: dict, rng: random.Random) -> dict:
+    """
+    :return: Copy of the tree with the keys of some nodes in another order than the Sanderling one: children before the
+        type name, or the entries first.
+    """
+    children = node.get(CHILDREN)
+    if children is not None:
+        children = [reorder_keys(child, rng) for child in children]
+    keys = [ADDRESS, TYPE_NAME, ENTRIES_OF_INTEREST] + ([CHILDREN] if CHILDREN in node else [])
+    order = rng.random()
+    if order < 0.2 and CHILDREN in node:
+        keys = [CHILDREN, ENTRIES_OF_INTEREST, ADDRESS, TYPE_NAME]
+    elif order < 0.4:
+        keys = [ENTRIES_OF_INTEREST, TYPE_NAME, ADDRESS] + keys[3:]
+    return {key: children if key == CHILDREN else node[key] for key in keys}
+
+
+def prune(node: dict, section_types: set[str]) -> dict:
+    """
+    Reference pruning of a fully loaded tree. Sections are kept whole, and so are nodes listing their children before
+    their type name, which the stream reader cannot tell from a section. Other nodes are kept, without their other
+    children, when they are ancestors of a kept node.
+    """
+    keys = list(node)
+    if node.get(TYPE_NAME) in section_types or (
+            CHILDREN in keys and (TYPE_NAME not in keys or keys.index(CHILDREN) < keys.index(TYPE_NAME))):
+        return node
+
+    pruned = {key: value for key, value in node.items() if key != CHILDREN}
+    if CHILDREN in node:
+        pruned[CHILDREN] = []
+        for child in node[CHILDREN] or []:
+            pruned_child = prune(child, section_types)
+            if pruned_child is child or pruned_child.get(CHILDREN):
+                pruned[CHILDREN].append(pruned_child)
+    return pruned
+
+
+def strip_hashes(node: dict, texts: list) -> dict:
+    if SUBTREE_HASH in node:
+        texts.append((node.pop(SUBTREE_HASH), node.pop(SUBTREE_TEXT, None), json.dumps(node)))
+    for child in node.get(CHILDREN) or []:
+        strip_hashes(child, texts)
+    return node
+
+
+def read(text: str, section_types, chunk_size: int) -> tuple[dict, list]:
+    texts = []
+    ui_tree_root = read_pruned_ui_tree(io.StringIO(text), section_types, chunk_size, keep_section_text=True)
+    return strip_hashes(ui_tree_root, texts), texts
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('null_children', [False, True])
+@pytest.mark.parametrize('chunk_size', [3, 1 << 16])
+def test_pruned_tree_matches_the_pruned_full_tree(seed, null_children, chunk_size):
+    frame = generate_frame(seed, null_children)
+    text = json.dumps(frame, indent=1 if seed % 2 else None)
+
+    ui_tree_root, texts = read(text, SECTION_TYPES, chunk_size)
+
+    assert ui_tree_root == prune(json.loads(text), set(SECTION_TYPES))
+    assert len(texts) == len(SECTION_TYPES) + 1
+    for subtree_hash, subtree_text, node in texts:
+        assert subtree_hash == hash(subtree_text)
+        assert json.loads(subtree_text) == json.loads(node)
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('chunk_size', [3, 1 << 16])
+def test_pruned_tree_with_keys_out_of_order(seed, chunk_size):
+    frame = reorder_keys(generate_frame(seed, null_children=seed % 2 == 1), random.Random(seed))
+    text = json.dumps(frame)
+
+    ui_tree_root, texts = read(text, SECTION_TYPES, chunk_size)
+
+    assert ui_tree_root == prune(json.loads(text), set(SECTION_TYPES))
+    for subtree_hash, subtree_text, node in texts:
+        assert subtree_hash == hash(subtree_text)
+
+
+@pytest.mark.parametrize('section_types', [(), ('Container',), ('UIRoot',), ('XmppChatWindow', 'ShipSlot')])
+def test_pruned_tree_of_other_section_types(section_types):
+    text = json.dumps(generate_frame(0, null_children=True))
+
+    ui_tree_root, _ = read(text, section_types, 5)
+
+    assert ui_tree_root == prune(json.loads(text), set(section_types))
+
+
+def test_truncated_frame_fails():
+    text = json.dumps(generate_frame(0))
+
+    with pytest.raises(ValueError):
+        read_pruned_ui_tree(io.StringIO(text[:len(text) // 2]), SECTION_TYPES, 3)
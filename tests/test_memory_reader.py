@@ -0,0 +1,138 @@
+import io
+
+import pytest
+
+from lib.frame_ring import FrameRingError
+from lib.memory_reader import MemoryReadError, MemoryReaderSession, PipeMemoryReader
+from tests.frames import get_frame
+
+
+class FakeMemoryReader:
+    """
+    Backend failing the reads given by number, 1-based, and serving a frame with its number as root address otherwise.
+    """
+    def __init__(self, failing_reads=(), error: type = MemoryReadError):
+        self.failing_reads = set(failing_reads)
+        self.error = error
+        self.reads = 0
+        self.closed = False
+        self.frames = []
+
+    def read_frame(self, root_address):
+        self.reads += 1
+        if self.reads in self.failing_reads:
+            raise self.error(f'Simulated failure of read {self.reads}')
+        self.frames.append(self.open_last_frame())
+        return self.frames[-1]
+
+    def open_last_frame(self):
+        return io.StringIO(get_frame(str(self.reads)))
+
+    def open_last_frame_bytes(self):
+        return io.BytesIO(get_frame(str(self.reads)).encode())
+
+    def close(self):
+        self.closed = True
+
+
+def test_pipe_reader_reads_frames_through_the_ring(create_pipe_reader, frame_files):
+    reader = create_pipe_reader(frame_files)
+
+    for frame_file in frame_files + frame_files:
+        with reader.read_frame(None) as frame:
+            assert frame.read() == frame_file.read_text()
+        assert reader.last_sequence is not None
+        with reader.open_last_frame_bytes() as frame:
+            assert frame.read() == frame_file.read_bytes()
+    assert reader.last_sequence == 4
+
+
+@pytest.mark.parametrize('options', [('--no-ring',), ('--slot-size', '16')])
+def test_pipe_reader_reads_frames_answered_in_the_pipe(create_pipe_reader, frame_files, options):
+    reader = create_pipe_reader(frame_files, *options)
+
+    for frame_file in frame_files:
+        with reader.read_frame(None) as frame:
+            assert frame.read() == frame_file.read_text()
+        assert reader.last_sequence is None
+        with reader.open_last_frame_bytes() as frame:
+            assert frame.read() == frame_file.read_bytes()
+
+
+def test_pipe_reader_reports_reader_errors(create_pipe_reader, frame_files):
+    reader = create_pipe_reader(frame_files, '--fail-requests', '1')
+
+    with pytest.raises(MemoryReadError, match='Simulated failure'):
+        reader.read_frame(None)
+    with reader.read_frame(None) as frame:
+        assert frame.read() == frame_files[1].read_text()
+
+
+def test_pipe_reader_restarts_a_stopped_reader(create_pipe_reader, frame_files):
+    reader = create_pipe_reader(frame_files, '--exit-after', '1', ring=False)
+    reader.read_frame(None).close()
+
+    with pytest.raises(MemoryReadError, match='pipe is broken'):
+        reader.read_frame(None)
+    assert reader.process is None
+    with reader.read_frame(None) as frame:
+        assert frame.read() == frame_files[0].read_text()
+
+
+def test_session_retries_a_failed_read():
+    backend = FakeMemoryReader(failing_reads=[1])
+    session = MemoryReaderSession([backend], retry_delay=0)
+
+    ui_tree = session.read_ui_tree('2')
+
+    assert ui_tree.root_address == '2'
+    assert session.backend is backend
+
+
+@pytest.mark.parametrize('error', [MemoryReadError, FrameRingError])
+def test_session_falls_back_to_the_next_backend(error):
+    failing_backend = FakeMemoryReader(failing_reads=[1, 2], error=error)
+    next_backend = FakeMemoryReader()
+    session = MemoryReaderSession([failing_backend, next_backend], max_attempts=2, retry_delay=0)
+
+    ui_tree = session.read_ui_tree('1')
+
+    assert ui_tree.root_address == '1'
+    assert failing_backend.reads == 2 and failing_backend.closed
+    assert session.backends == [next_backend]
+
+
+def test_session_keeps_the_last_backend():
+    backend = FakeMemoryReader(failing_reads=[1, 2])
+    session = MemoryReaderSession([backend], max_attempts=2, retry_delay=0)
+
+    with pytest.raises(MemoryReadError):
+        session.read_ui_tree('1')
+    assert session.backends == [backend] and not backend.closed
+    assert session.read_ui_tree('3').root_address == '3'
+
+
+def test_session_falls_back_from_a_pipe_reader_failing_to_start(tmp_path):
+    next_backend = FakeMemoryReader()
+    session = MemoryReaderSession([PipeMemoryReader([str(tmp_path / 'missing-reader')]), next_backend],
+                                  retry_delay=0)
+
+    assert session.read_ui_tree('1').root_address == '1'
+    assert session.backends == [next_backend]
+
+
+class FailingFrameWriter:
+    def write_frame(self, frame, timestamp, window_types):
+        raise OSError('Disk full')
+
+    def close(self):
+        pass
+
+
+def test_session_closes_the_frame_when_recording_fails():
+    backend = FakeMemoryReader()
+    session = MemoryReaderSession([backend], frame_writer=FailingFrameWriter())
+
+    with pytest.raises(OSError):
+        session.read_ui_tree('1')
+    assert backend.frames and all(frame.closed for frame in backend.frames)
@@ -0,0 +1,120 @@
+import pytest
+
+import lib.root_address_cache as root_address_cache
+from lib.client_orchestrator import BotClient
+from lib.memory_reader import MemoryReaderSession
+from lib.root_address_cache import MAX_ENTRIES, RootAddressCache, get_cache_key
+
+KEY = get_cache_key(1234, 1700000000.5, 'Pilot')
+
+
+class CountingBot:
+    def __init__(self):
+        self.runs = 0
+
+    def run(self, ui_tree):
+        self.runs += 1
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RootAddressCache(str(tmp_path / 'ui-root-addresses.json'))
+
+
+def test_cache_gets_put_and_removed_addresses(cache):
+    assert cache.get(KEY) is None
+
+    cache.put(KEY, '100')
+    assert cache.get(KEY) == '100'
+    cache.put(KEY, '200')
+    assert cache.get(KEY) == '200'
+
+    cache.remove(KEY)
+    assert cache.get(KEY) is None
+
+
+def test_cache_is_persisted(cache):
+    cache.put(KEY, '100')
+
+    assert RootAddressCache(cache.cache_file).get(KEY) == '100'
+
+
+def test_cache_keeps_the_most_recent_entries(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(root_address_cache.time, 'time', lambda: now[0])
+    for pid in range(MAX_ENTRIES + 1):
+        now[0] += 1
+        cache.put(get_cache_key(pid, 0, None), str(pid))
+
+    assert cache.get(get_cache_key(0, 0, None)) is None
+    assert cache.get(get_cache_key(1, 0, None)) == '1'
+    assert cache.get(get_cache_key(MAX_ENTRIES, 0, None)) == str(MAX_ENTRIES)
+
+    # Using an entry again makes it the most recent one.
+    now[0] += 1
+    cache.put(get_cache_key(1, 0, None), '1')
+    now[0] += 1
+    cache.put(get_cache_key(MAX_ENTRIES + 1, 0, None), str(MAX_ENTRIES + 1))
+    assert cache.get(get_cache_key(1, 0, None)) == '1'
+    assert cache.get(get_cache_key(2, 0, None)) is None
+
+
+def test_cache_ignores_an_unreadable_file(cache):
+    with open(cache.cache_file, 'w') as f:
+        f.write('{not json')
+
+    assert cache.get(KEY) is None
+    cache.put(KEY, '100')
+    assert cache.get(KEY) == '100'
+
+
+def test_key_of_a_restarted_process_misses(cache):
+    cache.put(get_cache_key(1234, 1700000000.5, 'Pilot'), '100')
+
+    # Same PID and character, but a new process.
+    assert cache.get(get_cache_key(1234, 1700000999.25, 'Pilot')) is None
+    assert cache.get(get_cache_key(1234, 1700000000.5, 'Other pilot')) is None
+    assert cache.get(get_cache_key(1234, 1700000000.5, 'Pilot')) == '100'
+
+
+def test_validation_accepts_the_live_root(create_pipe_reader, frame_files):
+    session = MemoryReaderSession([create_pipe_reader(frame_files[:1], '--check-root-address')])
+
+    assert session.validate_root_address('100')
+
+
+def test_validation_rejects_a_stale_root(create_pipe_reader, frame_files):
+    reader = create_pipe_reader(frame_files[:1], '--check-root-address')
+    session = MemoryReaderSession([reader], max_attempts=1)
+
+    assert not session.validate_root_address('999')
+    # A failed validation does not drop the backend.
+    assert session.backends == [reader]
+    assert session.validate_root_address('100')
+
+
+def test_client_uses_the_cached_root(create_pipe_reader, frame_files, cache):
+    cache.put(KEY, '100')
+    session = MemoryReaderSession([create_pipe_reader(frame_files[:1], '--check-root-address')])
+    bot = CountingBot()
+    client = BotClient('client', session, [bot], root_address_cache=cache, root_address_key=KEY)
+
+    client.tick()
+
+    assert client.ui_tree_root_address == '100'
+    assert bot.runs == 1
+    assert cache.get(KEY) == '100'
+
+
+def test_client_searches_the_root_again_for_a_stale_cached_root(create_pipe_reader, frame_files, cache):
+    cache.put(KEY, '999')
+    session = MemoryReaderSession([create_pipe_reader(frame_files[:1], '--check-root-address')])
+    bot = CountingBot()
+    client = BotClient('client', session, [bot], root_address_cache=cache, root_address_key=KEY)
+
+    client.tick()
+
+    # The stale address was dropped and the root found by a read without a root address.
+    assert client.ui_tree_root_address == '100'
+    assert bot.runs == 1
+    assert cache.get(KEY) == '100'
@@ -0,0 +1,159 @@
+import pickle
+import random
+
+import pytest
+
+from models.data_models import OverviewIndicator
+from models.state_history import ARMOR, HISTORY_CAPACITY, MAX_WINDOWS, SHIELD, MetricSeries, StateHistory, \
+    get_indicator_metric
+
+# More window lengths than rolling windows, so the last ones are answered by scanning the samples.
+WINDOW_LENGTHS = [0, 0.5, 1, 3, 10, 60, 250, 1000, 5000, 2, 30, 400]
+
+
+def get_window(samples: list[tuple[float, float]], seconds: float) -> list[tuple[float, float]]:
+    """
+    Reference window: the samples still held in a series, from seconds before the last one.
+    """
+    held_samples = samples[-HISTORY_CAPACITY:]
+    start_time = held_samples[-1][0] - seconds
+    return [(time, value) for (time, value) in held_samples if time >= start_time]
+
+
+def get_rate(window: list[tuple[float, float]]):
+    elapsed = window[-1][0] - window[0][0]
+    return (window[-1][1] - window[0][1]) / elapsed if elapsed > 0 else None
+
+
+def assert_windows(series: MetricSeries, samples: list[tuple[float, float]]):
+    for seconds in WINDOW_LENGTHS:
+        window = get_window(samples, seconds)
+        assert series.samples(seconds) == window
+        assert series.min(seconds) == min(value for (_, value) in window)
+        assert series.max(seconds) == max(value for (_, value) in window)
+        assert series.rate(seconds) == get_rate(window)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_series_matches_the_samples_after_the_ring_wraps(seed):
+    rng = random.Random(seed)
+    series = MetricSeries(SHIELD)
+    samples = []
+    time = 1000.0
+
+    for step in range(2 * HISTORY_CAPACITY + 500):
+        # Some samples share their time, e.g. two ticks within the clock resolution.
+        time += rng.choice([0, 0.25, 1, 1, 1, 2.5])
+        samples.append((time, float(rng.randint(0, 100))))
+        series.append(*samples[-1])
+        if step % 97 == 0 or step in (HISTORY_CAPACITY - 1, HISTORY_CAPACITY, HISTORY_CAPACITY + 1):
+            assert_windows(series, samples)
+
+    assert_windows(series, samples)
+    assert len(series) == HISTORY_CAPACITY
+    assert series.first_sample == series.count - HISTORY_CAPACITY
+    assert series.last == samples[-1][1] and series.last_time == samples[-1][0]
+
+
+def test_windows_beyond_the_rolling_windows_scan_the_samples():
+    series = MetricSeries(SHIELD)
+    samples = [(float(time), float(time % 7)) for time in range(HISTORY_CAPACITY + 100)]
+    for sample in samples:
+        series.append(*sample)
+
+    assert_windows(series, samples)
+
+    assert len(series.windows) == MAX_WINDOWS
+    assert set(series.windows) == set(WINDOW_LENGTHS[:MAX_WINDOWS])
+    # A window length without a rolling window keeps matching as samples are added.
+    for time in range(HISTORY_CAPACITY + 100, HISTORY_CAPACITY + 120):
+        samples.append((float(time), float(-time)))
+        series.append(*samples[-1])
+        assert_windows(series, samples)
+
+
+def test_window_starting_before_the_first_sample():
+    series = MetricSeries(ARMOR)
+    series.append(10, 50)
+    series.append(12, 40)
+    series.append(14, 70)
+
+    assert series.samples(100) == [(10, 50), (12, 40), (14, 70)]
+    assert series.min(100) == 40 and series.max(100) == 70
+    assert series.rate(100) == 5
+    # From the last sample only.
+    assert series.samples(1) == [(14, 70)]
+    assert series.rate(1) is None
+
+
+def test_window_starting_before_the_first_sample_held():
+    series = MetricSeries(ARMOR, capacity=4)
+    for time in range(10):
+        series.append(time, time * 10)
+
+    assert series.samples(100) == [(6, 60), (7, 70), (8, 80), (9, 90)]
+    assert series.min(100) == 60
+    assert series.rate(100) == 10
+
+
+def test_empty_series():
+    series = MetricSeries(SHIELD)
+
+    assert series.last is None and series.last_time is None
+    assert series.rate(10) is None and series.min(10) is None and series.max(10) is None
+    assert series.samples(10) == []
+
+
+def test_time_since_first_indicator():
+    history = StateHistory()
+    flags = OverviewIndicator.WARP_DISRUPT | OverviewIndicator.WEB
+    assert history.time_since_first(OverviewIndicator.WARP_DISRUPT) is None
+
+    history.record_indicators(10, OverviewIndicator.WARP_DISRUPT)
+    history.record_indicators(11, OverviewIndicator.WARP_DISRUPT)
+    history.record_indicators(12, flags)
+    history.record_indicators(15, flags)
+
+    assert history.time_since_first(OverviewIndicator.WARP_DISRUPT) == 5
+    assert history.time_since_first(OverviewIndicator.WEB) == 3
+    # Since all of them are shown.
+    assert history.time_since_first(flags) == 3
+    assert history.time_since_first(OverviewIndicator.JAM) is None
+    assert history.time_since_first(flags | OverviewIndicator.JAM) is None
+    assert history.used_sections == {'overview'}
+
+
+def test_time_since_first_indicator_restarts_after_a_break():
+    history = StateHistory()
+    history.record_indicators(10, OverviewIndicator.WARP_DISRUPT)
+    history.record_indicators(11, 0)
+    assert history.time_since_first(OverviewIndicator.WARP_DISRUPT) is None
+
+    history.record_indicators(12, OverviewIndicator.WARP_DISRUPT)
+    history.record_indicators(20, OverviewIndicator.WARP_DISRUPT)
+
+    assert history.time_since_first(OverviewIndicator.WARP_DISRUPT) == 8
+
+
+def test_history_records_the_sections_queried():
+    history = StateHistory()
+    history.append(SHIELD, 1, 100)
+    history.append(SHIELD, 2, 90)
+
+    assert history.rate(SHIELD, 10) == -10
+    assert history.min(ARMOR, 10) is None
+    assert history.last(get_indicator_metric(OverviewIndicator.ATTACKING_ME)) is None
+    assert history.used_sections == {'ship_ui', 'overview'}
+
+
+def test_history_is_copied_to_worker_processes():
+    history = StateHistory()
+    history.append(SHIELD, 1, 100)
+    history.append(SHIELD, 2, 90)
+    history.rate(SHIELD, 10)
+
+    history_copy = pickle.loads(pickle.dumps(history))
+
+    history_copy.append(SHIELD, 3, 50)
+    assert history_copy.min(SHIELD, 10) == 50
+    assert history.min(SHIELD, 10) == 90
@@ -0,0 +1,82 @@
+import pytest
+
+from lib.tick_scheduler import TickScheduler
+from models.data_models import UiTree
+
+
+class Bot:
+    def __init__(self, tick_interval: float = None):
+        self.tick_interval = tick_interval
+
+
+def run_ticks(scheduler: TickScheduler, start_times) -> dict[Bot, list[float]]:
+    """
+    :return: Run times of each bot of the scheduler over ticks starting at start_times.
+    """
+    run_times = {bot: [] for bot in scheduler.bots}
+    for start_time in start_times:
+        for bot in scheduler.bots:
+            if scheduler.is_bot_due(bot, start_time):
+                scheduler.mark_bot_run(bot, start_time)
+                run_times[bot].append(start_time)
+    return run_times
+
+
+@pytest.mark.parametrize('interval, run_times', [
+    (3, [0, 3, 6, 9, 12, 15, 18, 21, 24, 27, 30]),
+    (5, [0, 6, 12, 15, 21, 27, 30]),
+    (6, [0, 6, 12, 18, 24, 30]),
+    (7, [0, 9, 15, 21, 30]),
+])
+def test_bot_runs_at_its_interval_on_average(interval, run_times):
+    fast_bot = Bot(3)
+    bot = Bot(interval)
+    scheduler = TickScheduler([fast_bot, bot])
+    assert scheduler.period == 3
+
+    assert run_ticks(scheduler, range(0, 31, 3))[bot] == run_times
+
+
+def test_bot_due_every_period_runs_on_late_ticks():
+    bot = Bot(1)
+    scheduler = TickScheduler([bot])
+
+    # Ticks start at or after their due time, late by the time taken to wake up.
+    start_times = [0, 1.01, 2.02, 3.001, 4.05, 5.06]
+
+    assert run_ticks(scheduler, start_times)[bot] == start_times
+
+
+def test_late_bot_does_not_catch_up():
+    bot = Bot(2)
+    scheduler = TickScheduler([bot])
+
+    # A long tick from 2 to 10.
+    assert run_ticks(scheduler, [0, 2, 10, 11, 12, 13, 14])[bot] == [0, 2, 10, 12, 14]
+
+
+def test_adaptive_interval_applies_right_away():
+    bot = Bot()
+    scheduler = TickScheduler([bot], default_interval=3, combat_interval=1, idle_interval=6)
+    idle_ui_tree = UiTree(changed_sections=set())
+    scheduler.adapt(idle_ui_tree)
+    assert run_ticks(scheduler, [0, 3, 6])[bot] == [0, 6]
+
+    scheduler.adaptive_interval = scheduler.combat_interval
+
+    assert run_ticks(scheduler, [7, 8, 9])[bot] == [7, 8, 9]
+
+
+def test_reloaded_bots_drop_the_schedule_of_the_removed_bots():
+    kept_bot = Bot(5)
+    removed_bot = Bot(5)
+    scheduler = TickScheduler([kept_bot, removed_bot])
+    run_ticks(scheduler, [0])
+    new_bot = Bot(5)
+
+    scheduler.set_bots([kept_bot, new_bot])
+
+    assert scheduler.bots == [kept_bot, new_bot]
+    assert set(scheduler.last_due_times) == {id(kept_bot)}
+    assert scheduler.is_bot_due(new_bot, 1)
+    assert not scheduler.is_bot_due(kept_bot, 1)
@@ -0,0 +1,153 @@
+import pytest
+
+from lib.ui_node_index import ADDRESS, CHILDREN, ENTRIES_OF_INTEREST, TYPE_NAME, UiNodeIndex
+from lib.ui_selector import SelectorError, compile_selector, select_all
+
+
+def node(address: str, type_name: str, *children: dict, **entries) -> dict:
+    return {ADDRESS: address, TYPE_NAME: type_name,
+            ENTRIES_OF_INTEREST: {'_displayX': 0, '_displayY': 0, '_displayWidth': 10, '_displayHeight': 10, **entries},
+            CHILDREN: list(children)}
+
+
+UI_TREE = node(
+    'root', 'UIRoot',
+    node('ship', 'ShipUI',
+         node('slot1', 'ShipSlot', node('button1', 'ModuleButton', _hint='Gun'), _name='inFlightHighSlot1'),
+         node('slots', 'Container',
+              node('slot2', 'ShipSlot', node('button2', 'ModuleButton')),
+              node('nested', 'Container', node('label', 'EveLabelSmall', _setText='Slots')))),
+    node('overview', 'OverviewWindow',
+         node('scroll', 'BasicDynamicScroll',
+              node('headers', 'ScrollColumnHeaders'),
+              node('content', 'Container',
+                   node('entry', 'OverviewScrollEntry', node('text', 'OverviewLabel', _text='Distance')),
+                   _name='__content'))),
+    node('drones', 'DronesWindow',
+         node('in-bay', 'DroneInBayEntry', _name='drone entry'),
+         node('in-space', 'DroneInSpaceEntry', _name='drone entry'),
+         node('group', 'DroneGroupHeader')))
+
+
+@pytest.fixture(scope='module')
+def index():
+    return UiNodeIndex(UI_TREE)
+
+
+def select(index: UiNodeIndex, selector: str, parent_only: bool = False) -> list[str]:
+    return [ui_node.address for ui_node in compile_selector(selector).select(index, index.root, parent_only)]
+
+
+@pytest.mark.parametrize('selector, addresses', [
+    ('ModuleButton', ['button1', 'button2']),
+    ('ShipUI ModuleButton', ['button1', 'button2']),
+    ('ShipUI > ShipSlot', ['slot1']),
+    ('ShipUI > * > ShipSlot ModuleButton', ['button2']),
+    ('ShipUI > ShipSlot > ModuleButton', ['button1']),
+    ('Container ShipSlot', ['slot2']),
+    ('Container > EveLabelSmall', ['label']),
+    ('ShipUI Container > Container EveLabelSmall', ['label']),
+    ('OverviewWindow ModuleButton', []),
+    ('UIRoot > ShipSlot', []),
+])
+def test_combinators(index, selector, addresses):
+    assert select(index, selector) == addresses
+
+
+@pytest.mark.parametrize('selector, addresses', [
+    ('[type*=Scroll]', ['scroll', 'headers', 'entry']),
+    ('[type*=scroll]', []),
+    ('[type*=scroll i]', ['scroll', 'headers', 'entry']),
+    ('OverviewWindow [type*=headers i]', ['headers']),
+    ('[type^=Drone][type$=Entry]', ['in-bay', 'in-space']),
+    ('[type=ShipSlot]', ['slot1', 'slot2']),
+    ('[type*=Slot][_name]', ['slot1']),
+])
+def test_type_name_conditions(index, selector, addresses):
+    assert select(index, selector) == addresses
+
+
+@pytest.mark.parametrize('selector, addresses', [
+    ('[_name=__content]', ['content']),
+    ('[_name="drone entry"]', ['in-bay', 'in-space']),
+    ("[_name='drone entry']", ['in-bay', 'in-space']),
+    ('[_name=INFLIGHTHIGHSLOT1 i]', ['slot1']),
+    ('[_name^=inFlight]', ['slot1']),
+    ('[_hint]', ['button1']),
+    ('[_setText], [_text]', ['label', 'text']),
+    ('ShipUI [_setText], OverviewWindow [_text]', ['label', 'text']),
+    ('XmppChatSimpleUserEntry, ShipSlot', ['slot1', 'slot2']),
+    ('*', ['root']),
+])
+def test_entry_conditions_and_alternatives(index, selector, addresses):
+    assert select(index, selector, parent_only=selector == '*') == addresses
+
+
+def test_nested_matches_are_dropped(index):
+    assert select(index, 'Container', parent_only=True) == ['slots', 'content']
+    # Breadth-first, then in tree order.
+    assert select(index, 'Container') == ['slots', 'nested', 'content']
+
+
+def test_select_in_a_subtree(index):
+    (ship_ui,) = compile_selector('ShipUI').select(index, index.root)
+
+    assert [ui_node.address for ui_node in compile_selector('[type*=Slot]').select(index, ship_ui)] == \
+        ['slot1', 'slot2']
+    assert compile_selector('OverviewLabel').select(index, ship_ui) == []
+    # The subtree root is matched too, but not its ancestors.
+    assert [ui_node.address for ui_node in compile_selector('ShipUI').select(index, ship_ui)] == ['ship']
+    assert compile_selector('UIRoot ShipSlot').select(index, ship_ui) == []
+
+
+def test_type_name_condition_matches_types_of_later_frames(index):
+    selector = compile_selector('[type$=Entry]')
+    assert select(index, '[type$=Entry]') == ['in-bay', 'in-space', 'entry']
+
+    other_index = UiNodeIndex(
+        node('root', 'UIRoot', node('user', 'XmppChatUserEntry'), node('drone', 'DroneInBayEntry')))
+
+    assert [ui_node.address for ui_node in selector.select(other_index, other_index.root)] == ['user', 'drone']
+    assert selector.alternatives[0][0].conditions[0].matching_types['XmppChatUserEntry']
+
+
+def test_select_all(index):
+    selectors = {'buttons': compile_selector('ShipSlot ModuleButton'), 'texts': compile_selector('[_text]'),
+                 'none': compile_selector('ProbeScannerWindow')}
+
+    selections = select_all(index, index.root, selectors)
+
+    assert {name: [ui_node.address for ui_node in nodes] for name, nodes in selections.items()} == \
+        {'buttons': ['button1', 'button2'], 'texts': ['text'], 'none': []}
+
+
+def test_root_types():
+    assert compile_selector('ShipUI > ShipSlot, DronesWindow').root_types == {'ShipUI', 'DronesWindow'}
+    assert compile_selector('ShipUI, [_name=x] ShipSlot').root_types is None
+    assert compile_selector('* ShipSlot').root_types is None
+
+
+def test_compiled_selectors_are_cached():
+    assert compile_selector('ShipUI ModuleButton') is compile_selector('ShipUI ModuleButton')
+
+
+@pytest.mark.parametrize('selector', [
+    '',
+    '   ',
+    'ShipUI >',
+    '> ShipSlot',
+    'ShipUI > > ShipSlot',
+    'ShipUI,',
+    ', ShipUI',
+    '[_name=x]ShipUI',
+    'ShipUI ShipSlot[',
+    '[_name=]',
+    '[_name~=x]',
+    '#slot',
+    # Pseudo-classes are not part of the language: fail rather than match every ShipSlot.
+    'ShipSlot:nth(2)',
+    'ShipSlot:nth-child(2)',
+])
+def test_invalid_selectors_fail(selector):
+    with pytest.raises(SelectorError, match='Invalid selector'):
+        compile_selector(selector)